@@ -0,0 +1,271 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+
+from connect_four import BitBoard, ConnectFour
+import tic_tac_toe_solver
+
+# Position encodings, one position per line, optionally followed by the side to
+# move ('x' or 'o'; by default it follows from the piece counts, x moves first).
+# Blank lines and lines starting with '#' are skipped.
+#
+# Connect Four: rows from top to bottom separated by '/', 'x' for piece 1, 'o'
+# for piece 2 and a digit for a run of empty cells, e.g. '7/7/7/7/3o3/2xx3'.
+# A line of column digits (0-6) is read as the moves played from the empty
+# board instead, like the positions in benchmark.py: '3324223415566011'.
+#
+# Tic-tac-toe: the nine cells row by row as 'X', 'O' or '.', with or without
+# '/' between rows: 'X...O...X' or 'X../.O./..X'.
+#
+# Results give the best move (a column, or a cell row * 3 + col) and its score
+# from the side to move's view, so positive is good for the side to move.
+# Connect Four scores are on the ConnectFour.minimax scale; tic-tac-toe scores
+# are exact: 1 win, 0 draw, -1 loss.
+CONNECT_FOUR_PIECES = {'x': 1, 'o': 2}
+TIC_TAC_TOE_CELLS = {'x': tic_tac_toe_solver.X, 'o': tic_tac_toe_solver.O, '.': tic_tac_toe_solver.EMPTY}
+
+def parse_side(fields, counts):
+    # counts are (first player's stones, second player's stones)
+    if counts[0] - counts[1] not in (0, 1):
+        raise ValueError("impossible stone counts %d and %d" % counts)
+    if len(fields) > 1:
+        side = fields[1].lower()
+        if side not in ('x', 'o'):
+            raise ValueError("side to move must be x or o, not %r" % fields[1])
+        return 1 if side == 'x' else 2
+    return 1 if counts[0] == counts[1] else 2
+
+def parse_connect_four(text):
+    # Returns a BitBoard with the side to move set
+    fields = text.split()
+    if not fields or len(fields) > 2:
+        raise ValueError("expected a position and an optional side to move")
+    position = fields[0]
+    if '/' not in position and position.isdigit():
+        board = BitBoard()
+        for char in position:
+            col = int(char)
+            if col >= BitBoard.COLUMN_COUNT or not board.can_play(col):
+                raise ValueError("illegal move %s" % char)
+            board.play(col)
+        board = board.to_array()
+    else:
+        rows = position.split('/')
+        if len(rows) != BitBoard.ROW_COUNT:
+            raise ValueError("expected %d rows, got %d" % (BitBoard.ROW_COUNT, len(rows)))
+        board = np.zeros((BitBoard.ROW_COUNT, BitBoard.COLUMN_COUNT))
+        for i, row in enumerate(rows):
+            cells = []
+            for char in row.lower():
+                if char.isdigit():
+                    cells.extend([0] * int(char))
+                elif char in CONNECT_FOUR_PIECES:
+                    cells.append(CONNECT_FOUR_PIECES[char])
+                else:
+                    raise ValueError("unexpected %r in row %d" % (char, i + 1))
+            if len(cells) != BitBoard.COLUMN_COUNT:
+                raise ValueError("row %d has %d cells" % (i + 1, len(cells)))
+            board[BitBoard.ROW_COUNT - 1 - i] = cells
+        for col in range(BitBoard.COLUMN_COUNT):
+            column = board[:, col]
+            if np.any(column[1:][column[:-1] == 0]):
+                raise ValueError("floating stone in column %d" % col)
+    counts = (int(np.count_nonzero(board == 1)), int(np.count_nonzero(board == 2)))
+    return BitBoard.from_array(board, parse_side(fields, counts))
+
+def format_connect_four(board):
+    # Inverse of parse_connect_four for a BitBoard, side to move included
+    array = board.to_array()
+    rows = []
+    for r in range(BitBoard.ROW_COUNT - 1, -1, -1):
+        row, empty = '', 0
+        for c in range(BitBoard.COLUMN_COUNT):
+            if array[r][c] == 0:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            row += 'x' if array[r][c] == 1 else 'o'
+        rows.append(row + (str(empty) if empty else ''))
+    return '/'.join(rows) + ' ' + ('x' if board.piece == 1 else 'o')
+
+def parse_tic_tac_toe(text):
+    # Returns (cells as solver values, side to move as tic_tac_toe_solver.X or O)
+    fields = text.split()
+    if not fields or len(fields) > 2:
+        raise ValueError("expected a position and an optional side to move")
+    position = fields[0].replace('/', '').lower()
+    if len(position) != tic_tac_toe_solver.CELLS:
+        raise ValueError("expected %d cells, got %d" % (tic_tac_toe_solver.CELLS, len(position)))
+    try:
+        cells = [TIC_TAC_TOE_CELLS[char] for char in position]
+    except KeyError as e:
+        raise ValueError("unexpected %r" % e.args[0])
+    counts = (cells.count(tic_tac_toe_solver.X), cells.count(tic_tac_toe_solver.O))
+    side = parse_side(fields, counts)
+    return cells, tic_tac_toe_solver.X if side == 1 else tic_tac_toe_solver.O
+
+# Worker process state, set up once by init_worker
+_ENGINE = None
+_OPTIONS = None
+
+def init_worker(game, options):
+    global _ENGINE, _OPTIONS
+    _OPTIONS = options
+    if game == 'connect4':
+        _ENGINE = ConnectFour(options['tt_size_mb'])
+        _ENGINE.search_algorithm = options['search']
+        _ENGINE.endgame_empty = options['endgame_empty']
+        if options['book'] is not None:
+            from connect_four_book import OpeningBook
+            _ENGINE.book = OpeningBook(options['book'])
+    else:
+        _ENGINE = tic_tac_toe_solver.get_solver()
+
+def analyze_connect_four(engine, text, options):
+    board = parse_connect_four(text)
+    for piece in (1, 2):
+        if board.winning_move(piece):
+            return {'move': None, 'score': None, 'depth': 0, 'over': 'xo'[piece - 1] + ' won'}
+    if board.is_full():
+        return {'move': None, 'score': None, 'depth': 0, 'over': 'draw'}
+    # A cleared table makes fixed-depth results independent of which positions
+    # the worker analysed before
+    if engine.tt is not None:
+        engine.tt.clear()
+    engine.last_score = None
+    time_budget = math.inf if options['move_time'] is None else options['move_time']
+    col, score, depth = engine.iterative_deepening(board, time_budget, options['depth'], board.piece == 2)
+    # minimax scores are from piece 2's view
+    if score is not None and board.piece == 1:
+        score = -score
+    return {'move': col, 'score': score, 'depth': depth}
+
+def analyze_tic_tac_toe(solver, text, options):
+    cells, side = parse_tic_tac_toe(text)
+    won = tic_tac_toe_solver.winner(cells)
+    if won:
+        return {'move': None, 'score': None, 'over': ('x' if won == tic_tac_toe_solver.X else 'o') + ' won'}
+    if tic_tac_toe_solver.EMPTY not in cells:
+        return {'move': None, 'score': None, 'over': 'draw'}
+    entry = solver.lookup(tic_tac_toe_solver.encode(cells), side)
+    if entry is None:
+        raise ValueError("position cannot arise with that side to move")
+    value, move = entry
+    # Solver values are from O's view
+    return {'move': move, 'score': value if side == tic_tac_toe_solver.O else -value}
+
+def analyze_chunk(chunk):
+    # chunk is a list of (line number, position text); returns one result per position
+    analyze = analyze_connect_four if isinstance(_ENGINE, ConnectFour) else analyze_tic_tac_toe
+    results = []
+    for line, text in chunk:
+        start = time.perf_counter()
+        try:
+            result = analyze(_ENGINE, text, _OPTIONS)
+        except ValueError as e:
+            result = {'error': str(e)}
+        result['seconds'] = time.perf_counter() - start
+        result['line'] = line
+        result['position'] = text
+        results.append(result)
+    return results
+
+def read_positions(lines):
+    # (line number, position) for every line that holds a position
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if text and not text.startswith('#'):
+            yield number, text
+
+def chunked(positions, size):
+    chunk = []
+    for position in positions:
+        chunk.append(position)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def analyze_positions(lines, game, depth=None, move_time=None, workers=None, chunk_size=16,
+                      search='minimax', tt_size_mb=1, endgame_empty=20, book=None):
+    # Yields one result dict per position, in input order, while later positions
+    # are still being analysed. Only a bounded number of chunks is in flight, so
+    # input of any length (e.g. sys.stdin) is read as it is consumed.
+    if depth is None and move_time is None:
+        raise ValueError("give a depth, a move time or both")
+    options = {'depth': depth, 'move_time': move_time, 'search': search, 'tt_size_mb': tt_size_mb,
+               'endgame_empty': endgame_empty, 'book': book}
+    chunks = chunked(read_positions(lines), chunk_size)
+    if workers == 1:
+        init_worker(game, options)
+        for chunk in chunks:
+            for result in analyze_chunk(chunk):
+                yield result
+        return
+    with Pool(workers, initializer=init_worker, initargs=(game, options)) as pool:
+        window = 4 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(analyze_chunk, (chunk,)))
+            if len(pending) >= window:
+                for result in pending.popleft().get():
+                    yield result
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+
+def format_result(result, game):
+    if 'error' in result:
+        return "%s\terror: %s" % (result['position'], result['error'])
+    if 'over' in result:
+        return "%s\tover: %s" % (result['position'], result['over'])
+    if game == 'connect4':
+        return "%s\t%s\t%s\t%s" % (result['position'], result['move'], result['score'], result['depth'])
+    return "%s\t%s\t%s" % (result['position'], result['move'], result['score'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the best move and score for every position in a file.")
+    parser.add_argument('game', choices=('connect4', 'tictactoe'))
+    parser.add_argument('positions', nargs='?', default='-', help="file with one position per line (default: stdin)")
+    parser.add_argument('--depth', type=int, default=None, help="Connect Four search depth (maximum depth with --move-time)")
+    parser.add_argument('--move-time', type=float, default=None, help="Connect Four seconds per position, searched with iterative deepening")
+    parser.add_argument('--search', choices=('minimax', 'pvs'), default='minimax')
+    parser.add_argument('--endgame-empty', type=int, default=20, help="solve positions with this many empty cells or fewer exactly")
+    parser.add_argument('--book', default=None, help="Connect Four opening book to consult first")
+    parser.add_argument('--tt-size-mb', type=int, default=1, help="transposition table per worker")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores, 1 runs inline)")
+    parser.add_argument('--chunk', type=int, default=16, help="positions sent to a worker at a time")
+    parser.add_argument('--json', action='store_true', help="write JSON lines instead of tab-separated text")
+    args = parser.parse_args(argv)
+    if args.game == 'connect4' and args.depth is None and args.move_time is None:
+        args.depth = 8
+    elif args.game == 'tictactoe':
+        # Tic-tac-toe is solved exactly, the limits do not apply
+        args.depth = 0
+
+    source = sys.stdin if args.positions == '-' else open(args.positions)
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in analyze_positions(source, args.game, args.depth, args.move_time, args.workers, args.chunk,
+                                        args.search, args.tt_size_mb, args.endgame_empty, args.book):
+            count += 1
+            print(json.dumps(result) if args.json else format_result(result, args.game), flush=count % 1000 == 0)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
+    print("%d positions in %.1fs (%.0f/s)" % (count, elapsed, count / elapsed if elapsed else 0.0), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
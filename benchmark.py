@@ -0,0 +1,332 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from connect_four import BitBoard, ConnectFour
+from tic_tac_toe import TicTacToe
+
+# Fixed positions. Connect Four positions are the columns played from the empty
+# board, tic-tac-toe positions list the cells row by row ('.' empty) with 'O',
+# the side the engine moves for, to play.
+CONNECT_FOUR_POSITIONS = {
+    'opening': '33',
+    'midgame': '3324223415566011',
+    'endgame': '241161461511500564322256662532',
+}
+TIC_TAC_TOE_POSITIONS = {
+    'opening': 'X........',
+    'midgame': 'X...O...X',
+    'endgame': 'XOX.O.X..',
+}
+CONNECT_FOUR_DEPTHS = {'opening': 8, 'midgame': 8, 'endgame': 10}
+QUICK_DEPTHS = {'opening': 4, 'midgame': 4, 'endgame': 5}
+FORMAT_VERSION = 1
+
+def connect_four_position(moves):
+    board = BitBoard()
+    for col in moves:
+        board.play(int(col))
+    return board
+
+def tic_tac_toe_position(cells):
+    game = TicTacToe()
+    for i, cell in enumerate(cells):
+        game.board[i // 3][i % 3] = None if cell == '.' else cell
+    return game
+
+def best_time(function, repeat):
+    # Minimum over repeats, the run least disturbed by the rest of the machine
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def rate(count, seconds):
+    return count / seconds if seconds > 0 else math.inf
+
+def bench_connect_four_search(results, repeat, quick):
+    depths = QUICK_DEPTHS if quick else CONNECT_FOUR_DEPTHS
+    for name, moves in CONNECT_FOUR_POSITIONS.items():
+        board = connect_four_position(moves)
+        for depth in range(1, depths[name] + 1):
+            engine = ConnectFour(tt_size_mb=1)
+
+            def search():
+                # A fresh table every run so repeats measure the same search
+                engine.tt.clear()
+                engine.nodes = 0
+                engine.minimax(board.copy(), depth, board.piece == 2, -math.inf, math.inf)
+                return engine.nodes
+
+            seconds, nodes = best_time(search, repeat)
+            prefix = 'connect4.search.%s.d%d' % (name, depth)
+            results[prefix + '.seconds'] = metric(seconds, 's', False)
+            results[prefix + '.nodes_per_second'] = metric(rate(nodes, seconds), 'nodes/s', True)
+            results[prefix + '.nodes'] = metric(nodes, 'nodes', False)
+
+def random_connect_four_boards(count, seed=0):
+    rng = random.Random(seed)
+    arrays = []
+    bitboards = []
+    while len(arrays) < count:
+        board = BitBoard()
+        for _ in range(rng.randrange(4, 36)):
+            valid = board.valid_columns()
+            if not valid:
+                break
+            board.play(rng.choice(valid))
+        arrays.append(board.to_array())
+        bitboards.append(board)
+    return arrays, bitboards
+
+def bench_connect_four_leaves(results, repeat, quick):
+    count = 200 if quick else 1000
+    arrays, bitboards = random_connect_four_boards(count)
+    engine = ConnectFour(tt_size_mb=0)
+    stacked = np.stack(arrays)
+
+    def numpy_eval():
+        for board in arrays:
+            engine.evaluate_board(board, 2)
+
+    def batched_eval():
+        engine.evaluate_boards(stacked, 2)
+
+    def incremental_eval():
+        # A full refresh is the worst case, search itself only pays play/undo deltas
+        for board in bitboards:
+            board.attach_evaluator().score(2)
+
+    def numpy_win():
+        for board in arrays:
+            engine.winning_move(board, 1)
+            engine.winning_move(board, 2)
+
+    def bitboard_win():
+        for board in bitboards:
+            board.winning_move(1)
+            board.winning_move(2)
+
+    for name, function, calls, unit in (
+            ('connect4.eval.evaluate_board', numpy_eval, count, 'evals/s'),
+            ('connect4.eval.evaluate_boards', batched_eval, count, 'evals/s'),
+            ('connect4.eval.incremental_refresh', incremental_eval, count, 'evals/s'),
+            ('connect4.win.winning_move', numpy_win, 2 * count, 'checks/s'),
+            ('connect4.win.bitboard', bitboard_win, 2 * count, 'checks/s')):
+        seconds, _ = best_time(function, repeat)
+        results[name + '.per_second'] = metric(rate(calls, seconds), unit, True)
+
+def bench_tic_tac_toe_search(results, repeat, quick):
+    for name, cells in TIC_TAC_TOE_POSITIONS.items():
+        game = tic_tac_toe_position(cells)
+        counter = [0]
+        search = TicTacToe.minimax_alpha_beta
+
+        def counted(depth, is_maximizing, alpha, beta):
+            # The instance attribute shadows the method, so recursive calls are counted too
+            counter[0] += 1
+            return search(game, depth, is_maximizing, alpha, beta)
+
+        game.minimax_alpha_beta = counted
+
+        def move():
+            counter[0] = 0
+            game.minimax_alpha_beta(0, True, -math.inf, math.inf)
+            return counter[0]
+
+        seconds, nodes = best_time(move, repeat)
+        prefix = 'tictactoe.search.%s' % name
+        results[prefix + '.seconds'] = metric(seconds, 's', False)
+        results[prefix + '.nodes_per_second'] = metric(rate(nodes, seconds), 'nodes/s', True)
+        results[prefix + '.nodes'] = metric(nodes, 'nodes', False)
+
+    game = tic_tac_toe_position(TIC_TAC_TOE_POSITIONS['midgame'])
+    checks = 2000 if quick else 20000
+    seconds, _ = best_time(lambda: [game.check_win('X') for _ in range(checks)], repeat)
+    results['tictactoe.win.check_win.per_second'] = metric(rate(checks, seconds), 'checks/s', True)
+
+def bench_q_learning(results, repeat, quick):
+    # Tic-tac-toe: one q_learning() call is one Q update
+    steps = 2000 if quick else 20000
+    game = TicTacToe()
+
+    def tic_tac_toe_steps():
+        random.seed(0)
+        rng = random.Random(0)
+        game.q_table = {}
+        done = 0
+        for _ in range(steps):
+            game.restart()
+            for _ in range(rng.randrange(0, 8)):
+                empty = [(r, c) for r in range(3) for c in range(3) if game.board[r][c] is None]
+                row, col = rng.choice(empty)
+                game.board[row][col] = 'X'
+            if game.check_win('X') or game.check_draw():
+                continue
+            game.q_learning()
+            done += 1
+        return done
+
+    seconds, done = best_time(tic_tac_toe_steps, repeat)
+    results['tictactoe.q_learning.steps_per_second'] = metric(rate(done, seconds), 'steps/s', True)
+
+    from tic_tac_toe_trainer import VectorizedQTrainer
+    trainer = VectorizedQTrainer(envs=1024, seed=0)
+    batches = 20 if quick else 200
+    seconds, _ = best_time(lambda: [trainer.step() for _ in range(batches)], repeat)
+    results['tictactoe.trainer.steps_per_second'] = metric(rate(batches * trainer.envs, seconds), 'steps/s', True)
+
+    from connect_four_rl import ConnectFourEnv, HashedQTable
+    episodes = 50 if quick else 500
+    env = ConnectFourEnv('random')
+    env_step = env.step
+    counter = [0]
+
+    def counted_step(action):
+        counter[0] += 1
+        return env_step(action)
+
+    env.step = counted_step
+
+    def connect_four_episodes():
+        random.seed(0)
+        counter[0] = 0
+        ConnectFour(tt_size_mb=0).q_learning(episodes, 0.1, 0.9, 0.1, BitBoard.ROW_COUNT * BitBoard.COLUMN_COUNT, env=env, q_table=HashedQTable(4))
+        return counter[0]
+
+    seconds, steps = best_time(connect_four_episodes, repeat)
+    results['connect4.q_learning.steps_per_second'] = metric(rate(steps, seconds), 'steps/s', True)
+
+def bench_mcts(results, repeat, quick):
+    from mcts import MCTS
+    playouts = 2048 if quick else 16384
+    for name, moves in CONNECT_FOUR_POSITIONS.items():
+        board = connect_four_position(moves)
+
+        def search():
+            np.random.seed(0)
+            return MCTS(playouts=playouts).search(board)['playouts']
+
+        seconds, done = best_time(search, repeat)
+        results['connect4.mcts.%s.playouts_per_second' % name] = metric(rate(done, seconds), 'playouts/s', True)
+
+BENCHMARKS = {
+    'connect4.search': bench_connect_four_search,
+    'connect4.eval': bench_connect_four_leaves,
+    'connect4.mcts': bench_mcts,
+    'tictactoe': bench_tic_tac_toe_search,
+    'q_learning': bench_q_learning,
+}
+
+def metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+    }
+
+def run(selected=None, repeat=3, quick=False, progress=None):
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        if progress is not None:
+            progress(name)
+        bench(results, repeat, quick)
+    return {
+        'version': FORMAT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'quick': quick,
+        'repeat': repeat,
+        'machine': machine_info(),
+        'results': results,
+    }
+
+def compare(baseline, current, threshold=0.1):
+    # Returns [(name, baseline value, current value, relative change, status)], where
+    # change > 0 is always an improvement and status is 'regression', 'improvement' or 'ok'
+    rows = []
+    for name, entry in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            continue
+        change = (entry['value'] - base['value']) / base['value']
+        if not entry['higher_is_better']:
+            change = -change
+        status = 'ok'
+        if change < -threshold:
+            status = 'regression'
+        elif change > threshold:
+            status = 'improvement'
+        rows.append((name, base['value'], entry['value'], change, status))
+    return rows
+
+def print_comparison(rows, baseline, current):
+    if baseline['machine'] != current['machine']:
+        print("warning: baseline was recorded on a different machine or runtime")
+    for name, base, value, change, status in rows:
+        flag = {'regression': 'REGRESSION', 'improvement': 'faster', 'ok': ''}[status]
+        print("%-52s %14.6g %14.6g %+7.1f%% %s" % (name, base, value, 100 * change, flag))
+    regressions = [row for row in rows if row[4] == 'regression']
+    print("%d metrics compared, %d regressions" % (len(rows), len(regressions)))
+    return regressions
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != FORMAT_VERSION:
+        raise ValueError("%s is not a version %d benchmark file" % (path, FORMAT_VERSION))
+    return data
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the search, evaluation and learning code on fixed positions.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run_parser = sub.add_parser('run', help="run the benchmarks and write JSON")
+    run_parser.add_argument('-o', '--output', help="JSON file to write (default: stdout)")
+    run_parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmark groups to run")
+    run_parser.add_argument('--repeat', type=int, default=3, help="runs per measurement, the fastest is kept")
+    run_parser.add_argument('--quick', action='store_true', help="smaller depths and counts")
+    run_parser.add_argument('--baseline', help="compare against this JSON file after running")
+    run_parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown reported as a regression")
+    compare_parser = sub.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        baseline, current = load(args.baseline), load(args.current)
+    else:
+        current = run(args.only, args.repeat, args.quick, lambda name: print("running %s" % name, file=sys.stderr, flush=True))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+        elif not args.baseline:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    regressions = print_comparison(compare(baseline, current, args.threshold), baseline, current)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
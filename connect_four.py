@@ -0,0 +1,909 @@
+import math
+import random
+import sys
+import time
+from array import array
+
+# numpy is imported by the array and batch paths that need it, so a
+# BitBoard-only search never loads it
+
+def is_array(board):
+    # A board that is a numpy array; if numpy was never imported, it cannot be one
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(board, np.ndarray)
+
+class BitBoard:
+    ROW_COUNT = 6
+    COLUMN_COUNT = 7
+    # One spare bit above every column so shifted runs never wrap into the next column
+    H1 = ROW_COUNT + 1
+    COLUMN_ORDER = [3, 2, 4, 1, 5, 0, 6]  # centre outwards
+
+    # Fixed seed so hashes are stable across processes and runs
+    _rng = random.Random(0xC4)
+    ZOBRIST = [None, [], []]
+    for _piece in (1, 2):
+        for _ in range(COLUMN_COUNT * H1):
+            ZOBRIST[_piece].append(_rng.getrandbits(64))
+    ZOBRIST_SIDE = _rng.getrandbits(64)
+    del _rng, _piece, _
+
+    def __init__(self, piece=1):
+        self.position = 0  # stones of the side to move
+        self.mask = 0  # all stones on the board
+        self.heights = [0] * self.COLUMN_COUNT
+        self.moves = 0
+        self.piece = piece  # piece value (1 or 2) of the side to move
+        self.hash = self.ZOBRIST_SIDE if piece == 2 else 0
+        self.evaluator = None  # optional IncrementalEvaluator kept in step with play/undo
+
+    @classmethod
+    def from_array(cls, board, piece=None):
+        import numpy as np
+        count_1 = int(np.count_nonzero(board == 1))
+        count_2 = int(np.count_nonzero(board == 2))
+        if piece is None:
+            piece = 1 if count_1 == count_2 else 2
+        bitboard = cls(piece)
+        for c in range(cls.COLUMN_COUNT):
+            for r in range(cls.ROW_COUNT):
+                if board[r][c] == 0:
+                    break
+                bit = 1 << (c * cls.H1 + r)
+                bitboard.mask |= bit
+                if board[r][c] == piece:
+                    bitboard.position |= bit
+                bitboard.hash ^= cls.ZOBRIST[int(board[r][c])][c * cls.H1 + r]
+                bitboard.heights[c] += 1
+        bitboard.moves = count_1 + count_2
+        return bitboard
+
+    def copy(self):
+        bitboard = BitBoard(self.piece)
+        bitboard.position = self.position
+        bitboard.mask = self.mask
+        bitboard.heights = self.heights[:]
+        bitboard.moves = self.moves
+        bitboard.hash = self.hash
+        if self.evaluator is not None:
+            bitboard.attach_evaluator()
+        return bitboard
+
+    def to_array(self):
+        import numpy as np
+        board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
+        own = self.position
+        other = self.position ^ self.mask
+        for c in range(self.COLUMN_COUNT):
+            for r in range(self.heights[c]):
+                bit = 1 << (c * self.H1 + r)
+                if own & bit:
+                    board[r][c] = self.piece
+                elif other & bit:
+                    board[r][c] = 3 - self.piece
+        return board
+
+    def can_play(self, col):
+        return self.heights[col] < self.ROW_COUNT
+
+    def valid_columns(self):
+        return [col for col in range(self.COLUMN_COUNT) if self.heights[col] < self.ROW_COUNT]
+
+    def ordered_columns(self):
+        # Centre columns first, they take part in the most windows
+        return [col for col in self.COLUMN_ORDER if self.heights[col] < self.ROW_COUNT]
+
+    def is_full(self):
+        return self.moves == self.ROW_COUNT * self.COLUMN_COUNT
+
+    def play(self, col):
+        # After the move the opponent is to move, so position flips to their stones
+        index = col * self.H1 + self.heights[col]
+        self.position ^= self.mask
+        self.mask |= 1 << index
+        self.heights[col] += 1
+        self.moves += 1
+        self.hash ^= self.ZOBRIST[self.piece][index] ^ self.ZOBRIST_SIDE
+        if self.evaluator is not None:
+            self.evaluator.add(index, self.piece)
+        self.piece = 3 - self.piece
+
+    def undo(self, col):
+        self.heights[col] -= 1
+        index = col * self.H1 + self.heights[col]
+        self.mask ^= 1 << index
+        self.position ^= self.mask
+        self.moves -= 1
+        self.piece = 3 - self.piece
+        self.hash ^= self.ZOBRIST[self.piece][index] ^ self.ZOBRIST_SIDE
+        if self.evaluator is not None:
+            self.evaluator.remove(index, self.piece)
+
+    def attach_evaluator(self):
+        self.evaluator = IncrementalEvaluator(self)
+        return self.evaluator
+
+    def pieces(self, piece):
+        if piece == self.piece:
+            return self.position
+        return self.position ^ self.mask
+
+    def winning_move(self, piece):
+        return self.alignment(self.pieces(piece))
+
+    def is_winning_col(self, col, piece):
+        # True if dropping piece into col would complete four in a row
+        return self.alignment(self.pieces(piece) | (1 << (col * self.H1 + self.heights[col])))
+
+    @classmethod
+    def alignment(cls, pos):
+        # Vertical, horizontal and both diagonals
+        for shift in (1, cls.H1, cls.H1 - 1, cls.H1 + 1):
+            m = pos & (pos >> shift)
+            if m & (m >> (2 * shift)):
+                return True
+        return False
+
+def build_windows(row_count, column_count, h1):
+    # All four-cell windows as tuples of BitBoard bit indices (col * h1 + row)
+    windows = []
+    for r in range(row_count):
+        for c in range(column_count - 3):
+            windows.append(tuple((c + i) * h1 + r for i in range(4)))
+    for c in range(column_count):
+        for r in range(row_count - 3):
+            windows.append(tuple(c * h1 + r + i for i in range(4)))
+    for r in range(row_count - 3):
+        for c in range(column_count - 3):
+            windows.append(tuple((c + i) * h1 + r + i for i in range(4)))
+    for r in range(row_count - 3):
+        for c in range(column_count - 3):
+            windows.append(tuple((c + i) * h1 + r + 3 - i for i in range(4)))
+    return windows
+
+class IncrementalEvaluator:
+    # Same windows and weights as ConnectFour.evaluate_board, indexed by BitBoard bit index
+    ROW_COUNT = BitBoard.ROW_COUNT
+    COLUMN_COUNT = BitBoard.COLUMN_COUNT
+    H1 = BitBoard.H1
+
+    WINDOWS = build_windows(ROW_COUNT, COLUMN_COUNT, H1)
+
+    # Windows each cell belongs to
+    CELL_WINDOWS = [[] for _ in range(COLUMN_COUNT * H1)]
+    for _w, _window in enumerate(WINDOWS):
+        for _index in _window:
+            CELL_WINDOWS[_index].append(_w)
+    del _w, _window, _index
+
+    CENTER_BONUS = [0] * (COLUMN_COUNT * H1)
+    for _r in range(ROW_COUNT):
+        CENTER_BONUS[(COLUMN_COUNT // 2) * H1 + _r] = 3
+    del _r
+
+    # WINDOW_SCORE[own][opponent], matching evaluate_window
+    WINDOW_SCORE = [[0] * 5 for _ in range(5)]
+    for _own in range(5):
+        for _opp in range(5 - _own):
+            _empty = 4 - _own - _opp
+            if _own == 4:
+                WINDOW_SCORE[_own][_opp] += 100
+            elif _own == 3 and _empty == 1:
+                WINDOW_SCORE[_own][_opp] += 5
+            elif _own == 2 and _empty == 2:
+                WINDOW_SCORE[_own][_opp] += 2
+            if _opp == 3 and _empty == 1:
+                WINDOW_SCORE[_own][_opp] -= 4
+    del _own, _opp, _empty
+
+    def __init__(self, bitboard=None):
+        self.counts = [None, [0] * len(self.WINDOWS), [0] * len(self.WINDOWS)]
+        self.scores = [None, 0, 0]
+        if bitboard is not None:
+            self.refresh(bitboard)
+
+    def score(self, piece):
+        return self.scores[piece]
+
+    def add(self, index, piece):
+        own = self.counts[piece]
+        other = self.counts[3 - piece]
+        table = self.WINDOW_SCORE
+        own_delta = self.CENTER_BONUS[index]
+        other_delta = 0
+        for w in self.CELL_WINDOWS[index]:
+            n = own[w]
+            m = other[w]
+            own_delta += table[n + 1][m] - table[n][m]
+            other_delta += table[m][n + 1] - table[m][n]
+            own[w] = n + 1
+        self.scores[piece] += own_delta
+        self.scores[3 - piece] += other_delta
+
+    def remove(self, index, piece):
+        own = self.counts[piece]
+        other = self.counts[3 - piece]
+        table = self.WINDOW_SCORE
+        own_delta = self.CENTER_BONUS[index]
+        other_delta = 0
+        for w in self.CELL_WINDOWS[index]:
+            n = own[w] - 1
+            m = other[w]
+            own_delta += table[n + 1][m] - table[n][m]
+            other_delta += table[m][n + 1] - table[m][n]
+            own[w] = n
+        self.scores[piece] -= own_delta
+        self.scores[3 - piece] -= other_delta
+
+    def refresh(self, bitboard):
+        # Full recompute from the bitboard, also used to check the incremental scores
+        stones = [None, bitboard.pieces(1), bitboard.pieces(2)]
+        for piece in (1, 2):
+            self.counts[piece] = [sum((stones[piece] >> i) & 1 for i in window) for window in self.WINDOWS]
+        table = self.WINDOW_SCORE
+        for piece in (1, 2):
+            own = self.counts[piece]
+            other = self.counts[3 - piece]
+            score = sum(table[own[w]][other[w]] for w in range(len(self.WINDOWS)))
+            score += sum(self.CENTER_BONUS[i] for i in range(len(self.CENTER_BONUS)) if (stones[piece] >> i) & 1)
+            self.scores[piece] = score
+        return self.scores[1], self.scores[2]
+
+class SearchTimeout(Exception):
+    pass
+
+class TranspositionTable:
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    # key (8) + value (8) + move (2, room for the cells of large m,n,k boards) + depth, flag, generation (1 each)
+    ENTRY_BYTES = 21
+
+    def __init__(self, size_mb=16):
+        # Round down to a power of two so the slot index is a mask of the hash
+        entries = max(1, (size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.index_mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.values = array('q', bytes(8 * self.size))
+        self.depths = array('b', [-1]) * self.size  # -1 marks an empty slot
+        self.flags = array('b', bytes(self.size))
+        self.moves = array('h', bytes(2 * self.size))
+        self.generations = array('B', bytes(self.size))
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        # Entries from earlier moves stay usable but lose their depth priority
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        self.keys[:] = array('Q', bytes(8 * self.size))
+        self.depths[:] = array('b', [-1]) * self.size
+        self.generation = 0
+
+    def probe(self, key):
+        i = key & self.index_mask
+        if self.depths[i] < 0:
+            self.misses += 1
+            return None
+        if self.keys[i] != key:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return self.depths[i], self.flags[i], self.values[i], self.moves[i]
+
+    def store(self, key, depth, flag, value, move):
+        i = key & self.index_mask
+        stored_depth = self.depths[i]
+        if stored_depth >= 0:
+            # Depth-preferred: keep a deeper entry from the current search
+            if self.generations[i] == self.generation and self.keys[i] != key and stored_depth > depth:
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.keys[i] = key
+        self.values[i] = value
+        self.depths[i] = depth
+        self.flags[i] = flag
+        self.moves[i] = -1 if move is None else move
+        self.generations[i] = self.generation
+
+    def usage(self):
+        return sum(1 for d in self.depths if d >= 0) / self.size
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'bytes': self.size * self.ENTRY_BYTES,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
+
+_BATCH_TABLES = None
+
+def batch_tables():
+    # For evaluate_boards, built on first use: window cell indices into a (6, 7)
+    # board transposed to column-major, shape (69, 4), and the window scores
+    global _BATCH_TABLES
+    if _BATCH_TABLES is None:
+        import numpy as np
+        windows = np.array(build_windows(BitBoard.ROW_COUNT, BitBoard.COLUMN_COUNT, BitBoard.ROW_COUNT), dtype=np.intp)
+        _BATCH_TABLES = windows, np.array(IncrementalEvaluator.WINDOW_SCORE, dtype=np.int64)
+    return _BATCH_TABLES
+
+class ConnectFour:
+    BATCH_CHUNK = 65536
+    # How many nodes are searched between clock checks when a deadline is set
+    TIME_CHECK_INTERVAL = 256
+    # Half-width of the root aspiration window for the 'pvs' search
+    ASPIRATION_WINDOW = 10
+
+    def __init__(self, tt_size_mb=16, batch_leaves=False):
+        self.ROW_COUNT = 6
+        self.COLUMN_COUNT = 7
+
+        self._board = None
+        self.bitboard = BitBoard()
+        self.bitboard.attach_evaluator()
+        # Kept across calls so each move starts from what earlier searches learned
+        self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        # Score the last ply with one evaluate_boards call instead of one leaf per child
+        self.batch_leaves = batch_leaves
+        # Per-move time budget in seconds for iterative_deepening
+        self.move_time = 1.0
+        self.deadline = None
+        self.nodes = 0
+        # 'minimax' or 'pvs', used by iterative_deepening
+        self.search_algorithm = 'minimax'
+        # connect_four_book.OpeningBook consulted by iterative_deepening before searching
+        self.book = None
+        # iterative_deepening solves positions with this many empty cells or fewer exactly
+        self.endgame_empty = 20
+        self.endgame_solver = None
+        # search_stats.SearchStats to instrument minimax, None to run it bare
+        self.stats = None
+        self.last_score = None
+        self.game_over = False
+        self.turn = 0
+
+    @property
+    def board(self):
+        # The array board of the GUI, created on first use
+        if self._board is None:
+            self._board = self.create_board()
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+
+    def create_board(self):
+        import numpy as np
+        board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
+        return board
+
+    def drop_piece(self, board, row, col, piece):
+        board[row][col] = piece
+
+    def is_valid_location(self, board, col):
+        return board[self.ROW_COUNT - 1][col] == 0
+
+    def get_next_open_row(self, board, col):
+        for r in range(self.ROW_COUNT):
+            if board[r][col] == 0:
+                return r
+
+    def winning_move(self, board, piece):
+        # Check horizontal locations for win
+        for c in range(self.COLUMN_COUNT - 3):
+            for r in range(self.ROW_COUNT):
+                if board[r][c] == piece and board[r][c + 1] == piece and board[r][c + 2] == piece and board[r][c + 3] == piece:
+                    return True
+
+        # Check vertical locations for win
+        for c in range(self.COLUMN_COUNT):
+            for r in range(self.ROW_COUNT - 3):
+                if board[r][c] == piece and board[r + 1][c] == piece and board[r + 2][c] == piece and board[r + 3][c] == piece:
+                    return True
+
+        # Check positively sloped diagonals
+        for c in range(self.COLUMN_COUNT - 3):
+            for r in range(self.ROW_COUNT - 3):
+                if board[r][c] == piece and board[r + 1][c + 1] == piece and board[r + 2][c + 2] == piece and board[r + 3][c + 3] == piece:
+                    return True
+
+        # Check negatively sloped diagonals
+        for c in range(self.COLUMN_COUNT - 3):
+            for r in range(3, self.ROW_COUNT):
+                if board[r][c] == piece and board[r - 1][c + 1] == piece and board[r - 2][c + 2] == piece and board[r - 3][c + 3] == piece:
+                    return True
+
+    def get_valid_columns(self, board):
+        valid_columns = []
+        for col in range(self.COLUMN_COUNT):
+            if self.is_valid_location(board, col):
+                valid_columns.append(col)
+        return valid_columns
+
+    def evaluate_board(self, board, piece):
+        score = 0
+        # Score center column
+        center_array = [int(i) for i in list(board[:, self.COLUMN_COUNT // 2])]
+        center_count = center_array.count(piece)
+        score += center_count * 3
+
+        # Score Horizontal
+        for r in range(self.ROW_COUNT):
+            row_array = [int(i) for i in list(board[r, :])]
+            for c in range(self.COLUMN_COUNT - 3):
+                window = row_array[c:c + 4]
+                score += self.evaluate_window(window, piece)
+
+        # Score Vertical
+        for c in range(self.COLUMN_COUNT):
+            col_array = [int(i) for i in list(board[:, c])]
+            for r in range(self.ROW_COUNT - 3):
+                window = col_array[r:r + 4]
+                score += self.evaluate_window(window, piece)
+
+        # Score positive sloped diagonal
+        for r in range(self.ROW_COUNT - 3):
+            for c in range(self.COLUMN_COUNT - 3):
+                window = [board[r + i][c + i] for i in range(4)]
+                score += self.evaluate_window(window, piece)
+
+        # Score negative sloped diagonal
+        for r in range(self.ROW_COUNT - 3):
+            for c in range(self.COLUMN_COUNT - 3):
+                window = [board[r + 3 - i][c + i] for i in range(4)]
+                score += self.evaluate_window(window, piece)
+
+        return score
+
+    def evaluate_boards(self, boards, piece):
+        # Vectorized evaluate_board over an (N, 6, 7) stack, returns N int scores
+        import numpy as np
+        batch_windows, window_score = batch_tables()
+        boards = np.asarray(boards)
+        if boards.ndim == 2:
+            boards = boards[None]
+        n = boards.shape[0]
+        scores = np.empty(n, dtype=np.int64)
+        for start in range(0, n, self.BATCH_CHUNK):
+            chunk = boards[start:start + self.BATCH_CHUNK]
+            cells = chunk.transpose(0, 2, 1).reshape(chunk.shape[0], -1).astype(np.int8)
+            windows = cells[:, batch_windows]
+            own = (windows == piece).sum(axis=2)
+            other = (windows == 3 - piece).sum(axis=2)
+            score = window_score[own, other].sum(axis=1)
+            score += 3 * (chunk[:, :, self.COLUMN_COUNT // 2] == piece).sum(axis=1)
+            scores[start:start + chunk.shape[0]] = score
+        return scores
+
+    def evaluate_window(self, window, piece):
+        score = 0
+        opponent_piece = 1
+        if piece == 1:
+            opponent_piece = 2
+        if window.count(piece) == 4:
+            score += 100
+        elif window.count(piece) == 3 and window.count(0) == 1:
+            score += 5
+        elif window.count(piece) == 2 and window.count(0) == 2:
+            score += 2
+        if window.count(opponent_piece) == 3 and window.count(0) == 1:
+            score -= 4
+
+        return score
+
+    def terminal_value(self, board, depth):
+        # Score if the side that just moved completed four in a row, else None.
+        # self.game_over never changes during a search, so wins inside the tree
+        # are detected here from the board itself. A win found with more depth
+        # left is nearer the root and scores higher.
+        last = 3 - board.piece
+        if board.moves and board.winning_move(last):
+            return self.terminal_value_for(last, depth)
+        return None
+
+    def terminal_value_for(self, winner, depth):
+        if winner == 2:
+            return 100000000000000 + depth
+        return -10000000000000 - depth
+
+    def minimax(self, board, depth, maximizing_player, alpha, beta):
+        if is_array(board):
+            board = BitBoard.from_array(board, 2 if maximizing_player else 1)
+        if board.evaluator is None:
+            board.attach_evaluator()
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.node_at_depth(depth)
+        if self.deadline is not None and self.nodes % self.TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        value = self.terminal_value(board, depth)
+        if value is not None or depth == 0:
+            if stats is not None:
+                stats.leaf()
+            if value is None:
+                value = board.evaluator.scores[2]
+            return (None, value)
+
+        tt = self.tt
+        tt_move = -1
+        if tt is not None:
+            entry = tt.probe(board.hash)
+            if stats is not None:
+                stats.cache(entry is not None)
+            if entry is not None:
+                tt_depth, flag, tt_value, tt_move = entry
+                if tt_depth >= depth:
+                    if flag == TranspositionTable.LOWER:
+                        alpha = max(alpha, tt_value)
+                    elif flag == TranspositionTable.UPPER:
+                        beta = min(beta, tt_value)
+                    if flag == TranspositionTable.EXACT or alpha >= beta:
+                        if stats is not None:
+                            stats.cache_cutoff()
+                            if depth == stats.root_depth:
+                                stats.finish(tt_move, tt_value)
+                        return tt_move, tt_value
+        alpha_orig, beta_orig = alpha, beta
+
+        valid_columns = board.ordered_columns()
+        if not valid_columns:  # Board is full
+            if stats is not None:
+                stats.leaf()
+            return (None, 0)
+        if tt_move >= 0:
+            # Search the stored best column first for earlier cutoffs
+            valid_columns.remove(tt_move)
+            valid_columns.insert(0, tt_move)
+
+        if depth == 1 and self.batch_leaves and isinstance(board, BitBoard):
+            column, value = self.minimax_last_ply(board, valid_columns, maximizing_player)
+            if stats is not None:
+                stats.leaf(len(valid_columns))
+        elif maximizing_player:
+            value = -math.inf
+            column = valid_columns[0]
+            for col in valid_columns:
+                board.play(col)
+                new_score = self.minimax(board, depth - 1, False, alpha, beta)[1]
+                board.undo(col)
+                if stats is not None and depth == stats.root_depth:
+                    stats.root_move(col, new_score)
+                if new_score > value:
+                    value = new_score
+                    column = col
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.cutoff(valid_columns.index(col))
+                    break
+        else:  # Minimizing player
+            value = math.inf
+            column = valid_columns[0]
+            for col in valid_columns:
+                board.play(col)
+                new_score = self.minimax(board, depth - 1, True, alpha, beta)[1]
+                board.undo(col)
+                if stats is not None and depth == stats.root_depth:
+                    stats.root_move(col, new_score)
+                if new_score < value:
+                    value = new_score
+                    column = col
+                beta = min(beta, value)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.cutoff(valid_columns.index(col))
+                    break
+
+        if tt is not None:
+            if value <= alpha_orig:
+                flag = TranspositionTable.UPPER
+            elif value >= beta_orig:
+                flag = TranspositionTable.LOWER
+            else:
+                flag = TranspositionTable.EXACT
+            tt.store(board.hash, depth, flag, value, column)
+        if stats is not None and depth == stats.root_depth:
+            stats.finish(column, value)
+        return column, value
+
+    def pvs(self, board, depth, maximizing_player, alpha, beta):
+        # Principal-variation search: same scores as minimax, but every child after
+        # the first is searched with a null window and only re-searched if it
+        # lands inside (alpha, beta). Scores are integers, so a null window is
+        # one point wide.
+        if is_array(board):
+            board = BitBoard.from_array(board, 2 if maximizing_player else 1)
+        if board.evaluator is None:
+            board.attach_evaluator()
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % self.TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        value = self.terminal_value(board, depth)
+        if value is not None:
+            return (None, value)
+        if depth == 0:
+            return (None, board.evaluator.scores[2])
+
+        tt = self.tt
+        tt_move = -1
+        if tt is not None:
+            entry = tt.probe(board.hash)
+            if entry is not None:
+                tt_depth, flag, tt_value, tt_move = entry
+                if tt_depth >= depth:
+                    if flag == TranspositionTable.EXACT:
+                        return tt_move, tt_value
+                    elif flag == TranspositionTable.LOWER:
+                        alpha = max(alpha, tt_value)
+                    else:
+                        beta = min(beta, tt_value)
+                    if alpha >= beta:
+                        return tt_move, tt_value
+        alpha_orig, beta_orig = alpha, beta
+
+        valid_columns = board.ordered_columns()
+        if not valid_columns:  # Board is full
+            return (None, 0)
+        if tt_move >= 0:
+            valid_columns.remove(tt_move)
+            valid_columns.insert(0, tt_move)
+
+        if depth == 1 and self.batch_leaves and isinstance(board, BitBoard):
+            column, value = self.minimax_last_ply(board, valid_columns, maximizing_player)
+        elif maximizing_player:
+            value = -math.inf
+            column = valid_columns[0]
+            for i, col in enumerate(valid_columns):
+                board.play(col)
+                if i == 0:
+                    new_score = self.pvs(board, depth - 1, False, alpha, beta)[1]
+                else:
+                    new_score = self.pvs(board, depth - 1, False, alpha, alpha + 1)[1]
+                    if alpha < new_score < beta:
+                        new_score = self.pvs(board, depth - 1, False, alpha, beta)[1]
+                board.undo(col)
+                if new_score > value:
+                    value = new_score
+                    column = col
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+        else:  # Minimizing player
+            value = math.inf
+            column = valid_columns[0]
+            for i, col in enumerate(valid_columns):
+                board.play(col)
+                if i == 0:
+                    new_score = self.pvs(board, depth - 1, True, alpha, beta)[1]
+                else:
+                    new_score = self.pvs(board, depth - 1, True, beta - 1, beta)[1]
+                    if alpha < new_score < beta:
+                        new_score = self.pvs(board, depth - 1, True, alpha, beta)[1]
+                board.undo(col)
+                if new_score < value:
+                    value = new_score
+                    column = col
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+
+        if tt is not None:
+            if value <= alpha_orig:
+                flag = TranspositionTable.UPPER
+            elif value >= beta_orig:
+                flag = TranspositionTable.LOWER
+            else:
+                flag = TranspositionTable.EXACT
+            tt.store(board.hash, depth, flag, value, column)
+        return column, value
+
+    def aspiration_search(self, board, depth, maximizing_player, guess):
+        # Root pvs in a narrow window around guess, widened to the full window on a fail
+        if guess is None:
+            return self.pvs(board, depth, maximizing_player, -math.inf, math.inf)
+        alpha = guess - self.ASPIRATION_WINDOW
+        beta = guess + self.ASPIRATION_WINDOW
+        column, value = self.pvs(board, depth, maximizing_player, alpha, beta)
+        if value <= alpha or value >= beta:
+            column, value = self.pvs(board, depth, maximizing_player, -math.inf, math.inf)
+        return column, value
+
+    def search_node_counts(self, board, depth, maximizing_player=True, tt_size_mb=1):
+        # Runs minimax and pvs on the same position, each with a fresh transposition
+        # table (none if tt_size_mb is 0), and reports {name: (column, score, nodes)}
+        if is_array(board):
+            board = BitBoard.from_array(board, 2 if maximizing_player else 1)
+        tt = self.tt
+        results = {}
+        try:
+            for name, search in (('minimax', self.minimax), ('pvs', self.pvs)):
+                self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+                self.nodes = 0
+                column, value = search(board.copy(), depth, maximizing_player, -math.inf, math.inf)
+                results[name] = (column, value, self.nodes)
+        finally:
+            self.tt = tt
+        return results
+
+    def iterative_deepening(self, board, time_budget=None, max_depth=None, maximizing_player=True, seed=None):
+        # Deepens one ply at a time until the budget runs out and returns
+        # (column, score, depth) from the last completed iteration. seed is such
+        # a result already known for this position (see ponder.py): the search
+        # starts one ply deeper and returns the seed if that iteration cannot finish.
+        if is_array(board):
+            board = BitBoard.from_array(board, 2 if maximizing_player else 1)
+        # The book and the solver only know the 6x7 BitBoard, not mnk.MNKBoard
+        is_bitboard = isinstance(board, BitBoard)
+        if self.book is not None and is_bitboard:
+            entry = self.book.lookup(board)
+            if entry is not None:
+                self.last_score = entry[1]
+                return entry[0], entry[1], self.book.depth
+        empty = board.ROW_COUNT * board.COLUMN_COUNT - board.moves
+        if empty <= self.endgame_empty and is_bitboard:
+            return self.solve_endgame(board)
+        if time_budget is None:
+            time_budget = self.move_time
+        if max_depth is None or max_depth > empty:
+            max_depth = empty
+
+        # The previous iteration's best moves come back out of the table as move ordering
+        tt = self.tt
+        if tt is None:
+            self.tt = TranspositionTable(1)
+        else:
+            tt.new_search()
+        start = time.perf_counter()
+        self.deadline = start + time_budget
+        self.nodes = 0
+        column, value, completed = board.ordered_columns()[0], None, 0
+        guess = self.last_score
+        if seed is not None:
+            column, value, completed = seed
+            guess = value
+        try:
+            for depth in range(completed + 1, max_depth + 1):
+                iteration_start = time.perf_counter()
+                try:
+                    if self.search_algorithm == 'pvs':
+                        column, value = self.aspiration_search(board.copy(), depth, maximizing_player, guess)
+                        guess = value
+                    else:
+                        column, value = self.minimax(board.copy(), depth, maximizing_player, -math.inf, math.inf)
+                except SearchTimeout:
+                    if self.stats is not None:
+                        self.stats.abort()
+                    break
+                completed = depth
+                now = time.perf_counter()
+                # The next iteration costs at least as much as this one, skip it if it cannot finish
+                if now + (now - iteration_start) > self.deadline:
+                    break
+        finally:
+            self.deadline = None
+            self.tt = tt
+        self.last_score = value
+        return column, value, completed
+
+    def solve_endgame(self, board):
+        # Exact result from connect_four_solver, returned like iterative_deepening
+        # as (column, score, depth) with the score on the minimax scale: proven
+        # wins map to the terminal scores, sooner wins scoring higher
+        if self.endgame_solver is None:
+            from connect_four_solver import EndgameSolver
+            self.endgame_solver = EndgameSolver()
+        result = self.endgame_solver.solve(board)
+        empty = board.ROW_COUNT * board.COLUMN_COUNT - board.moves
+        if result['result'] == 'draw':
+            value = 0
+        else:
+            winner = board.piece if result['result'] == 'win' else 3 - board.piece
+            value = self.terminal_value_for(winner, empty - result['plies'])
+        self.last_score = value
+        return result['column'], value, empty
+
+    def minimax_last_ply(self, board, valid_columns, maximizing_player):
+        # The batched scorer does not see wins, so a winning child is taken first
+        for col in valid_columns:
+            if board.is_winning_col(col, board.piece):
+                board.play(col)
+                value = self.terminal_value(board, 0)
+                board.undo(col)
+                return col, value
+        import numpy as np
+        children = np.repeat(board.to_array()[None], len(valid_columns), axis=0)
+        for i, col in enumerate(valid_columns):
+            children[i, board.heights[col], col] = board.piece
+        scores = self.evaluate_boards(children, 2)
+        best = int(np.argmax(scores)) if maximizing_player else int(np.argmin(scores))
+        return valid_columns[best], int(scores[best])
+
+    def get_best_move(self, board, piece):
+        if is_array(board):
+            board = BitBoard.from_array(board)
+
+        for col in range(self.COLUMN_COUNT):
+            if board.can_play(col) and board.is_winning_col(col, piece):
+                return col
+
+        for col in range(self.COLUMN_COUNT):
+            if board.can_play(col) and board.is_winning_col(col, 3 - piece):
+                return col
+
+        while True:
+            col = random.randint(0, self.COLUMN_COUNT - 1)
+            if board.can_play(col):
+                return col
+
+    def q_learning(self, num_iterations, learning_rate, discount_factor, exploration_rate, max_depth, env=None, q_table=None):
+        # A dense [state_space, action_space] table cannot hold Connect Four, so Q lives
+        # in a bounded HashedQTable unless another store (e.g. LinearQFunction) is given
+        import numpy as np
+        from connect_four_rl import ConnectFourEnv, HashedQTable
+        from qtable_file import SharedQTable
+        game = env if env is not None else ConnectFourEnv()
+        Q_table = q_table if q_table is not None else HashedQTable()
+        # A read-only table is a fixed policy: play it greedily, without updates
+        learning = getattr(Q_table, 'writable', True)
+        if not learning:
+            exploration_rate = 0
+
+        for i in range(num_iterations):
+            # Reset the game state
+            state = game.reset()
+            done = False
+            depth = 0
+
+            while not done and depth < max_depth:
+                q_values = Q_table.values(state)
+                # Choose action: either explore or exploit
+                if np.random.uniform(0, 1) < exploration_rate:
+                    # Explore: select a random action
+                    action = game.sample_action()
+                else:
+                    # Exploit: select the legal action with max value (greedy policy)
+                    action = max(game.valid_actions(), key=lambda a: q_values[a])
+
+                # Perform the action and get the new state and reward
+                new_state, reward, done = game.step(action)
+
+                # Update Q-table, a finished game has no future value
+                if learning and isinstance(Q_table, SharedQTable):
+                    # The next values are read under the table's locks
+                    Q_table.update(state, action, reward, learning_rate, None if done else new_state,
+                                   discount_factor, game.valid_actions())
+                elif learning:
+                    target = reward
+                    if not done:
+                        next_q_values = Q_table.values(new_state)
+                        target += discount_factor * max(next_q_values[a] for a in game.valid_actions())
+                    Q_table.update(state, action, target, learning_rate)
+
+                # Update the current state
+                state = new_state
+                depth += 1
+
+        return Q_table
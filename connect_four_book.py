@@ -0,0 +1,189 @@
+import argparse
+import math
+import os
+import struct
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from connect_four import BitBoard, ConnectFour
+
+# File layout: header, then three columns sorted by key
+#   keys:   uint64 canonical position key (see canonical_key)
+#   scores: int32 minimax score from piece 2's view, like ConnectFour.minimax
+#   moves:  int8 best column in the canonical orientation
+MAGIC = b'C4OB'
+VERSION = 1
+HEADER = struct.Struct('<4sHIBB')  # magic, version, entry count, max ply, search depth
+HEADER_SIZE = 16
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'connect_four_book.bin')
+SCORE_LIMIT = 2 ** 31 - 1
+
+COLUMN_BITS = (1 << BitBoard.H1) - 1
+
+def position_key(board):
+    # position + mask identifies a position exactly: within each column it is the
+    # side to move's stones plus one bit above the top stone, so it is a perfect
+    # hash of at most 49 bits and needs no collision handling
+    return board.position + board.mask
+
+def mirror_key(key):
+    mirrored = 0
+    for col in range(BitBoard.COLUMN_COUNT):
+        column = (key >> (col * BitBoard.H1)) & COLUMN_BITS
+        mirrored |= column << ((BitBoard.COLUMN_COUNT - 1 - col) * BitBoard.H1)
+    return mirrored
+
+def canonical_key(board):
+    # Returns (key, mirrored); a position and its mirror image share one entry
+    key = position_key(board)
+    mirrored = mirror_key(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+def mirror_column(col):
+    return BitBoard.COLUMN_COUNT - 1 - col
+
+def enumerate_positions(max_ply):
+    # All positions up to max_ply plies without four in a row, one per mirror
+    # pair, as {canonical key: columns played to reach it in canonical orientation}
+    positions = {}
+    board = BitBoard()
+    moves = []
+
+    def visit():
+        key, mirrored = canonical_key(board)
+        if key in positions:
+            return
+        if mirrored:
+            positions[key] = ''.join(str(mirror_column(col)) for col in moves)
+        else:
+            positions[key] = ''.join(str(col) for col in moves)
+        if board.moves == max_ply:
+            return
+        for col in board.valid_columns():
+            board.play(col)
+            moves.append(col)
+            if not board.winning_move(3 - board.piece):
+                visit()
+            moves.pop()
+            board.undo(col)
+
+    visit()
+    return positions
+
+_ENGINE = None
+
+def init_worker(tt_size_mb):
+    global _ENGINE
+    _ENGINE = ConnectFour(tt_size_mb)
+
+def search_position(task):
+    key, moves, depth = task
+    board = BitBoard()
+    for col in moves:
+        board.play(int(col))
+    # A cleared table keeps every entry independent of which positions the worker searched before
+    _ENGINE.tt.clear()
+    col, value = _ENGINE.minimax(board, depth, board.piece == 2, -math.inf, math.inf)
+    return key, col, value
+
+def generate(path=DEFAULT_PATH, max_ply=8, depth=8, workers=None, tt_size_mb=4, progress=None):
+    # Searches every position up to max_ply at a fixed depth and writes the book.
+    # Returns the number of entries.
+    positions = enumerate_positions(max_ply)
+    tasks = [(key, moves, depth) for key, moves in positions.items()]
+    results = []
+    with Pool(workers, initializer=init_worker, initargs=(tt_size_mb,)) as pool:
+        for i, result in enumerate(pool.imap_unordered(search_position, tasks, chunksize=16)):
+            results.append(result)
+            if progress is not None:
+                progress(i + 1, len(tasks))
+    results.sort()
+    keys = np.array([r[0] for r in results], dtype=np.uint64)
+    scores = np.array([max(-SCORE_LIMIT, min(SCORE_LIMIT, r[2])) for r in results], dtype=np.int32)
+    moves = np.array([r[1] for r in results], dtype=np.int8)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(results), max_ply, depth).ljust(HEADER_SIZE, b'\0'))
+        for column in (keys, scores, moves):
+            f.write(column.tobytes())
+    os.replace(tmp, path)
+    return len(results)
+
+class OpeningBook:
+    # Read side of the book. The file is memory-mapped and looked up by binary
+    # search over the sorted keys, so opening it costs nothing and a lookup only
+    # touches a few pages.
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, count, max_ply, depth = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %d Connect Four book" % (path, VERSION))
+        self.count = count
+        self.max_ply = max_ply
+        self.depth = depth
+        offset = HEADER_SIZE
+        self.keys = np.memmap(path, dtype=np.uint64, mode='r', offset=offset, shape=(count,))
+        offset += 8 * count
+        self.scores = np.memmap(path, dtype=np.int32, mode='r', offset=offset, shape=(count,))
+        offset += 4 * count
+        self.moves = np.memmap(path, dtype=np.int8, mode='r', offset=offset, shape=(count,))
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, board):
+        # Returns (column, score) for the side to move, or None if out of book.
+        # Like ConnectFour.minimax the score is from piece 2's view of the board
+        # as given. The key only holds the side to move's stones, so a board with
+        # the colours swapped (tournament.c4_minimax hands the engine one when it
+        # plays piece 1) finds the same entry; its stored score was computed with
+        # piece 1 moving first and is negated for it.
+        if board.moves > self.max_ply:
+            return None
+        key, mirrored = canonical_key(board)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == self.count or int(self.keys[i]) != key:
+            return None
+        col = int(self.moves[i])
+        if mirrored:
+            col = mirror_column(col)
+        score = int(self.scores[i])
+        first_to_move = 1 if board.moves % 2 == 0 else 2
+        if board.piece != first_to_move:
+            score = -score
+        return col, score
+
+def load_book(path=DEFAULT_PATH):
+    # The book if the file exists, else None
+    if path is None or not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Connect Four opening book.")
+    parser.add_argument('--ply', type=int, default=8, help="deepest position in the book, in plies from the start")
+    parser.add_argument('--depth', type=int, default=8, help="minimax depth searched for every position")
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--tt-size-mb', type=int, default=4, help="transposition table per worker")
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.perf_counter()
+        if done == total or now - last[0] > 5:
+            last[0] = now
+            print("%d/%d positions, %.0fs" % (done, total, now - start), flush=True)
+
+    count = generate(args.output, args.ply, args.depth, args.workers, args.tt_size_mb, progress)
+    print("%d positions to %s in %.1fs" % (count, args.output, time.perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import pygame
+import sys
+import time
+
+from connect_four import ConnectFour
+from connect_four_book import load_book
+from ponder import ConnectFourPonderer
+
+class ConnectFourGUI(ConnectFour):
+    # fast=True is the spectator mode: moves are paced by a frame-rate cap of fps
+    # instead of the fixed pauses between moves. log is an optional
+    # game_log.GameLog that the game is recorded to. ponder=True keeps Player 2
+    # searching while Player 1 thinks (see ponder.py).
+    def __init__(self, tt_size_mb=16, batch_leaves=False, fast=False, fps=30, log=None, ponder=False):
+        super().__init__(tt_size_mb, batch_leaves)
+        # Opening moves come from the book when connect_four_book.bin has been built
+        self.book = load_book()
+
+        self.BLUE = (0, 0, 255)
+        self.RED = (255, 0, 0)
+        self.YELLOW = (255, 255, 0)
+        self.BLACK = (0, 0, 0)
+
+        self.SQUARESIZE = 100
+        self.width = self.COLUMN_COUNT * self.SQUARESIZE
+        self.height = (self.ROW_COUNT + 1) * self.SQUARESIZE
+        self.size = (self.width, self.height)
+        self.RADIUS = int(self.SQUARESIZE / 2 - 5)
+
+        self.fast = fast
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.log = log
+        self.game_id = None if log is None else log.new_game()
+        self.game_start = time.perf_counter()
+        self.ponderer = ConnectFourPonderer(self) if ponder else None
+
+        self.screen = pygame.display.set_mode(self.size)
+        pygame.init()
+        self.myfont = pygame.font.SysFont("monospace", 75)
+        self.board_surface = self.render_board()
+        self.draw_board(self.board)
+
+    def render_board(self):
+        # The blue board with its empty holes never changes, so it is drawn once
+        surface = pygame.Surface(self.size)
+        surface.fill(self.BLACK)
+        for c in range(self.COLUMN_COUNT):
+            for r in range(self.ROW_COUNT):
+                pygame.draw.rect(surface, self.BLUE, (c * self.SQUARESIZE, r * self.SQUARESIZE + self.SQUARESIZE, self.SQUARESIZE, self.SQUARESIZE))
+                pygame.draw.circle(surface, self.BLACK, (int(c * self.SQUARESIZE + self.SQUARESIZE / 2), int(r * self.SQUARESIZE + self.SQUARESIZE + self.SQUARESIZE / 2)), self.RADIUS)
+        return surface.convert()
+
+    def draw_board(self, board):
+        # Full redraw from the cached board, only needed at the start
+        self.screen.blit(self.board_surface, (0, 0))
+        for c in range(self.COLUMN_COUNT):
+            for r in range(self.ROW_COUNT):
+                if board[r][c]:
+                    self.draw_piece(r, c, int(board[r][c]))
+        pygame.display.update()
+
+    def draw_piece(self, row, col, piece):
+        # Draws one disc and returns the screen area it changed
+        color = self.RED if piece == 1 else self.YELLOW
+        return pygame.draw.circle(self.screen, color, (int(col * self.SQUARESIZE + self.SQUARESIZE / 2), self.height - int(row * self.SQUARESIZE + self.SQUARESIZE / 2)), self.RADIUS)
+
+    def place_piece(self, row, col, piece):
+        pygame.display.update(self.draw_piece(row, col, piece))
+
+    def pace(self, milliseconds):
+        # Fixed pause between moves, or in fast mode just the frame-rate cap
+        pygame.event.pump()
+        if self.fast:
+            self.clock.tick(self.fps)
+        else:
+            pygame.time.wait(milliseconds)
+
+    def log_move(self, col, piece, score, seconds):
+        if self.log is not None:
+            self.log.move(self.game_id, self.bitboard.moves - 1, col, piece - 1, score, seconds)
+
+    def log_result(self, winner):
+        # winner is the winning piece, None for a draw
+        if self.log is not None:
+            self.log.result(self.game_id, self.bitboard.moves, None if winner is None else winner - 1, time.perf_counter() - self.game_start)
+            self.log.flush()
+
+    def play(self):
+        while not self.game_over:
+            # for event in pygame.event.get():
+            #     if event.type == pygame.QUIT:
+            #         pygame.quit()
+            #         sys.exit()
+
+            #     if event.type == pygame.MOUSEMOTION:
+            #         pygame.draw.rect(self.screen, self.BLACK, (0, 0, self.width, self.SQUARESIZE))
+            #         posx = event.pos[0]
+            #         if self.turn == 0:
+            #             pygame.draw.circle(self.screen, self.RED, (posx, int(self.SQUARESIZE / 2)), self.RADIUS)
+            #         else:
+            #             pygame.draw.circle(self.screen, self.YELLOW, (posx, int(self.SQUARESIZE / 2)), self.RADIUS)
+            #         pygame.display.update()
+
+            #     if event.type == pygame.MOUSEBUTTONDOWN:
+            #         pygame.draw.rect(self.screen, self.BLACK, (0, 0, self.width, self.SQUARESIZE))
+
+                    # Player 1's move
+                    if self.turn == 0:
+                        # posx = event.pos[0]
+                        # col = int(math.floor(posx / self.SQUARESIZE))
+                        start = time.perf_counter()
+                        col = self.get_best_move(self.bitboard, 2)
+                        seconds = time.perf_counter() - start
+
+                        if self.bitboard.can_play(col):
+                            row = self.bitboard.heights[col]
+                            self.bitboard.play(col)
+                            self.drop_piece(self.board, row, col, 1)
+                            self.place_piece(row, col, 1)
+                            self.log_move(col, 1, None, seconds)
+
+                            if self.bitboard.winning_move(1):
+                                self.game_over = True
+                                self.log_result(1)
+                                self.show_message("Player 1 wins!!", self.RED)
+                                self.pace(3000)
+                                pygame.quit()
+                                sys.exit()
+
+                    # Player 2's move
+                    else:
+                        start = time.perf_counter()
+                        if self.ponderer is not None:
+                            col, score, _ = self.ponderer.best_move(self.bitboard, self.move_time)
+                        else:
+                            col, score, _ = self.iterative_deepening(self.bitboard, self.move_time)
+                        seconds = time.perf_counter() - start
+
+                        if self.bitboard.can_play(col):
+                            row = self.bitboard.heights[col]
+                            self.bitboard.play(col)
+                            self.drop_piece(self.board, row, col, 2)
+                            self.place_piece(row, col, 2)
+                            self.log_move(col, 2, score, seconds)
+
+                            if self.bitboard.winning_move(2):
+                                self.game_over = True
+                                self.log_result(2)
+                                self.show_message("Player 2 wins!!", self.YELLOW)
+                                self.pace(3000)
+                                pygame.quit()
+                                sys.exit()
+
+                            if self.ponderer is not None and not self.bitboard.is_full():
+                                self.ponderer.start(self.bitboard.copy())
+
+                    self.turn += 1
+                    self.turn = self.turn % 2
+
+                    if self.bitboard.is_full():
+                        self.game_over = True
+                        self.log_result(None)
+
+                    if self.turn == 1:
+                        self.pace(500)
+                        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN))
+
+                    if self.game_over:
+                        if self.ponderer is not None:
+                            self.ponderer.stop()
+                        self.pace(3000)
+                        pygame.quit()
+                        sys.exit()
+
+    def show_message(self, message, color):
+        label = self.myfont.render(message, 1, color)
+        pygame.display.update(self.screen.blit(label, (40, 10)))
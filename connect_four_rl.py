@@ -0,0 +1,276 @@
+import argparse
+import math
+import random
+import time
+from array import array
+
+import numpy as np
+
+from connect_four import BitBoard, ConnectFour, IncrementalEvaluator
+
+class ConnectFourEnv:
+    # Headless environment with the interface ConnectFour.q_learning expects.
+    # The agent plays `piece`; the opponent ('heuristic' = get_best_move,
+    # 'random' or 'minimax') replies inside step(). States are the compact
+    # position key of the side to move, which is always the agent.
+    state_space = 4531985219092  # legal Connect Four positions
+    action_space = BitBoard.COLUMN_COUNT
+
+    def __init__(self, opponent='heuristic', piece=2, depth=2, win_reward=1.0, loss_reward=-1.0, draw_reward=0.0, step_reward=0.0):
+        if opponent not in ('heuristic', 'random', 'minimax'):
+            raise ValueError("unknown opponent %r" % opponent)
+        self.opponent = opponent
+        self.piece = piece
+        self.depth = depth
+        self.win_reward = win_reward
+        self.loss_reward = loss_reward
+        self.draw_reward = draw_reward
+        self.step_reward = step_reward
+        self.engine = ConnectFour(tt_size_mb=1 if opponent == 'minimax' else 0)
+        self.board = BitBoard()
+
+    @staticmethod
+    def position_key(board):
+        # position + mask is unique per position for the side to move (one spare bit per column)
+        return board.position + board.mask
+
+    def state(self):
+        return self.position_key(self.board)
+
+    def valid_actions(self):
+        return self.board.valid_columns()
+
+    def sample_action(self):
+        return random.choice(self.board.valid_columns())
+
+    def opponent_move(self):
+        piece = 3 - self.piece
+        if self.opponent == 'heuristic':
+            return self.engine.get_best_move(self.board, piece)
+        if self.opponent == 'random':
+            return random.choice(self.board.valid_columns())
+        # minimax maximizes for piece 2
+        return self.engine.minimax(self.board.copy(), self.depth, piece == 2, -math.inf, math.inf)[0]
+
+    def reset(self):
+        if random.random() < 0.5:
+            self.board = BitBoard(3 - self.piece)
+            self.board.attach_evaluator()
+            self.board.play(self.opponent_move())
+        else:
+            self.board = BitBoard(self.piece)
+            self.board.attach_evaluator()
+        return self.state()
+
+    def step(self, action):
+        board = self.board
+        if not board.can_play(action):
+            # Illegal moves lose, so a learner cannot stall on a full column
+            return self.state(), self.loss_reward, True
+        board.play(action)
+        if board.winning_move(self.piece):
+            return self.state(), self.win_reward, True
+        if board.is_full():
+            return self.state(), self.draw_reward, True
+        board.play(self.opponent_move())
+        if board.winning_move(3 - self.piece):
+            return self.state(), self.loss_reward, True
+        if board.is_full():
+            return self.state(), self.draw_reward, True
+        return self.state(), self.step_reward, False
+
+class HashedQTable:
+    # Bounded Q store keyed by position key. Slots are found by a short linear
+    # probe from a multiplicative hash; when all probed slots are taken the
+    # least-visited one is evicted, so memory never grows past size_mb.
+    PROBES = 4
+
+    def __init__(self, size_mb=64, actions=BitBoard.COLUMN_COUNT):
+        self.actions = actions
+        entry_bytes = 8 + 4 + 4 * actions  # key, visits, Q values
+        entries = max(self.PROBES, (size_mb * 1024 * 1024) // entry_bytes)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.index_mask = self.size - 1
+        # Fibonacci hashing takes the slot from the top bits of the product
+        self.shift = 64 - (self.size.bit_length() - 1)
+        self.entry_bytes = entry_bytes
+        self.keys = array('Q', bytes(8 * self.size))  # key + 1, 0 marks an empty slot
+        self.visits = array('I', bytes(4 * self.size))
+        self.q = np.zeros((self.size, actions), dtype=np.float32)
+        self.zeros = np.zeros(actions, dtype=np.float32)
+        self.used = 0
+        self.evictions = 0
+
+    def start(self, key):
+        return (((key + 1) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+
+    def rows(self, key):
+        # Slots a lookup or insert of `key` can touch
+        start = self.start(key)
+        return [(start + p) & self.index_mask for p in range(self.PROBES)]
+
+    def find(self, key, create):
+        stored = key + 1
+        start = self.start(key)
+        victim = None
+        for p in range(self.PROBES):
+            i = (start + p) & self.index_mask
+            slot_key = self.keys[i]
+            if slot_key == stored:
+                return i
+            if slot_key == 0:
+                if not create:
+                    return None
+                self.keys[i] = stored
+                self.used += 1
+                return i
+            if victim is None or self.visits[i] < self.visits[victim]:
+                victim = i
+        if not create:
+            return None
+        self.evictions += 1
+        self.keys[victim] = stored
+        self.visits[victim] = 0
+        self.q[victim] = 0.0
+        return victim
+
+    def values(self, state):
+        i = self.find(state, False)
+        if i is None:
+            return self.zeros
+        return self.q[i]
+
+    def update(self, state, action, target, learning_rate):
+        i = self.find(state, True)
+        self.visits[i] = min(self.visits[i] + 1, 0xFFFFFFFF)
+        self.q[i, action] += learning_rate * (target - self.q[i, action])
+
+    def memory_bytes(self):
+        return self.size * self.entry_bytes
+
+    @property
+    def writable(self):
+        # False for a table mapped with mode 'r'
+        return self.q.flags.writeable
+
+    def save(self, path):
+        from qtable_file import save_hashed
+        save_hashed(self, path)
+
+    @staticmethod
+    def open(path, mode='r'):
+        # Maps a saved table without reading it: 'r' for serving, 'r+' to update in place
+        from qtable_file import open_hashed
+        return open_hashed(path, mode)
+
+    def stats(self):
+        return {'entries': self.used, 'size': self.size, 'fill': self.used / self.size, 'evictions': self.evictions, 'bytes': self.memory_bytes()}
+
+class LinearQFunction:
+    # Q(s, a) = w . phi(afterstate of a), where phi counts the evaluate_window
+    # window patterns from the mover's side: windows with k own pieces and no
+    # opponent pieces (k = 1..4), the same for the opponent, centre-column pieces
+    # for both sides and a bias. Needs the env to see the board behind a state key.
+    FEATURES = 11
+
+    def __init__(self, env, actions=BitBoard.COLUMN_COUNT):
+        self.env = env
+        self.actions = actions
+        self.weights = np.zeros(self.FEATURES, dtype=np.float64)
+        # Features of the last two states seen, enough for one Q-learning update
+        self.cache = {}
+
+    def features(self, board):
+        evaluator = board.evaluator
+        if evaluator is None:
+            evaluator = board.attach_evaluator()
+        piece = board.piece
+        phi = np.zeros((self.actions, self.FEATURES), dtype=np.float64)
+        centre = (BitBoard.COLUMN_COUNT // 2) * BitBoard.H1
+        centre_mask = ((1 << BitBoard.ROW_COUNT) - 1) << centre
+        for col in board.valid_columns():
+            board.play(col)
+            own = evaluator.counts[piece]
+            other = evaluator.counts[3 - piece]
+            row = phi[col]
+            for w in range(len(IncrementalEvaluator.WINDOWS)):
+                n = own[w]
+                m = other[w]
+                if m == 0 and n:
+                    row[n - 1] += 1
+                elif n == 0 and m:
+                    row[3 + m] += 1
+            row[8] = bin(board.pieces(piece) & centre_mask).count('1')
+            row[9] = bin(board.pieces(3 - piece) & centre_mask).count('1')
+            row[10] = 1.0
+            board.undo(col)
+        return phi
+
+    def values(self, state):
+        phi = self.cache.get(state)
+        if phi is None:
+            if len(self.cache) >= 2:
+                del self.cache[next(iter(self.cache))]
+            phi = self.cache[state] = self.features(self.env.board)
+        return phi @ self.weights
+
+    def update(self, state, action, target, learning_rate):
+        if state not in self.cache:
+            raise ValueError("update() needs the features from a recent values() call for this state")
+        phi = self.cache[state][action]
+        # Normalized step so large window counts cannot make the weights diverge
+        self.weights += learning_rate * (target - phi @ self.weights) * phi / (1.0 + phi @ phi)
+
+    def memory_bytes(self):
+        return self.weights.nbytes
+
+    def stats(self):
+        return {'weights': self.weights.tolist(), 'bytes': self.memory_bytes()}
+
+def train(num_iterations, learning_rate=0.1, discount_factor=0.9, exploration_rate=0.1, backend='table', opponent='heuristic', size_mb=64):
+    # Runs ConnectFour.q_learning on a fresh env and reports throughput and memory
+    env = ConnectFourEnv(opponent)
+    q = HashedQTable(size_mb) if backend == 'table' else LinearQFunction(env)
+    start = time.perf_counter()
+    ConnectFour(tt_size_mb=0).q_learning(num_iterations, learning_rate, discount_factor, exploration_rate, BitBoard.ROW_COUNT * BitBoard.COLUMN_COUNT, env=env, q_table=q)
+    elapsed = time.perf_counter() - start
+    return q, {'episodes': num_iterations, 'seconds': elapsed, 'episodes_per_second': num_iterations / elapsed, 'memory_bytes': q.memory_bytes()}
+
+def evaluate(q, env, games=200):
+    # Greedy play without updates, returns (win, draw, loss) rates
+    results = [0, 0, 0]
+    for _ in range(games):
+        state = env.reset()
+        while True:
+            legal = env.valid_actions()
+            values = q.values(state)
+            action = max(legal, key=lambda a: values[a])
+            state, reward, done = env.step(action)
+            if done:
+                results[0 if reward > 0 else 2 if reward < 0 else 1] += 1
+                break
+    return tuple(r / games for r in results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a Connect Four Q policy against a fixed opponent.")
+    parser.add_argument('--episodes', type=int, default=20000)
+    parser.add_argument('--backend', choices=('table', 'linear'), default='table')
+    parser.add_argument('--opponent', choices=('heuristic', 'random', 'minimax'), default='random')
+    parser.add_argument('--alpha', type=float, default=0.1)
+    parser.add_argument('--gamma', type=float, default=0.9)
+    parser.add_argument('--epsilon', type=float, default=0.1)
+    parser.add_argument('--size-mb', type=int, default=64, help="memory budget of the hashed table")
+    parser.add_argument('--eval-games', type=int, default=200)
+    parser.add_argument('--save', metavar='PATH', help="write the trained table to PATH (table backend)")
+    args = parser.parse_args(argv)
+
+    q, report = train(args.episodes, args.alpha, args.gamma, args.epsilon, args.backend, args.opponent, args.size_mb)
+    print("%d episodes in %.1fs: %.0f episodes/s, %.1f MB" % (report['episodes'], report['seconds'], report['episodes_per_second'], report['memory_bytes'] / 2 ** 20))
+    print(q.stats() if args.backend == 'table' else "weights: %s" % np.round(q.weights, 3).tolist())
+    win, draw, loss = evaluate(q, ConnectFourEnv(args.opponent), args.eval_games)
+    print("greedy vs %s: win %.3f draw %.3f loss %.3f" % (args.opponent, win, draw, loss))
+    if args.save and args.backend == 'table':
+        q.save(args.save)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import time
+
+from connect_four import BitBoard
+
+WIDTH = BitBoard.COLUMN_COUNT
+HEIGHT = BitBoard.ROW_COUNT
+H1 = BitBoard.H1
+CELLS = WIDTH * HEIGHT
+MIN_SCORE = -(CELLS // 2) + 3
+
+BOTTOM_MASK = 0
+for _col in range(WIDTH):
+    BOTTOM_MASK |= 1 << (_col * H1)
+del _col
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+COLUMN_MASKS = [((1 << HEIGHT) - 1) << (col * H1) for col in range(WIDTH)]
+# Centre-first like BitBoard.COLUMN_ORDER
+COLUMN_ORDER = BitBoard.COLUMN_ORDER
+
+def winning_cells(position, mask):
+    # Empty cells that would complete four in a row for the stones in position
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (H1, H1 - 1, H1 + 1):
+        p = (position << shift) & (position << (2 * shift))
+        r |= p & (position << (3 * shift))
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> (2 * shift))
+        r |= p & (position << shift)
+        r |= p & (position >> (3 * shift))
+    return r & (BOARD_MASK ^ mask)
+
+def popcount(x):
+    return bin(x).count('1')
+
+def trunc_half(x):
+    # C-style division by two (rounds towards zero), as the score bounds need
+    return -(-x // 2) if x < 0 else x // 2
+
+class EndgameSolver:
+    # Exact Connect Four solver for the side to move: negamax with alpha-beta over
+    # the (position, mask) bitboards, searched with null windows that bisect the
+    # score range. Scores follow the usual solver convention: 0 is a draw, a
+    # positive score s means the side to move wins with its (22 - s)th-to-last
+    # stone, i.e. sooner wins score higher, and negative scores are losses.
+    #
+    # Only moves that do not hand the opponent an immediate win are searched,
+    # forced blocks are played at once, moves are ordered by the number of
+    # threats they create, and a table keeps upper bounds by position key.
+    #
+    # Time target: with 20 or fewer empty cells a solve takes well under a second
+    # in CPython (measured on random positions: median ~15 ms, worst ~0.3 s);
+    # at 24 empty cells the worst case is about a second, and it grows
+    # exponentially from there. That is why ConnectFour.iterative_deepening
+    # switches to the solver only at ConnectFour.endgame_empty (20) empty cells.
+    def __init__(self, table_entries=1 << 22):
+        self.table_entries = table_entries
+        self.table = {}
+        self.nodes = 0
+
+    def clear(self):
+        self.table.clear()
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        self.nodes += 1
+        opponent = position ^ mask
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent_wins = winning_cells(opponent, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                # Two threats cannot both be blocked
+                return -((CELLS - moves) // 2)
+            possible = forced
+        # Never play directly below an opponent's winning cell
+        candidates = possible & ~(opponent_wins >> 1)
+        if not candidates:
+            return -((CELLS - moves) // 2)
+        if moves >= CELLS - 2:
+            return 0
+
+        low = -((CELLS - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (CELLS - 1 - moves) // 2
+        key = position + mask
+        bound = self.table.get(key)
+        if bound is not None:
+            high = bound + MIN_SCORE - 1
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        ordered = []
+        for col in COLUMN_ORDER:
+            move = candidates & COLUMN_MASKS[col]
+            if move:
+                ordered.append((popcount(winning_cells(position | move, mask)), move))
+        # Stable sort keeps the centre-first order among equal threat counts
+        ordered.sort(key=lambda item: -item[0])
+        for _, move in ordered:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self.table) >= self.table_entries:
+            self.table.clear()
+        self.table[key] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def score(self, board):
+        # Exact score of the position for the side to move
+        position, mask, moves = board.position, board.mask, board.moves
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        if winning_cells(position, mask) & possible:
+            return (CELLS + 1 - moves) // 2
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and trunc_half(low) < med:
+                med = trunc_half(low)
+            elif med >= 0 and trunc_half(high) > med:
+                med = trunc_half(high)
+            result = self.negamax(position, mask, moves, med, med + 1)
+            if result <= med:
+                high = result
+            else:
+                low = result
+        return low
+
+    def solve(self, board):
+        # Best move and exact result for the side to move of a BitBoard, as a dict:
+        # column, score, result ('win', 'loss' or 'draw'), plies (until the winning
+        # stone is played, including it; None for a draw), nodes and seconds
+        start = time.perf_counter()
+        self.nodes = 0
+        best_col, best_score = None, None
+        for col in board.ordered_columns():
+            if board.is_winning_col(col, board.piece):
+                best_col, best_score = col, (CELLS + 1 - board.moves) // 2
+                break
+            board.play(col)
+            score = -self.score(board)
+            board.undo(col)
+            if best_score is None or score > best_score:
+                best_col, best_score = col, score
+        return {
+            'column': best_col,
+            'score': best_score,
+            'result': result_name(best_score),
+            'plies': plies_to_end(best_score, board.moves),
+            'nodes': self.nodes,
+            'seconds': time.perf_counter() - start,
+        }
+
+def result_name(score):
+    if score is None or score == 0:
+        return 'draw'
+    return 'win' if score > 0 else 'loss'
+
+def plies_to_end(score, moves):
+    # The winner of score s plays the winning stone onto a board holding n stones,
+    # where (CELLS + 1 - n) // 2 == s and n has the winner's parity
+    if not score:
+        return None
+    n = CELLS + 1 - 2 * abs(score)
+    parity = moves % 2 if score > 0 else (moves + 1) % 2
+    if n % 2 != parity:
+        n -= 1
+    return n - moves + 1
@@ -0,0 +1,236 @@
+import argparse
+import math
+import os
+import struct
+
+import numpy as np
+
+# Append-only binary game log. A 16-byte file header is followed by fixed-size
+# records, one per move and one result footer per game:
+#   game:    uint32 game id, assigned by the writer
+#   ply:     uint16 ply of the move (for a footer: number of plies played)
+#   move:    int16 cell (tic-tac-toe, row * 3 + col) or column (Connect Four), -1 in a footer
+#   kind:    uint8 KIND_MOVE or KIND_RESULT
+#   side:    int8 side that moved: 0 for X / piece 1, 1 for O / piece 2.
+#            In a footer the winning side, or -1 for a draw
+#   score:   float32 engine score of the move, NaN if the engine gave none
+#   seconds: float32 time spent choosing the move (for a footer: the whole game), NaN if not timed
+# Records of different games may interleave, so several games can be logged at
+# once; a game counts as finished once its footer is written.
+MAGIC = b'GLOG'
+VERSION = 1
+HEADER = struct.Struct('<4sHBB')  # magic, version, game, record size
+HEADER_SIZE = 16
+RECORD = struct.Struct('<IHhBbff')
+RECORD_DTYPE = np.dtype([('game', '<u4'), ('ply', '<u2'), ('move', '<i2'), ('kind', 'u1'),
+                         ('side', 'i1'), ('score', '<f4'), ('seconds', '<f4')])
+KIND_MOVE = 1
+KIND_RESULT = 2
+GAMES = {'tictactoe': 1, 'connect4': 2}
+GAME_NAMES = {code: name for name, code in GAMES.items()}
+CHUNK_RECORDS = 1 << 16
+
+def optional(value):
+    return math.nan if value is None else value
+
+def read_header(f, path):
+    data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError("%s is not a game log" % path)
+    magic, version, game, record_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size or game not in GAME_NAMES:
+        raise ValueError("%s is not a version %d game log" % (path, VERSION))
+    return GAME_NAMES[game]
+
+class GameLog:
+    # Write side. Opening an existing log appends to it: a record cut short by a
+    # crash is dropped, and new game ids continue after the highest one in the file.
+    def __init__(self, path, game):
+        if game not in GAMES:
+            raise ValueError("unknown game %r, expected one of %s" % (game, ', '.join(GAMES)))
+        self.path = path
+        self.game = game
+        self.next_id = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                logged = read_header(f, path)
+            if logged != game:
+                raise ValueError("%s is a %s log, not %s" % (path, logged, game))
+            size = os.path.getsize(path)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD.size * RECORD.size
+            if whole != size:
+                os.truncate(path, whole)
+            for chunk in read_chunks(path):
+                if len(chunk):
+                    self.next_id = max(self.next_id, int(chunk['game'].max()) + 1)
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(HEADER.pack(MAGIC, VERSION, GAMES[game], RECORD.size).ljust(HEADER_SIZE, b'\0'))
+
+    def new_game(self):
+        game_id = self.next_id
+        self.next_id += 1
+        return game_id
+
+    def move(self, game_id, ply, move, side, score=None, seconds=None):
+        self.file.write(RECORD.pack(game_id, ply, move, KIND_MOVE, side, optional(score), optional(seconds)))
+
+    def result(self, game_id, plies, winner, seconds=None):
+        # winner is the winning side (0 or 1), None for a draw
+        self.file.write(RECORD.pack(game_id, plies, -1, KIND_RESULT, -1 if winner is None else winner, math.nan, optional(seconds)))
+
+    def write_game(self, moves, winner, first=0, scores=None, seconds=None):
+        # Logs a finished game in one go; first is the side that made the first move
+        game_id = self.new_game()
+        for ply, move in enumerate(moves):
+            self.move(game_id, ply, move, (first + ply) % 2,
+                      None if scores is None else scores[ply], None if seconds is None else seconds[ply])
+        total = None if seconds is None else sum(seconds)
+        self.result(game_id, len(moves), winner, total)
+        return game_id
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_game(path):
+    with open(path, 'rb') as f:
+        return read_header(f, path)
+
+def read_chunks(path, chunk_records=CHUNK_RECORDS):
+    # Yields the records as numpy structured arrays of at most chunk_records each,
+    # so a log of any size is read in constant memory. A trailing partial record
+    # (a write cut short) is ignored.
+    with open(path, 'rb') as f:
+        read_header(f, path)
+        while True:
+            data = f.read(chunk_records * RECORD.size)
+            whole = len(data) // RECORD.size
+            if whole:
+                yield np.frombuffer(data, RECORD_DTYPE, whole)
+            if len(data) < chunk_records * RECORD.size:
+                return
+
+def read_games(path, chunk_records=CHUNK_RECORDS):
+    # Yields each finished game as a dict, in the order the footers were written.
+    # Memory is bounded by the number of games in progress at the same time, not
+    # by the size of the log. Games without a footer are skipped.
+    pending = {}
+    for chunk in read_chunks(path, chunk_records):
+        for game_id, ply, move, kind, side, score, seconds in chunk.tolist():
+            if kind == KIND_MOVE:
+                game = pending.get(game_id)
+                if game is None:
+                    game = pending[game_id] = {'game': game_id, 'moves': [], 'sides': [], 'scores': [], 'seconds': []}
+                game['moves'].append(move)
+                game['sides'].append(side)
+                game['scores'].append(None if score != score else score)
+                game['seconds'].append(None if seconds != seconds else seconds)
+            elif kind == KIND_RESULT:
+                game = pending.pop(game_id, None)
+                if game is None:
+                    game = {'game': game_id, 'moves': [], 'sides': [], 'scores': [], 'seconds': []}
+                game['plies'] = ply
+                game['winner'] = None if side < 0 else side
+                game['duration'] = None if seconds != seconds else seconds
+                yield game
+
+def opening_stats(games, plies=2):
+    # Results per opening (the first `plies` moves), from any iterable of games
+    # such as read_games(path): {opening tuple: {'games', 'wins' by side, 'draws'}}
+    openings = {}
+    for game in games:
+        opening = tuple(game['moves'][:plies])
+        entry = openings.get(opening)
+        if entry is None:
+            entry = openings[opening] = {'games': 0, 'wins': [0, 0], 'draws': 0}
+        entry['games'] += 1
+        if game['winner'] is None:
+            entry['draws'] += 1
+        else:
+            entry['wins'][game['winner']] += 1
+    return openings
+
+def think_time_by_ply(path, chunk_records=CHUNK_RECORDS):
+    # Think time of the timed moves per ply, summed chunk by chunk with numpy:
+    # [{'ply', 'moves', 'mean', 'max'}] for every ply that has a timed move
+    counts = np.zeros(0, dtype=np.int64)
+    totals = np.zeros(0)
+    longest = np.zeros(0)
+    for chunk in read_chunks(path, chunk_records):
+        timed = chunk[(chunk['kind'] == KIND_MOVE) & ~np.isnan(chunk['seconds'])]
+        if not len(timed):
+            continue
+        ply = timed['ply'].astype(np.int64)
+        seconds = timed['seconds'].astype(np.float64)
+        size = max(len(counts), int(ply.max()) + 1)
+        if size > len(counts):
+            counts = np.pad(counts, (0, size - len(counts)))
+            totals = np.pad(totals, (0, size - len(totals)))
+            longest = np.pad(longest, (0, size - len(longest)))
+        counts += np.bincount(ply, minlength=size)
+        totals += np.bincount(ply, weights=seconds, minlength=size)
+        np.maximum.at(longest, ply, seconds)
+    return [{'ply': ply, 'moves': int(counts[ply]), 'mean': float(totals[ply] / counts[ply]), 'max': float(longest[ply])}
+            for ply in range(len(counts)) if counts[ply]]
+
+def side_names(game):
+    return ('X', 'O') if game == 'tictactoe' else ('1', '2')
+
+def print_openings(path, plies, min_games, top):
+    names = side_names(read_game(path))
+    openings = opening_stats(read_games(path), plies)
+    rows = sorted(openings.items(), key=lambda item: -item[1]['games'])
+    rows = [(opening, entry) for opening, entry in rows if entry['games'] >= min_games][:top]
+    print("%-20s %8s %8s %8s %8s" % ("opening", "games", names[0] + " wins", names[1] + " wins", "draws"))
+    for opening, entry in rows:
+        games = entry['games']
+        print("%-20s %8d %7.1f%% %7.1f%% %7.1f%%" % (','.join(str(move) for move in opening) or '-', games,
+              100 * entry['wins'][0] / games, 100 * entry['wins'][1] / games, 100 * entry['draws'] / games))
+
+def print_think_time(path):
+    print("%4s %8s %10s %10s" % ("ply", "moves", "mean ms", "max ms"))
+    for row in think_time_by_ply(path):
+        print("%4d %8d %10.2f %10.2f" % (row['ply'], row['moves'], 1000 * row['mean'], 1000 * row['max']))
+
+def print_games(path, limit):
+    names = side_names(read_game(path))
+    for i, game in enumerate(read_games(path)):
+        if limit is not None and i >= limit:
+            break
+        winner = 'draw' if game['winner'] is None else names[game['winner']]
+        print("game %d: winner=%s moves=%s" % (game['game'], winner, ','.join(str(move) for move in game['moves'])))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read and analyse game logs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    openings = commands.add_parser('openings', help="win rates per opening")
+    openings.add_argument('log')
+    openings.add_argument('--plies', type=int, default=2, help="moves that make up an opening")
+    openings.add_argument('--min-games', type=int, default=1)
+    openings.add_argument('--top', type=int, default=20)
+    think = commands.add_parser('think-time', help="think time per ply")
+    think.add_argument('log')
+    games = commands.add_parser('games', help="print the finished games")
+    games.add_argument('log')
+    games.add_argument('-n', '--limit', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'openings':
+        print_openings(args.log, args.plies, args.min_games, args.top)
+    elif args.command == 'think-time':
+        print_think_time(args.log)
+    else:
+        print_games(args.log, args.limit)
+
+if __name__ == "__main__":
+    main()
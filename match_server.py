@@ -0,0 +1,461 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from connect_four import BitBoard
+
+# Line-delimited JSON over TCP or a Unix socket. Every request is one JSON object
+# on one line with an "op" and an optional "id" that is echoed in the reply:
+#   {"op": "new", "game": "connect4", "players": ["human", "minimax"], "depth": 4}
+#   {"op": "move", "game_id": 1, "move": 3}             (tic-tac-toe: [row, col])
+#   {"op": "state", "game_id": 1}
+#   {"op": "advance", "game_id": 1}                     (retry bot moves after an error)
+#   {"op": "close", "game_id": 1}
+#   {"op": "metrics"}
+# Players are "human" or an agent name from tournament.AGENTS. After "new" and
+# after every human move the server plays bot moves until a human is to move or
+# the game is over, so a game between two bots is played out by one "new".
+# Replies carry "ok" and either the game state or an "error".
+
+GAMES = ('connect4', 'tictactoe')
+
+def compute_move(game, moves, agent, depth, move_time, seed):
+    # Runs in a pool worker. Workers are stateless between requests apart from
+    # the cached engines, so any worker can serve any game.
+    import tournament
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    if game == 'connect4':
+        engine = tournament.get_engine('connect4', move_time)
+        bitboard = BitBoard()
+        for col in moves:
+            bitboard.play(col)
+        return tournament.CONNECT_FOUR_AGENTS[agent](engine, bitboard, bitboard.piece, depth)
+    engine = tournament.get_engine('tictactoe')
+    engine.board = [[None] * 3 for _ in range(3)]
+    for ply, cell in enumerate(moves):
+        engine.board[cell // 3][cell % 3] = 'X' if ply % 2 == 0 else 'O'
+    # Engine agents always move for 'O'
+    x_to_move = len(moves) % 2 == 0
+    if x_to_move:
+        tournament.swap_sides(engine.board)
+    row, col = tournament.TIC_TAC_TOE_AGENTS[agent](engine)
+    return row * 3 + col
+
+class Match:
+    def __init__(self, game_id, game, players, depth, move_time):
+        self.game_id = game_id
+        self.game = game
+        self.players = players
+        self.depth = depth
+        self.move_time = move_time
+        self.moves = []
+        self.winner = None  # 0 or 1, index into players
+        self.over = False
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        if game == 'connect4':
+            self.bitboard = BitBoard()
+        else:
+            self.cells = [None] * 9
+
+    @property
+    def turn(self):
+        return len(self.moves) % 2
+
+    def legal(self, move):
+        if self.game == 'connect4':
+            return is_int(move) and 0 <= move < BitBoard.COLUMN_COUNT and self.bitboard.can_play(move)
+        return is_int(move) and 0 <= move < 9 and self.cells[move] is None
+
+    def play(self, move):
+        turn = self.turn
+        self.moves.append(move)
+        if self.game == 'connect4':
+            self.bitboard.play(move)
+            if self.bitboard.winning_move(turn + 1):
+                self.winner, self.over = turn, True
+            elif self.bitboard.is_full():
+                self.over = True
+            return
+        self.cells[move] = 'XO'[turn]
+        side = self.cells[move]
+        for a, b, c in ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)):
+            if self.cells[a] == self.cells[b] == self.cells[c] == side:
+                self.winner, self.over = turn, True
+                return
+        if None not in self.cells:
+            self.over = True
+
+    def board(self):
+        if self.game == 'connect4':
+            # Rows top to bottom, '.' empty, '1'/'2' pieces
+            rows = self.bitboard.to_array()[::-1]
+            return [''.join('.12'[int(v)] for v in row) for row in rows]
+        return [''.join(cell or '.' for cell in self.cells[r * 3:r * 3 + 3]) for r in range(3)]
+
+    def state(self):
+        return {
+            'game_id': self.game_id,
+            'game': self.game,
+            'players': self.players,
+            'moves': self.moves,
+            'board': self.board(),
+            'to_move': None if self.over else self.turn,
+            'over': self.over,
+            'winner': self.winner,
+        }
+
+class Metrics:
+    # Counters plus a window of recent engine latencies for percentiles
+    def __init__(self, window=10000):
+        self.start = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.engine_moves = 0
+        self.games_started = 0
+        self.games_finished = 0
+        self.connections = 0
+        self.latencies = deque(maxlen=window)
+        self.queue_waits = deque(maxlen=window)
+
+    def snapshot(self, server):
+        elapsed = time.monotonic() - self.start
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        waits = np.array(self.queue_waits) if self.queue_waits else np.zeros(1)
+        return {
+            'uptime': elapsed,
+            'requests': self.requests,
+            'requests_per_second': self.requests / elapsed if elapsed else 0.0,
+            'engine_moves': self.engine_moves,
+            'engine_moves_per_second': self.engine_moves / elapsed if elapsed else 0.0,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'games_started': self.games_started,
+            'games_finished': self.games_finished,
+            'active_games': len(server.matches),
+            'connections': self.connections,
+            'in_flight': server.in_flight,
+            'engine_latency_ms': {
+                'mean': 1000 * float(latencies.mean()),
+                'p50': 1000 * float(np.percentile(latencies, 50)),
+                'p95': 1000 * float(np.percentile(latencies, 95)),
+                'p99': 1000 * float(np.percentile(latencies, 99)),
+            },
+            'queue_wait_ms': {
+                'p50': 1000 * float(np.percentile(waits, 50)),
+                'p95': 1000 * float(np.percentile(waits, 95)),
+            },
+        }
+
+class RequestError(Exception):
+    pass
+
+def is_int(value):
+    # JSON true/false arrive as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_number(value):
+    return is_int(value) or isinstance(value, float)
+
+class MatchServer:
+    # Hosts many games at once. Engine moves run in a bounded process pool:
+    # at most max_in_flight moves are submitted at a time, further requests wait
+    # for a slot (up to request_timeout) and are rejected with "busy" once
+    # max_waiting requests are already waiting. Each connection handles up to
+    # per_connection requests concurrently and stops reading beyond that, so a
+    # fast client is slowed down by TCP flow control rather than queued without bound.
+    # A move keeps its pool slot until its worker finishes, even after a timeout,
+    # so requests are limited to max_depth and to move times within request_timeout.
+    def __init__(self, workers=None, max_in_flight=None, max_waiting=1000, request_timeout=10.0,
+                 per_connection=16, max_games=10000, max_depth=10, idle_timeout=600.0, backlog=1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.max_waiting = max_waiting
+        self.request_timeout = request_timeout
+        self.per_connection = per_connection
+        self.max_games = max_games
+        self.max_depth = max_depth
+        self.idle_timeout = idle_timeout
+        self.backlog = backlog
+        self.pool = None
+        self.slots = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.matches = {}
+        self.ids = itertools.count(1)
+        self.metrics = Metrics()
+        self.server = None
+        self.connections = set()
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+        if unix_path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, unix_path, backlog=self.backlog)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port, backlog=self.backlog)
+        self.reaper = asyncio.ensure_future(self.reap_idle())
+        return self.server
+
+    async def close(self):
+        self.reaper.cancel()
+        self.server.close()
+        # Closing the sockets lets every connection handler see EOF and finish
+        handlers = list(self.connections)
+        for task, writer in handlers:
+            writer.close()
+        if handlers:
+            await asyncio.wait([task for task, _ in handlers], timeout=5.0)
+        await self.server.wait_closed()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def reap_idle(self):
+        # Abandoned games are dropped after idle_timeout seconds
+        while True:
+            await asyncio.sleep(min(60.0, self.idle_timeout))
+            cutoff = time.monotonic() - self.idle_timeout
+            for game_id in [g for g, m in self.matches.items() if m.last_used < cutoff and not m.lock.locked()]:
+                del self.matches[game_id]
+
+    async def handle_connection(self, reader, writer):
+        connection = (asyncio.current_task(), writer)
+        self.connections.add(connection)
+        self.metrics.connections += 1
+        write_lock = asyncio.Lock()
+        limit = asyncio.Semaphore(self.per_connection)
+        tasks = set()
+        try:
+            while True:
+                await limit.acquire()
+                line = await reader.readline()
+                if not line:
+                    limit.release()
+                    break
+                task = asyncio.ensure_future(self.serve_line(line, writer, write_lock, limit))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(connection)
+            self.metrics.connections -= 1
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve_line(self, line, writer, write_lock, limit):
+        try:
+            reply = await self.dispatch(line)
+            async with write_lock:
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            limit.release()
+
+    async def dispatch(self, line):
+        self.metrics.requests += 1
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise RequestError("invalid JSON")
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+            request_id = request.get('id')
+            handler = getattr(self, 'op_' + str(request.get('op')), None)
+            if handler is None:
+                raise RequestError("unknown op %r" % request.get('op'))
+            reply = await handler(request)
+            reply['ok'] = True
+        except RequestError as e:
+            self.metrics.errors += 1
+            reply = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # A bug must not cost the client its reply or the connection
+            self.metrics.errors += 1
+            reply = {'ok': False, 'error': "internal error: %s: %s" % (type(e).__name__, e)}
+        if request_id is not None:
+            reply['id'] = request_id
+        return reply
+
+    def match(self, request):
+        game_id = request.get('game_id')
+        if not is_int(game_id):
+            raise RequestError("game_id must be an integer")
+        match = self.matches.get(game_id)
+        if match is None:
+            raise RequestError("unknown game_id %r" % request.get('game_id'))
+        match.last_used = time.monotonic()
+        return match
+
+    async def op_new(self, request):
+        import tournament
+        game = request.get('game')
+        if game not in GAMES:
+            raise RequestError("game must be one of %s" % ', '.join(GAMES))
+        players = request.get('players', ['human', 'minimax'])
+        if not isinstance(players, list) or len(players) != 2:
+            raise RequestError("players must be a list of two names")
+        for name in players:
+            if name != 'human' and name not in tournament.AGENTS[game]:
+                raise RequestError("unknown %s agent %r" % (game, name))
+        if len(self.matches) >= self.max_games:
+            raise RequestError("too many games")
+        depth = request.get('depth', 4)
+        if not is_int(depth) or not 1 <= depth <= self.max_depth:
+            raise RequestError("depth must be an integer from 1 to %d" % self.max_depth)
+        move_time = request.get('move_time')
+        if move_time is not None and (not is_number(move_time) or not 0 < move_time <= self.request_timeout):
+            raise RequestError("move_time must be a number of seconds up to %g" % self.request_timeout)
+        match = Match(next(self.ids), game, players, depth, None if move_time is None else float(move_time))
+        self.matches[match.game_id] = match
+        self.metrics.games_started += 1
+        async with match.lock:
+            await self.play_bots(match)
+            return {'state': match.state()}
+
+    async def op_move(self, request):
+        match = self.match(request)
+        async with match.lock:
+            if match.over:
+                raise RequestError("game is over")
+            if match.players[match.turn] != 'human':
+                raise RequestError("it is a bot's turn")
+            move = request.get('move')
+            if match.game == 'tictactoe' and isinstance(move, list) and len(move) == 2 and all(is_int(v) for v in move):
+                move = move[0] * 3 + move[1]
+            if not match.legal(move):
+                raise RequestError("illegal move %r" % (request.get('move'),))
+            match.play(move)
+            self.finished(match)
+            await self.play_bots(match)
+            return {'state': match.state()}
+
+    async def op_advance(self, request):
+        match = self.match(request)
+        async with match.lock:
+            await self.play_bots(match)
+            return {'state': match.state()}
+
+    async def op_state(self, request):
+        return {'state': self.match(request).state()}
+
+    async def op_close(self, request):
+        match = self.match(request)
+        del self.matches[match.game_id]
+        return {'game_id': match.game_id}
+
+    async def op_metrics(self, request):
+        return {'metrics': self.metrics.snapshot(self)}
+
+    def finished(self, match):
+        if match.over:
+            self.metrics.games_finished += 1
+
+    async def play_bots(self, match):
+        while not match.over and match.players[match.turn] != 'human':
+            move = await self.engine_move(match)
+            if not match.legal(move):
+                raise RequestError("engine returned illegal move %r" % (move,))
+            match.play(move)
+            self.finished(match)
+
+    async def engine_move(self, match):
+        # Backpressure: wait for a pool slot, or give up if too many are already waiting
+        if self.waiting >= self.max_waiting:
+            self.metrics.rejected += 1
+            raise RequestError("busy")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise RequestError("timeout waiting for an engine")
+        finally:
+            self.waiting -= 1
+        self.metrics.queue_waits.append(time.perf_counter() - queued)
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            future = loop.run_in_executor(self.pool, compute_move, match.game, list(match.moves),
+                                          match.players[match.turn], match.depth, match.move_time, random.getrandbits(32))
+        except Exception:
+            self.engine_done(None)
+            raise
+        # A timed-out move still finishes in its worker and keeps its slot until
+        # then, so no more moves are submitted than the pool can run
+        future.add_done_callback(self.engine_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise RequestError("engine timeout")
+        except Exception as e:
+            raise RequestError("engine failed: %s: %s" % (type(e).__name__, e))
+        finally:
+            self.metrics.engine_moves += 1
+            self.metrics.latencies.append(time.perf_counter() - start)
+
+    def engine_done(self, future):
+        self.in_flight -= 1
+        self.slots.release()
+        if future is not None and not future.cancelled():
+            # Marks the error of an abandoned move as retrieved
+            future.exception()
+
+async def serve(args):
+    server = MatchServer(args.workers, args.max_in_flight, args.max_waiting, args.timeout, args.per_connection, args.max_games,
+                         args.max_depth)
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix or "%s:%d" % (args.host, args.port)
+    print("serving on %s with %d engine workers" % (where, server.workers), file=sys.stderr, flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.metrics_interval or 3600)
+            if args.metrics_interval:
+                print(json.dumps(server.metrics.snapshot(server)), file=sys.stderr, flush=True)
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve tic-tac-toe and Connect Four games over line-delimited JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="engine processes (default: all cores)")
+    parser.add_argument('--max-in-flight', type=int, default=None, help="engine moves submitted at once (default: 2 per worker)")
+    parser.add_argument('--max-waiting', type=int, default=1000, help="engine moves waiting for a slot before requests are rejected")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds per engine move, including the wait for a slot")
+    parser.add_argument('--per-connection', type=int, default=16, help="requests handled concurrently per connection")
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--max-depth', type=int, default=10, help="deepest Connect Four search a game may ask for")
+    parser.add_argument('--metrics-interval', type=float, default=None, help="print metrics to stderr every N seconds")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from connect_four import BitBoard
+
+WIDTH = BitBoard.COLUMN_COUNT
+HEIGHT = BitBoard.ROW_COUNT
+H1 = BitBoard.H1
+CELLS = WIDTH * HEIGHT
+
+BOTTOM_MASK = 0
+for _col in range(WIDTH):
+    BOTTOM_MASK |= 1 << (_col * H1)
+del _col
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+COLUMN_MASKS = [((1 << HEIGHT) - 1) << (col * H1) for col in range(WIDTH)]
+
+# The same masks as numpy scalars, for the batched playouts over uint64 bitboards
+U_BOTTOM = np.uint64(BOTTOM_MASK)
+U_BOARD = np.uint64(BOARD_MASK)
+U_COLUMNS = np.array(COLUMN_MASKS, dtype=np.uint64)
+U_ONE = np.uint64(1)
+U_SHIFTS = [(np.uint64(s), np.uint64(2 * s), np.uint64(3 * s)) for s in (H1, H1 - 1, H1 + 1)]
+U_1, U_2, U_3 = np.uint64(1), np.uint64(2), np.uint64(3)
+
+def winning_cells(position, mask):
+    # Empty cells that complete four in a row for the stones in position, for
+    # arrays of uint64 bitboards (the numpy form of connect_four_solver.winning_cells)
+    r = (position << U_1) & (position << U_2) & (position << U_3)
+    for s1, s2, s3 in U_SHIFTS:
+        p = (position << s1) & (position << s2)
+        r |= p & (position << s3)
+        r |= p & (position >> s1)
+        p = (position >> s1) & (position >> s2)
+        r |= p & (position << s1)
+        r |= p & (position >> s3)
+    return r & (U_BOARD ^ mask)
+
+def playouts(position, mask, piece, random=np.random.random):
+    # Plays every board of the batch to the end with the policy of
+    # ConnectFour.get_best_move: win if possible, else block the opponent's
+    # immediate win, else a random column. One numpy step moves every unfinished
+    # board, so a batch costs at most 42 steps however many boards it holds.
+    #
+    # position and mask are uint64 arrays (stones of the side to move, all
+    # stones) and piece the side to move of each board. Returns (winner, stones
+    # of piece 1, stones of piece 2) with winner 0 for a draw.
+    position = position.copy()
+    mask = mask.copy()
+    piece = piece.astype(np.int8)
+    count = len(position)
+    winner = np.zeros(count, dtype=np.int8)
+    active = np.arange(count)
+    while len(active):
+        pos = position[active]
+        msk = mask[active]
+        possible = (msk + U_BOTTOM) & U_BOARD
+        wins = (winning_cells(pos, msk) & possible) != 0
+        if wins.any():
+            won = active[wins]
+            winner[won] = piece[won]
+            # Add the winning stone (the lowest winning cell) to the final position
+            cells = winning_cells(pos[wins], msk[wins]) & possible[wins]
+            stone = cells & (~cells + U_ONE)
+            position[won] = pos[wins] | stone
+            mask[won] = msk[wins] | stone
+        going = ~wins & (possible != 0)
+        active = active[going]
+        if not len(active):
+            break
+        pos = pos[going]
+        msk = msk[going]
+        possible = possible[going]
+        threats = winning_cells(pos ^ msk, msk) & possible
+        playable = (possible[:, None] & U_COLUMNS) != 0
+        col = np.argmax(random(playable.shape) * playable, axis=1)
+        move = np.where(threats != 0, threats & (~threats + U_ONE), possible & U_COLUMNS[col])
+        mask[active] = msk | move
+        position[active] = pos ^ msk
+        piece[active] = 3 - piece[active]
+    # position holds the side to move's stones
+    own = position
+    other = position ^ mask
+    first = np.where(piece == 1, own, other)
+    second = np.where(piece == 1, other, own)
+    return winner, first, second
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'position', 'mask', 'piece', 'cell',
+                 'visits', 'wins', 'amaf_visits', 'amaf_wins', 'winner')
+
+    def __init__(self, move, parent, position, mask, piece, cell=0, winner=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.position = position  # stones of the side to move
+        self.mask = mask
+        self.piece = piece  # side to move
+        self.cell = cell  # bit of the stone that led here
+        self.visits = 0
+        # Wins of the player who made self.move (draws count half)
+        self.wins = 0.0
+        self.amaf_visits = 0
+        self.amaf_wins = 0.0
+        # None while the game goes on, else the winning piece or 0 for a draw
+        self.winner = winner
+        if winner is None:
+            possible = (mask + BOTTOM_MASK) & BOARD_MASK
+            self.untried = [col for col in BitBoard.COLUMN_ORDER if possible & COLUMN_MASKS[col]]
+        else:
+            self.untried = []
+
+    def key(self):
+        return self.position, self.mask, self.piece
+
+    def expand(self):
+        col = self.untried.pop(0)
+        move = ((self.mask + BOTTOM_MASK) & BOARD_MASK) & COLUMN_MASKS[col]
+        stones = self.position | move
+        mask = self.mask | move
+        winner = None
+        if BitBoard.alignment(stones):
+            winner = self.piece
+        elif mask == BOARD_MASK:
+            winner = 0
+        child = Node(col, self, stones ^ mask, mask, 3 - self.piece, move, winner)
+        self.children.append(child)
+        return child
+
+    def size(self):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+class MCTS:
+    # Monte Carlo tree search for Connect Four: UCT selection, optionally
+    # blended with RAVE (all-moves-as-first) statistics, over playouts that run
+    # in numpy batches. Every step selects `leaves` leaves, using virtual loss
+    # so they differ, and plays `playouts_per_leaf` playouts from each in one
+    # call to playouts().
+    #
+    # The budget is move_time seconds, or a number of playouts per move if
+    # playouts is given. The tree is kept after a move; the next search starts
+    # from the node of the position it is given if that is in the tree (the
+    # opponent's reply to our last move, say), so earlier playouts are reused.
+    # max_nodes caps the tree size, beyond which leaves are simulated without
+    # expanding.
+    def __init__(self, move_time=1.0, playouts=None, exploration=1.4, rave=False, rave_equivalence=300,
+                 leaves=32, playouts_per_leaf=8, max_nodes=500000):
+        self.move_time = move_time
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rave = rave
+        self.rave_equivalence = rave_equivalence
+        self.leaves = leaves
+        self.playouts_per_leaf = playouts_per_leaf
+        self.max_nodes = max_nodes
+        self.root = None
+        self.nodes = 0
+        self.last = None
+
+    def find_root(self, board):
+        # Node for board within two moves of the kept root, detached from its parent
+        key = (board.position, board.mask, board.piece)
+        if self.root is not None:
+            frontier = [self.root]
+            for _ in range(3):
+                for node in frontier:
+                    if node.key() == key:
+                        node.parent = None
+                        return node, True
+                frontier = [child for node in frontier for child in node.children]
+        return Node(None, None, board.position, board.mask, board.piece), False
+
+    def select(self, node):
+        # UCT (with RAVE if enabled) down to a node to simulate from
+        log = math.log
+        sqrt = math.sqrt
+        c = self.exploration
+        while node.winner is None:
+            if node.untried and self.nodes < self.max_nodes:
+                self.nodes += 1
+                return node.expand()
+            if not node.children:
+                return node
+            parent_log = log(node.visits or 1)
+            best, best_value = None, -math.inf
+            for child in node.children:
+                if child.visits == 0:
+                    return child
+                value = child.wins / child.visits
+                if self.rave and child.amaf_visits:
+                    beta = sqrt(self.rave_equivalence / (3 * child.visits + self.rave_equivalence))
+                    value = (1 - beta) * value + beta * child.amaf_wins / child.amaf_visits
+                value += c * sqrt(parent_log / child.visits)
+                if value > best_value:
+                    best, best_value = child, value
+            node = best
+        return node
+
+    def search(self, board):
+        # Returns {'column', 'value' (win rate of the move for the side to move),
+        # 'playouts', 'seconds', 'playouts_per_second', 'nodes', 'reused'}
+        start = time.perf_counter()
+        root, reused = self.find_root(board)
+        self.root = root
+        self.nodes = root.size() if reused else 1
+        reused_playouts = root.visits
+        budget = self.playouts
+        deadline = start + self.move_time if budget is None else math.inf
+        per_leaf = self.playouts_per_leaf
+        done = 0
+        if root.winner is None:
+            while (budget is None or done < budget) and time.perf_counter() < deadline:
+                batch = []
+                for _ in range(self.leaves):
+                    leaf = self.select(root)
+                    # Virtual loss: count the visits now, the wins once the playouts are back
+                    node = leaf
+                    while node is not None:
+                        node.visits += per_leaf
+                        node = node.parent
+                    batch.append(leaf)
+                self.simulate(batch)
+                done += len(batch) * per_leaf
+        seconds = time.perf_counter() - start
+        best = max(root.children, key=lambda child: child.visits) if root.children else None
+        if best is None:
+            column = board.ordered_columns()[0] if board.valid_columns() else None
+            value = None
+        else:
+            column = best.move
+            value = best.wins / best.visits if best.visits else None
+        self.last = {
+            'column': column,
+            'value': value,
+            'playouts': done,
+            'seconds': seconds,
+            'playouts_per_second': done / seconds if seconds > 0 else 0.0,
+            'nodes': self.nodes,
+            'reused': reused_playouts,
+        }
+        return self.last
+
+    def simulate(self, batch):
+        per_leaf = self.playouts_per_leaf
+        open_leaves = [leaf for leaf in batch if leaf.winner is None]
+        results = {}
+        if open_leaves:
+            position = np.repeat(np.array([leaf.position for leaf in open_leaves], dtype=np.uint64), per_leaf)
+            mask = np.repeat(np.array([leaf.mask for leaf in open_leaves], dtype=np.uint64), per_leaf)
+            piece = np.repeat(np.array([leaf.piece for leaf in open_leaves], dtype=np.int8), per_leaf)
+            winner, first, second = playouts(position, mask, piece)
+            winner = winner.tolist()
+            if self.rave:
+                first = first.tolist()
+                second = second.tolist()
+            for i, leaf in enumerate(open_leaves):
+                outcomes = winner[i * per_leaf:(i + 1) * per_leaf]
+                results[id(leaf)] = (outcomes.count(1), outcomes.count(2), outcomes.count(0))
+                if self.rave:
+                    for j in range(i * per_leaf, (i + 1) * per_leaf):
+                        self.update_amaf(leaf, winner[j], (None, first[j], second[j]))
+        for leaf in batch:
+            if leaf.winner is None:
+                wins_1, wins_2, draws = results[id(leaf)]
+            else:
+                wins_1 = per_leaf if leaf.winner == 1 else 0
+                wins_2 = per_leaf if leaf.winner == 2 else 0
+                draws = per_leaf if leaf.winner == 0 else 0
+            node = leaf
+            while node is not None:
+                # node.wins counts for the player who moved into node
+                mover = 3 - node.piece
+                node.wins += (wins_1 if mover == 1 else wins_2) + 0.5 * draws
+                node = node.parent
+
+    def update_amaf(self, leaf, winner, stones):
+        # All-moves-as-first: a child of a node on the path gets credit for every
+        # playout in which its player put a stone on its cell anywhere later on
+        node = leaf.parent
+        while node is not None:
+            mover = node.piece
+            own = node.position
+            later = stones[mover] & ~own
+            reward = 1.0 if winner == mover else 0.5 if winner == 0 else 0.0
+            for child in node.children:
+                if later & child.cell:
+                    child.amaf_visits += 1
+                    child.amaf_wins += reward
+            node = node.parent
+
+    def best_move(self, board):
+        column = self.search(board)['column']
+        # Keep the subtree of our move for the next search
+        for child in self.root.children:
+            if child.move == column:
+                child.parent = None
+                self.root = child
+                break
+        return column
+
+    def reset(self):
+        self.root = None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Connect Four MCTS search and report playouts per second.")
+    parser.add_argument('moves', nargs='?', default='', help="columns played from the empty board")
+    parser.add_argument('--move-time', type=float, default=1.0)
+    parser.add_argument('--playouts', type=int, default=None, help="playouts per move instead of a time budget")
+    parser.add_argument('--rave', action='store_true')
+    parser.add_argument('--leaves', type=int, default=32, help="leaves simulated per batch")
+    parser.add_argument('--per-leaf', type=int, default=8, help="playouts per leaf")
+    args = parser.parse_args(argv)
+
+    board = BitBoard()
+    for col in args.moves:
+        board.play(int(col))
+    engine = MCTS(args.move_time, args.playouts, rave=args.rave, leaves=args.leaves, playouts_per_leaf=args.per_leaf)
+    result = engine.search(board)
+    print("column %s  win rate %.3f  %d playouts in %.2fs (%.0f playouts/s)  %d nodes" % (
+        result['column'], result['value'] or 0.0, result['playouts'], result['seconds'], result['playouts_per_second'], result['nodes']))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from tic_tac_toe import TicTacToe
+
+def build_lines(rows, cols, k):
+    # Every run of k cells in the four directions, as tuples of cell indices (row * cols + col)
+    lines = []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for r in range(rows):
+            for c in range(cols):
+                end_r, end_c = r + (k - 1) * dr, c + (k - 1) * dc
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    lines.append(tuple((r + i * dr) * cols + c + i * dc for i in range(k)))
+    return lines
+
+def line_scores(k):
+    # LINE_SCORE[own][opponent] for a run of k cells, generalizing
+    # IncrementalEvaluator.WINDOW_SCORE (k = 4 gives exactly its weights)
+    table = [[0] * (k + 1) for _ in range(k + 1)]
+    for own in range(k + 1):
+        for opp in range(k + 1 - own):
+            empty = k - own - opp
+            if own == k:
+                table[own][opp] += 100
+            elif own == k - 1 and empty == 1:
+                table[own][opp] += 5
+            elif own == k - 2 and empty == 2:
+                table[own][opp] += 2
+            if opp == k - 1 and empty == 1:
+                table[own][opp] -= 4
+    return table
+
+class MNKBoard:
+    # An m,n,k game: `rows` x `cols` cells, k in a row wins. With gravity=True a
+    # move is a column and stones drop like in Connect Four, otherwise a move is
+    # a cell index row * cols + col (row 0 is the bottom row with gravity).
+    #
+    # Implements the part of the BitBoard interface that ConnectFour.minimax, pvs
+    # and iterative_deepening use (play/undo, piece, moves, hash, winning_move,
+    # ordered_columns, evaluator.scores), so the Connect Four search runs on any
+    # board size. Every line of k cells keeps a stone count per piece, updated
+    # on each move for the lines through the placed stone only. A win is a line
+    # whose count reaches k, so detecting one never rescans the board, and the
+    # evaluation (the same window weights as IncrementalEvaluator, over k-cell
+    # lines) is kept up to date from the same counts.
+    #
+    # radius limits the moves searched on boards without gravity to empty cells
+    # within that many cells of a stone, which keeps large boards (15x15, k=5)
+    # searchable; None searches every empty cell.
+    _zobrist = {}
+
+    def __init__(self, rows=6, cols=7, k=4, gravity=True, radius=None, piece=1):
+        if k > max(rows, cols):
+            raise ValueError("k=%d does not fit on a %dx%d board" % (k, rows, cols))
+        self.ROW_COUNT = rows
+        self.COLUMN_COUNT = cols
+        self.k = k
+        self.gravity = gravity
+        self.radius = radius
+        self.cells = [0] * (rows * cols)
+        self.heights = [0] * cols
+        self.moves = 0
+        self.piece = piece
+        self.lines = build_lines(rows, cols, k)
+        self.cell_lines = [[] for _ in range(rows * cols)]
+        for i, line in enumerate(self.lines):
+            for cell in line:
+                self.cell_lines[cell].append(i)
+        self.line_score = line_scores(k)
+        self.counts = [None, [0] * len(self.lines), [0] * len(self.lines)]
+        # Lines holding k stones of a piece, so winning_move is a lookup
+        self.complete = [None, 0, 0]
+        self.scores = [None, 0, 0]
+        # BitBoard keeps an optional IncrementalEvaluator here; the counts above
+        # are always kept, so the board is its own evaluator
+        self.evaluator = self
+        self.center_bonus = [0] * (rows * cols)
+        centre = (cols - 1) / 2
+        if gravity:
+            # Like ConnectFour.evaluate_board: 3 per stone in the centre column
+            for r in range(rows):
+                self.center_bonus[r * cols + cols // 2] = 3
+            self.move_order = sorted(range(cols), key=lambda c: (abs(c - centre), c))
+        else:
+            middle = (rows - 1) / 2
+            self.move_order = sorted(range(rows * cols), key=lambda i: (max(abs(i // cols - middle), abs(i % cols - centre)),
+                                                                        abs(i // cols - middle) + abs(i % cols - centre), i))
+        self.neighbours = None
+        if radius is not None and not gravity:
+            # Stones within radius of each cell, kept up to date like the line counts
+            self.near = [0] * (rows * cols)
+            self.neighbours = []
+            for i in range(rows * cols):
+                r, c = divmod(i, cols)
+                self.neighbours.append([rr * cols + cc for rr in range(max(0, r - radius), min(rows, r + radius + 1))
+                                        for cc in range(max(0, c - radius), min(cols, c + radius + 1)) if (rr, cc) != (r, c)])
+        key = (rows, cols)
+        if key not in self._zobrist:
+            # Fixed seed so hashes are stable across processes and runs, like BitBoard.ZOBRIST
+            rng = random.Random(0x3A7C ^ (rows << 16) ^ cols)
+            self._zobrist[key] = ([None] + [[rng.getrandbits(64) for _ in range(rows * cols)] for _ in (1, 2)], rng.getrandbits(64))
+        self.zobrist, self.zobrist_side = self._zobrist[key]
+        self.hash = self.zobrist_side if piece == 2 else 0
+
+    def copy(self):
+        board = MNKBoard(self.ROW_COUNT, self.COLUMN_COUNT, self.k, self.gravity, self.radius, self.piece)
+        for cell, piece in self.history():
+            board.place(cell, piece)
+        board.piece = self.piece
+        board.hash = self.hash
+        return board
+
+    def history(self):
+        # (cell, piece) of every stone, bottom-up within a column so gravity holds on replay
+        return [(i, p) for i, p in sorted(enumerate(self.cells), key=lambda item: (item[0] % self.COLUMN_COUNT, item[0])) if p]
+
+    def attach_evaluator(self):
+        return self
+
+    def score(self, piece):
+        return self.scores[piece]
+
+    def place(self, cell, piece):
+        # Puts a stone on an empty cell without changing the side to move
+        self.cells[cell] = piece
+        self.moves += 1
+        if self.gravity:
+            self.heights[cell % self.COLUMN_COUNT] += 1
+        own = self.counts[piece]
+        other = self.counts[3 - piece]
+        table = self.line_score
+        k = self.k
+        own_delta = self.center_bonus[cell]
+        other_delta = 0
+        for w in self.cell_lines[cell]:
+            n = own[w]
+            m = other[w]
+            own_delta += table[n + 1][m] - table[n][m]
+            other_delta += table[m][n + 1] - table[m][n]
+            own[w] = n + 1
+            if n + 1 == k:
+                self.complete[piece] += 1
+        self.scores[piece] += own_delta
+        self.scores[3 - piece] += other_delta
+        if self.neighbours is not None:
+            near = self.near
+            for i in self.neighbours[cell]:
+                near[i] += 1
+
+    def remove(self, cell, piece):
+        self.cells[cell] = 0
+        self.moves -= 1
+        if self.gravity:
+            self.heights[cell % self.COLUMN_COUNT] -= 1
+        own = self.counts[piece]
+        other = self.counts[3 - piece]
+        table = self.line_score
+        k = self.k
+        own_delta = self.center_bonus[cell]
+        other_delta = 0
+        for w in self.cell_lines[cell]:
+            n = own[w] - 1
+            m = other[w]
+            own_delta += table[n + 1][m] - table[n][m]
+            other_delta += table[m][n + 1] - table[m][n]
+            own[w] = n
+            if n + 1 == k:
+                self.complete[piece] -= 1
+        self.scores[piece] -= own_delta
+        self.scores[3 - piece] -= other_delta
+        if self.neighbours is not None:
+            near = self.near
+            for i in self.neighbours[cell]:
+                near[i] -= 1
+
+    def cell_of(self, move):
+        if self.gravity:
+            return self.heights[move] * self.COLUMN_COUNT + move
+        return move
+
+    def play(self, move):
+        cell = self.cell_of(move)
+        self.place(cell, self.piece)
+        self.hash ^= self.zobrist[self.piece][cell] ^ self.zobrist_side
+        self.piece = 3 - self.piece
+
+    def undo(self, move):
+        self.piece = 3 - self.piece
+        cell = (self.heights[move] - 1) * self.COLUMN_COUNT + move if self.gravity else move
+        self.remove(cell, self.piece)
+        self.hash ^= self.zobrist[self.piece][cell] ^ self.zobrist_side
+
+    def can_play(self, move):
+        if self.gravity:
+            return self.heights[move] < self.ROW_COUNT
+        return self.cells[move] == 0
+
+    def valid_columns(self):
+        if self.gravity:
+            return [col for col in range(self.COLUMN_COUNT) if self.heights[col] < self.ROW_COUNT]
+        return [cell for cell in range(len(self.cells)) if self.cells[cell] == 0]
+
+    def ordered_columns(self):
+        # Legal moves, centre first; with a radius only cells next to stones
+        if self.gravity:
+            return [col for col in self.move_order if self.heights[col] < self.ROW_COUNT]
+        cells = self.cells
+        if self.neighbours is not None and self.moves:
+            near = self.near
+            return [cell for cell in self.move_order if cells[cell] == 0 and near[cell]]
+        return [cell for cell in self.move_order if cells[cell] == 0]
+
+    def is_full(self):
+        return self.moves == len(self.cells)
+
+    def winning_move(self, piece):
+        return self.complete[piece] > 0
+
+    def is_winning_col(self, move, piece):
+        # True if piece playing move would complete k in a row
+        cell = self.cell_of(move)
+        own = self.counts[piece]
+        other = self.counts[3 - piece]
+        k = self.k - 1
+        return any(own[w] == k and not other[w] for w in self.cell_lines[cell])
+
+    def to_array(self):
+        return np.array(self.cells, dtype=float).reshape(self.ROW_COUNT, self.COLUMN_COUNT)
+
+    def __str__(self):
+        symbols = '.XO'
+        rows = [''.join(symbols[self.cells[r * self.COLUMN_COUNT + c]] for c in range(self.COLUMN_COUNT)) for r in range(self.ROW_COUNT)]
+        if self.gravity:
+            rows.reverse()
+        return '\n'.join(rows)
+
+class MNKRow(list):
+    # A row of MNKTicTacToe.board that keeps the MNKBoard in step with every
+    # assignment, so code written against TicTacToe.board works unchanged
+    def __init__(self, engine, row, cells):
+        super().__init__(cells)
+        self.engine = engine
+        self.offset = row * engine.COLUMN_COUNT
+
+    def __setitem__(self, col, value):
+        old = self[col]
+        if old == value:
+            return
+        if old is not None:
+            self.engine.remove(self.offset + col, MNKTicTacToe.PIECES[old])
+        if value is not None:
+            self.engine.place(self.offset + col, MNKTicTacToe.PIECES[value])
+        super().__setitem__(col, value)
+
+class MNKTicTacToe(TicTacToe):
+    # TicTacToe on an m,n,k board: minimax_alpha_beta, q_learning and ai_move run
+    # unchanged, while check_win and check_draw become lookups on the line counts
+    # instead of scans of the board
+    PIECES = {'X': 1, 'O': 2}
+
+    def __init__(self, rows=3, cols=3, k=3):
+        super().__init__()
+        self.BOARD_ROWS = rows
+        self.BOARD_COLS = cols
+        self.engine = MNKBoard(rows, cols, k, gravity=False)
+        self.board = [MNKRow(self.engine, r, [None] * cols) for r in range(rows)]
+
+    def check_win(self, player):
+        return self.engine.complete[self.PIECES[player]] > 0
+
+    def check_draw(self):
+        engine = self.engine
+        return engine.is_full() and not engine.complete[1] and not engine.complete[2]
+
+def self_play(rows, cols, k, gravity, depth, radius, tt_size_mb=16):
+    # One engine-vs-engine game with ConnectFour.minimax at a fixed depth;
+    # returns (winning piece or None, board, seconds per move)
+    from connect_four import ConnectFour
+    engine = ConnectFour(tt_size_mb)
+    board = MNKBoard(rows, cols, k, gravity, radius)
+    times = []
+    while not board.is_full():
+        start = time.perf_counter()
+        move, _ = engine.minimax(board, depth, board.piece == 2, -math.inf, math.inf)
+        times.append(time.perf_counter() - start)
+        piece = board.piece
+        board.play(move)
+        if board.winning_move(piece):
+            return piece, board, times
+    return None, board, times
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the Connect Four search against itself on an m,n,k board.")
+    parser.add_argument('--rows', type=int, default=15)
+    parser.add_argument('--cols', type=int, default=15)
+    parser.add_argument('-k', type=int, default=5, help="stones in a row to win")
+    parser.add_argument('--gravity', action='store_true', help="stones drop to the lowest empty cell of a column")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--radius', type=int, default=1, help="without gravity, only search cells this close to a stone")
+    args = parser.parse_args(argv)
+
+    winner, board, times = self_play(args.rows, args.cols, args.k, args.gravity, args.depth, args.radius)
+    print(board)
+    print("%s after %d moves, %.3fs per move (max %.3fs)" % (
+        'draw' if winner is None else 'XO'[winner - 1] + ' wins', board.moves, sum(times) / len(times), max(times)))
+
+if __name__ == "__main__":
+    main()
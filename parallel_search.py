@@ -0,0 +1,137 @@
+import math
+import multiprocessing
+
+from connect_four import BitBoard, ConnectFour
+
+# Worker process state, set up once by init_worker
+_ENGINE = None
+_ALPHA = None
+_SEARCH_ID = None
+
+def init_worker(alpha, tt_size_mb):
+    global _ENGINE, _ALPHA
+    _ENGINE = ConnectFour(tt_size_mb)
+    _ALPHA = alpha
+
+def board_state(board):
+    return board.position, board.mask, board.heights[:], board.moves, board.piece, board.hash
+
+def board_from_state(state):
+    board = BitBoard()
+    board.position, board.mask, board.heights, board.moves, board.piece, board.hash = state
+    board.attach_evaluator()
+    return board
+
+def as_piece_two(board):
+    # The same position with the colours swapped, so piece 2 is to move
+    array = board.to_array()
+    stones = array > 0
+    array[stones] = 3 - array[stones]
+    return BitBoard.from_array(array, 2)
+
+def raise_alpha(alpha, value):
+    with alpha.get_lock():
+        if value > alpha.value:
+            alpha.value = value
+
+def search_root_move(engine, board, col, depth, alpha):
+    # Searches the minimizing node after col, re-reading the shared alpha before
+    # every reply so bounds found by other workers cut this subtree too.
+    # Scores are integers, so a window of (alpha - 1, inf) still returns the exact
+    # score of a move that ties the best one, which keeps ties resolved as in the
+    # serial search. Returns (score, exact).
+    board.play(col)
+    try:
+        # Scored as ConnectFour.minimax scores the child it reaches with depth - 1 left
+        if board.winning_move(2):
+            return engine.terminal_value_for(2, depth - 1), True
+        if board.is_full():
+            return 0, True
+        if depth == 1:
+            return board.evaluator.scores[2], True
+        replies = board.ordered_columns()
+        value = math.inf
+        floor = -math.inf
+        for reply in replies:
+            floor = alpha.value - 1
+            if value <= floor:
+                return value, False
+            board.play(reply)
+            score = engine.minimax(board, depth - 2, True, floor, value)[1]
+            board.undo(reply)
+            if score < value:
+                value = score
+        return value, value > floor
+    finally:
+        board.undo(col)
+
+def search_task(task):
+    global _SEARCH_ID
+    search_id, state, col, depth = task
+    if search_id != _SEARCH_ID:
+        # Entries from an earlier search can cut this one at different bounds
+        # and change its result, so every search starts from an empty table
+        _SEARCH_ID = search_id
+        if _ENGINE.tt is not None:
+            _ENGINE.tt.clear()
+    score, exact = search_root_move(_ENGINE, board_from_state(state), col, depth, _ALPHA)
+    if exact:
+        raise_alpha(_ALPHA, score)
+    return col, score, exact
+
+class ParallelSearch:
+    # Root-splitting search for ConnectFour.minimax with the root as the maximizing
+    # player (piece 2), as play() calls it. A BitBoard with piece 1 to move is
+    # searched with the colours swapped, so the score is always from the side to
+    # move's view. The first root move is searched in this process to establish
+    # a bound, then the remaining moves go to the pool. Every search starts from
+    # empty transposition tables, so its result matches a serial minimax from a
+    # fresh table.
+    def __init__(self, engine=None, workers=None, tt_size_mb=16):
+        self.engine = engine if engine is not None else ConnectFour(tt_size_mb)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.alpha = multiprocessing.Value('d', -math.inf)
+        self.search_id = 0
+        self.pool = multiprocessing.Pool(self.workers, initializer=init_worker, initargs=(self.alpha, tt_size_mb))
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, board, depth):
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_array(board, 2)
+        elif board.piece == 1:
+            board = as_piece_two(board)
+        board = board.copy()
+        if board.evaluator is None:
+            board.attach_evaluator()
+        if self.engine.tt is not None:
+            self.engine.tt.clear()
+        columns = board.ordered_columns()
+        if depth < 2 or len(columns) < 2:
+            return self.engine.minimax(board, depth, True, -math.inf, math.inf)
+
+        self.alpha.value = -math.inf
+        first_score, _ = search_root_move(self.engine, board, columns[0], depth, self.alpha)
+        raise_alpha(self.alpha, first_score)
+        scores = {columns[0]: first_score}
+        exact = {columns[0]: True}
+
+        self.search_id += 1
+        state = board_state(board)
+        tasks = [(self.search_id, state, col, depth) for col in columns[1:]]
+        for col, score, is_exact in self.pool.imap_unordered(search_task, tasks):
+            scores[col] = score
+            exact[col] = is_exact
+
+        best = max(scores[col] for col in columns if exact[col])
+        for col in columns:
+            if exact[col] and scores[col] == best:
+                return col, int(best)
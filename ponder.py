@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+
+from connect_four import SearchTimeout
+from tic_tac_toe import TicTacToe
+
+class PonderCancelled(Exception):
+    pass
+
+class Ponderer:
+    # Searches on the opponent's time. After the engine moves, start(board)
+    # runs a background thread over the positions after the opponent's replies
+    # and stores the results in `cache`. When the engine is to move again,
+    # stop() cancels the thread, and a position that was already pondered is
+    # answered from the cache without searching.
+    #
+    # The thread only runs between start() and stop(), so it never searches at
+    # the same time as the game loop. The cache keeps at most max_entries
+    # positions, dropping the oldest first. Subclasses provide run(board), the
+    # search done in the thread.
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.cache = {}
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.pondered = 0
+        self.ponder_seconds = 0.0
+
+    def store(self, key, value):
+        cache = self.cache
+        cache.pop(key, None)
+        cache[key] = value
+        while len(cache) > self.max_entries:
+            del cache[next(iter(cache))]
+
+    def start(self, board):
+        self.stop()
+        self.cancelled.clear()
+        self.prepare()
+        self.thread = threading.Thread(target=self.timed_run, args=(board,), daemon=True)
+        self.thread.start()
+
+    def timed_run(self, board):
+        start = time.perf_counter()
+        try:
+            self.run(board)
+        except PonderCancelled:
+            pass
+        finally:
+            self.ponder_seconds += time.perf_counter() - start
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.cancelled.set()
+        self.interrupt()
+        self.thread.join()
+        self.thread = None
+
+    def prepare(self):
+        # Called in the caller's thread before the background thread starts
+        pass
+
+    def interrupt(self):
+        # Makes a search in progress give up quickly
+        pass
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'pondered': self.pondered,
+                'ponder_seconds': self.ponder_seconds, 'cached': len(self.cache)}
+
+class ConnectFourPonderer(Ponderer):
+    # Pondering for ConnectFour.iterative_deepening. The thread deepens one ply at
+    # a time over the opponent's replies: only the reply the transposition table
+    # predicts with replies='predicted', or every reply (predicted one first)
+    # with replies='all'. It searches with the engine itself, so everything it
+    # learns also lands in the engine's transposition table. A reply that was
+    # pondered as deep as a normal search reaches is played from the cache at
+    # once; a shallower result seeds the search, which continues from the next
+    # depth. Any other reply still starts its search from a warm table.
+    #
+    # Cancelling uses the engine's own deadline check: interrupt() moves the
+    # deadline into the past, so minimax raises SearchTimeout within
+    # ConnectFour.TIME_CHECK_INTERVAL nodes.
+    def __init__(self, engine, replies='all', max_depth=20, max_entries=100000):
+        super().__init__(max_entries)
+        if replies not in ('predicted', 'all'):
+            raise ValueError("replies must be 'predicted' or 'all'")
+        self.engine = engine
+        self.replies = replies
+        self.max_depth = max_depth
+        # Depth the engine's last real search reached within its budget; pondered
+        # results at least this deep are played at once
+        self.target_depth = None
+        self.seeded = 0
+
+    def prepare(self):
+        self.engine.deadline = math.inf
+
+    def interrupt(self):
+        self.engine.deadline = 0.0
+
+    def stop(self):
+        super().stop()
+        # The thread may have finished before interrupt() moved the deadline
+        self.engine.deadline = None
+
+    def stats(self):
+        stats = super().stats()
+        stats['seeded'] = self.seeded
+        return stats
+
+    def predicted_reply(self, board):
+        if self.engine.tt is None:
+            return None
+        entry = self.engine.tt.probe(board.hash)
+        if entry is None or entry[3] < 0 or not board.can_play(entry[3]):
+            return None
+        return entry[3]
+
+    def run(self, board):
+        engine = self.engine
+        replies = board.ordered_columns()
+        predicted = self.predicted_reply(board)
+        if predicted is not None:
+            replies.remove(predicted)
+            replies.insert(0, predicted)
+        if self.replies == 'predicted':
+            replies = replies[:1]
+        children = []
+        for reply in replies:
+            child = board.copy()
+            child.play(reply)
+            empty = child.ROW_COUNT * child.COLUMN_COUNT - child.moves
+            # Finished games need no search, and the book and the endgame solver answer at once anyway
+            if child.winning_move(board.piece) or child.is_full() or empty <= engine.endgame_empty:
+                continue
+            if engine.book is not None and engine.book.lookup(child) is not None:
+                continue
+            children.append((child, empty))
+        if engine.tt is not None:
+            engine.tt.new_search()
+        try:
+            for depth in range(1, self.max_depth + 1):
+                searched = False
+                for child, empty in children:
+                    if depth > empty:
+                        continue
+                    if self.cancelled.is_set():
+                        return
+                    column, value = engine.minimax(child.copy(), depth, child.piece == 2, -math.inf, math.inf)
+                    self.store(child.hash, (column, value, depth))
+                    self.pondered += 1
+                    searched = True
+                if not searched:
+                    return
+        except SearchTimeout:
+            pass
+
+    def best_move(self, board, time_budget=None):
+        # Same result as engine.iterative_deepening(board, time_budget), taken
+        # from the cache when the position was pondered deeply enough
+        self.stop()
+        entry = self.cache.get(board.hash)
+        if entry is not None and self.target_depth is not None and entry[2] >= self.target_depth:
+            self.hits += 1
+            self.engine.last_score = entry[1]
+            return entry
+        if entry is not None:
+            self.seeded += 1
+        else:
+            self.misses += 1
+        column, value, depth = self.engine.iterative_deepening(board, time_budget, None, board.piece == 2, entry)
+        # A search that ran out of budget on its first new iteration says nothing about the reachable depth
+        if entry is None or depth > entry[2]:
+            self.target_depth = depth
+        return column, value, depth
+
+class CancellableTicTacToe(TicTacToe):
+    # Private engine for the pondering thread. check_win runs at every node of
+    # minimax_alpha_beta, so it doubles as the cancellation point.
+    def __init__(self, cancelled):
+        super().__init__()
+        self.cancelled = cancelled
+
+    def check_win(self, player):
+        if self.cancelled.is_set():
+            raise PonderCancelled()
+        return super().check_win(player)
+
+class TicTacToePonderer(Ponderer):
+    # Pondering for the minimax_alpha_beta player of TicTacToeGUI.game_loop. For
+    # every reply the opponent ('O') can make, the thread computes the engine's
+    # answer on a private copy of the board, so the game's own board is never
+    # touched. The results are exact, so a cached position is always played at once.
+    def __init__(self, max_entries=10000):
+        super().__init__(max_entries)
+        self.engine = CancellableTicTacToe(self.cancelled)
+
+    def run(self, board):
+        engine = self.engine
+        rows, cols = len(board), len(board[0])
+        engine.BOARD_ROWS, engine.BOARD_COLS = rows, cols
+        engine.board = [row[:] for row in board]
+        empty = [(row, col) for row in range(rows) for col in range(cols) if board[row][col] is None]
+        for row, col in empty:
+            if self.cancelled.is_set():
+                return
+            engine.board[row][col] = 'O'
+            if not engine.check_win('O') and not engine.check_draw():
+                key = engine.get_state()
+                if key not in self.cache:
+                    self.store(key, engine.minimax_alpha_beta(0, True, -float('inf'), float('inf')))
+                    self.pondered += 1
+            engine.board[row][col] = None
+
+    def best_move(self, game):
+        # The move game.minimax_alpha_beta(0, True, -inf, inf) would return
+        self.stop()
+        entry = self.cache.get(game.get_state())
+        if entry is not None:
+            self.hits += 1
+            return dict(entry)
+        self.misses += 1
+        return game.minimax_alpha_beta(0, True, -float('inf'), float('inf'))
@@ -0,0 +1,225 @@
+import fcntl
+import os
+import struct
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+
+# File layout: a 128-byte header followed by 64-byte aligned sections that
+# np.memmap opens in place.
+#   header: magic, version, kind, flags, rows, cols, then (offset, nbytes) for
+#           the q, visited, keys and visits sections (0, 0 when absent)
+#   q:       float32 [rows, cols]
+#   visited: uint8 bitmap, bit i (little-endian within a byte) set if row i is used
+#   keys:    uint64 [rows] position key + 1 per row, 0 for empty (hashed tables)
+#   visits:  uint32 [rows] (hashed tables)
+MAGIC = b'QTAB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQQ8Q')
+HEADER_SIZE = 128
+ALIGN = 64
+
+KIND_COMPACT = 1  # tic_tac_toe_qtable.CompactQTable
+KIND_HASHED = 2  # connect_four_rl.HashedQTable
+FLAG_SYMMETRIC = 1
+
+def align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def write_table(path, kind, flags, q, visited=None, keys=None, visits=None):
+    # Writes to a temporary file and renames it into place, so readers that
+    # already mapped the old file keep a consistent view
+    sections = [q, visited, keys, visits]
+    offsets = []
+    offset = HEADER_SIZE
+    for section in sections:
+        if section is None:
+            offsets.extend((0, 0))
+        else:
+            offset = align(offset)
+            offsets.extend((offset, section.nbytes))
+            offset += section.nbytes
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, kind, flags, q.shape[0], q.shape[1], *offsets).ljust(HEADER_SIZE, b'\0'))
+        for section, start in zip(sections, offsets[::2]):
+            if section is not None:
+                f.seek(start)
+                f.write(np.ascontiguousarray(section).tobytes())
+    os.replace(tmp, path)
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        fields = HEADER.unpack(f.read(HEADER.size))
+    magic, version, kind, flags, rows, cols = fields[:6]
+    if magic != MAGIC:
+        raise ValueError("%s is not a Q-table file" % path)
+    if version != VERSION:
+        raise ValueError("%s has Q-table format version %d, expected %d" % (path, version, VERSION))
+    offsets = fields[6:]
+    sections = {}
+    for name, i in (('q', 0), ('visited', 2), ('keys', 4), ('visits', 6)):
+        if offsets[i + 1]:
+            sections[name] = (offsets[i], offsets[i + 1])
+    return kind, flags, rows, cols, sections
+
+def map_section(path, sections, name, dtype, shape, mode):
+    offset, _ = sections[name]
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+def save_compact(table, path):
+    write_table(path, KIND_COMPACT, FLAG_SYMMETRIC if table.symmetric else 0, table.q, visited=table.visited)
+
+def open_compact(path, mode='r'):
+    # mode 'r' maps read-only (serving), 'r+' lets writers update the file in place
+    from tic_tac_toe_qtable import CompactQTable
+    kind, flags, rows, cols, sections = read_header(path)
+    if kind != KIND_COMPACT:
+        raise ValueError("%s does not hold a tic-tac-toe Q-table" % path)
+    table = CompactQTable.__new__(CompactQTable)
+    table.symmetric = bool(flags & FLAG_SYMMETRIC)
+    if table.symmetric:
+        from tic_tac_toe_qtable import canonical_index
+        table.slots, table.symmetry, _ = canonical_index()
+    table.q = map_section(path, sections, 'q', np.float32, (rows, cols), mode)
+    table.visited = map_section(path, sections, 'visited', np.uint8, ((rows + 7) // 8,), mode)
+    return table
+
+def save_hashed(table, path):
+    keys = np.frombuffer(table.keys, dtype=np.uint64)
+    visits = np.frombuffer(table.visits, dtype=np.uint32)
+    write_table(path, KIND_HASHED, 0, table.q, keys=keys, visits=visits)
+
+def open_hashed(path, mode='r'):
+    from connect_four_rl import HashedQTable
+    kind, flags, rows, cols, sections = read_header(path)
+    if kind != KIND_HASHED:
+        raise ValueError("%s does not hold a Connect Four Q-table" % path)
+    table = HashedQTable.__new__(HashedQTable)
+    table.actions = cols
+    table.size = rows
+    table.index_mask = rows - 1
+    table.shift = 64 - (rows.bit_length() - 1)
+    table.entry_bytes = 8 + 4 + 4 * cols
+    table.q = map_section(path, sections, 'q', np.float32, (rows, cols), mode)
+    table.keys = map_section(path, sections, 'keys', np.uint64, (rows,), mode)
+    table.visits = map_section(path, sections, 'visits', np.uint32, (rows,), mode)
+    table.zeros = np.zeros(cols, dtype=np.float32)
+    table.used = int(np.count_nonzero(table.keys))
+    table.evictions = 0
+    return table
+
+class TableLock:
+    # Advisory locks for writers sharing one mapped table. Rows are split into
+    # `shards` contiguous ranges and each shard is a one-byte fcntl record lock
+    # in a side file, so writers to different shards do not wait on each other.
+    # Readers do not lock. Locks are per process, not per thread.
+    def __init__(self, path, rows, shards=64):
+        self.rows = rows
+        self.shards = shards
+        self.fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+
+    def close(self):
+        os.close(self.fd)
+
+    def shard(self, row):
+        return row * self.shards // self.rows
+
+    @contextmanager
+    def lock_shard(self, shard):
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, shard)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, shard)
+
+    @contextmanager
+    def lock_rows(self, rows):
+        # Shards are always taken in ascending order, so writers cannot deadlock
+        with ExitStack() as stack:
+            for shard in sorted({self.shard(row) for row in rows}):
+                stack.enter_context(self.lock_shard(shard))
+            yield
+
+    @contextmanager
+    def lock_all(self):
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, self.shards, 0)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, self.shards, 0)
+
+def open_table(path, mode='r'):
+    kind = read_header(path)[0]
+    if kind == KIND_COMPACT:
+        return open_compact(path, mode)
+    if kind == KIND_HASHED:
+        return open_hashed(path, mode)
+    raise ValueError("%s holds an unknown table kind %d" % (path, kind))
+
+class SharedQTable:
+    # A table mapped read-write by several processes. Reads go straight to the
+    # shared mapping without locking; writes take the shard locks of every row
+    # they can touch (for a hashed table, the whole probe window). Works as
+    # TicTacToe.q_table or as the q_table of ConnectFour.q_learning; both learn
+    # through update(), which does the whole Q-learning step under the locks.
+    def __init__(self, path, shards=64):
+        self.path = path
+        self.compact = read_header(path)[0] == KIND_COMPACT
+        self.table = open_table(path, 'r+')
+        self.lock = TableLock(path, len(self.table.q), shards)
+
+    def __contains__(self, code):
+        return code in self.table
+
+    def __getitem__(self, code):
+        return self.table[code]
+
+    def __setitem__(self, code, values):
+        with self.lock.lock_rows(self.table.rows(code)):
+            self.table[code] = values
+
+    def __len__(self):
+        return len(self.table)
+
+    def values(self, state):
+        # A compact table holds zeros for positions never written
+        if self.compact:
+            return self.table[state]
+        return self.table.values(state)
+
+    def update(self, state, action, target, learning_rate, next_state=None, discount=1.0, next_actions=None):
+        # Moves Q(state, action) learning_rate of the way towards target. With
+        # next_state, discount * max Q(next_state) (over next_actions, default
+        # all) is added to target under the same locks, so the reads and the
+        # write are one step and concurrent learners cannot lose updates.
+        rows = set(self.table.rows(state))
+        if next_state is not None:
+            rows.update(self.table.rows(next_state))
+        with self.lock.lock_rows(rows):
+            if next_state is not None:
+                next_values = self.values(next_state)
+                if next_actions is not None:
+                    next_values = next_values[list(next_actions)]
+                target += discount * float(np.max(next_values))
+            if self.compact:
+                value = self.table.get_value(state, action)
+                self.table.update(state, action, value + learning_rate * (target - value))
+            else:
+                self.table.update(state, action, target, learning_rate)
+
+    def flush(self):
+        for name in ('q', 'visited', 'keys', 'visits'):
+            section = getattr(self.table, name, None)
+            if isinstance(section, np.memmap):
+                section.flush()
+
+    def close(self):
+        self.flush()
+        self.lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
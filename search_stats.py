@@ -0,0 +1,145 @@
+import time
+
+class SearchStats:
+    # Opt-in counters for ConnectFour.minimax and TicTacToe.minimax_alpha_beta.
+    # Assign an instance to engine.stats to turn them on; with engine.stats left
+    # as None the searches only pay one None check per node.
+    #
+    # A search is one root call. Totals accumulate across searches, and every
+    # finished search is also kept in `searches` (the last `keep` of them), so
+    # the iterations of iterative_deepening show up one per depth. `trace`, if
+    # given, is called with a dict for every root move searched ('move') and for
+    # every finished search ('search').
+    def __init__(self, trace=None, keep=1000):
+        self.trace = trace
+        self.keep = keep
+        self.reset()
+
+    def reset(self):
+        self.nodes_by_ply = []
+        self.cutoffs_by_index = []
+        self.leaves = 0
+        self.cache_probes = 0
+        self.cache_hits = 0
+        self.cache_cutoffs = 0
+        self.searches = []
+        self.root_depth = -1
+        self.search_start = None
+        self.search_nodes = 0
+
+    def begin(self, depth):
+        self.root_depth = depth
+        self.search_start = time.perf_counter()
+        self.search_nodes = 0
+
+    def node_at_depth(self, depth):
+        # For searches that count depth down to 0 (ConnectFour). A depth that is
+        # not below the current root's can only be a new root.
+        if depth >= self.root_depth:
+            self.begin(depth)
+        self.node(self.root_depth - depth)
+
+    def node_at_ply(self, ply, depth=None):
+        # For searches that count plies up from the root (TicTacToe)
+        if ply == 0:
+            self.begin(depth)
+        self.node(ply)
+
+    def node(self, ply):
+        nodes = self.nodes_by_ply
+        if ply >= len(nodes):
+            nodes.extend([0] * (ply + 1 - len(nodes)))
+        nodes[ply] += 1
+        self.search_nodes += 1
+
+    def leaf(self, count=1):
+        self.leaves += count
+
+    def cache(self, hit):
+        self.cache_probes += 1
+        if hit:
+            self.cache_hits += 1
+
+    def cache_cutoff(self):
+        self.cache_cutoffs += 1
+
+    def cutoff(self, index):
+        # index is the position in the move order of the move that failed high
+        counts = self.cutoffs_by_index
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+
+    def root_move(self, move, score):
+        if self.trace is not None:
+            self.trace({'event': 'move', 'depth': self.root_depth, 'move': move, 'score': score,
+                        'nodes': self.search_nodes, 'seconds': time.perf_counter() - self.search_start})
+
+    def finish(self, move, score):
+        seconds = time.perf_counter() - self.search_start
+        depth = self.root_depth
+        search = {'depth': depth, 'move': move, 'score': score, 'nodes': self.search_nodes, 'seconds': seconds,
+                  'effective_branching_factor': branching_factor(self.search_nodes, depth)}
+        self.searches.append(search)
+        if len(self.searches) > self.keep:
+            del self.searches[0]
+        self.root_depth = -1
+        if self.trace is not None:
+            self.trace(dict(search, event='search'))
+
+    def abort(self):
+        # For a search that was stopped by a deadline
+        self.root_depth = -1
+
+    @property
+    def nodes(self):
+        return sum(self.nodes_by_ply)
+
+    @property
+    def cutoffs(self):
+        return sum(self.cutoffs_by_index)
+
+    def summary(self):
+        cutoffs = self.cutoffs
+        last = self.searches[-1] if self.searches else None
+        return {
+            'nodes': self.nodes,
+            'nodes_by_ply': list(self.nodes_by_ply),
+            'leaves': self.leaves,
+            'cutoffs': cutoffs,
+            'cutoffs_by_index': list(self.cutoffs_by_index),
+            # Share of cutoffs found by the first move tried, a measure of move ordering
+            'first_move_cutoff_rate': self.cutoffs_by_index[0] / cutoffs if cutoffs else 0.0,
+            'cache_probes': self.cache_probes,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': self.cache_hits / self.cache_probes if self.cache_probes else 0.0,
+            'cache_cutoffs': self.cache_cutoffs,
+            'searches': len(self.searches),
+            'effective_branching_factor': last['effective_branching_factor'] if last else None,
+            'iterations': [(s['depth'], s['nodes'], s['seconds']) for s in self.searches],
+        }
+
+    def report(self):
+        summary = self.summary()
+        lines = ["%d nodes, %d leaves, %d cutoffs (%.0f%% on the first move), cache %d/%d hits" % (
+            summary['nodes'], summary['leaves'], summary['cutoffs'], 100 * summary['first_move_cutoff_rate'],
+            summary['cache_hits'], summary['cache_probes'])]
+        lines.append("nodes by ply: %s" % ' '.join(str(n) for n in summary['nodes_by_ply']))
+        for search in self.searches:
+            lines.append("depth %2s  %9d nodes  %8.4fs  ebf %.2f  move %s  score %s" % (
+                search['depth'], search['nodes'], search['seconds'], search['effective_branching_factor'], search['move'], search['score']))
+        return '\n'.join(lines)
+
+def branching_factor(nodes, depth):
+    # b with 1 + b + ... + b^depth == nodes, found by bisection
+    if not depth or nodes <= depth + 1:
+        return 1.0
+    low, high = 1.0, float(nodes)
+    for _ in range(60):
+        b = (low + high) / 2
+        total = (b ** (depth + 1) - 1) / (b - 1)
+        if total < nodes:
+            low = b
+        else:
+            high = b
+    return (low + high) / 2
@@ -0,0 +1,33 @@
+import random
+
+from connect_four import BitBoard, ConnectFour
+
+def test_array_round_trip_and_wins_match_array_check():
+    rng = random.Random(3)
+    engine = ConnectFour(0)
+    for _ in range(200):
+        board = BitBoard()
+        for _ in range(rng.randint(0, 42)):
+            columns = board.valid_columns()
+            if not columns or board.winning_move(1) or board.winning_move(2):
+                break
+            board.play(rng.choice(columns))
+        array = board.to_array()
+        copy = BitBoard.from_array(array, board.piece)
+        assert (copy.position, copy.mask, copy.hash, copy.heights) == (board.position, board.mask, board.hash, board.heights)
+        for piece in (1, 2):
+            assert board.winning_move(piece) == bool(engine.winning_move(array, piece))
+
+def test_undo_restores_position_and_hash():
+    rng = random.Random(4)
+    board = BitBoard()
+    board.attach_evaluator()
+    for _ in range(30):
+        before = (board.position, board.mask, board.hash, board.piece, list(board.evaluator.scores))
+        col = rng.choice(board.valid_columns())
+        board.play(col)
+        board.undo(col)
+        assert (board.position, board.mask, board.hash, board.piece, list(board.evaluator.scores)) == before
+        board.play(col)
+    # The hash depends only on the position, not on the move order
+    assert board.hash == BitBoard.from_array(board.to_array(), board.piece).hash
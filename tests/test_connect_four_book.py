@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from connect_four import BitBoard, ConnectFour
+from connect_four_book import OpeningBook, generate, mirror_column
+from parallel_search import as_piece_two
+
+DEPTH = 4
+
+@pytest.fixture(scope='module')
+def book(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('book') / 'book.bin')
+    generate(path, max_ply=2, depth=DEPTH, workers=1)
+    return OpeningBook(path)
+
+def play(moves):
+    board = BitBoard()
+    for col in moves:
+        board.play(col)
+    return board
+
+def test_entries_match_the_search(book):
+    for moves in ([], [3], [0], [3, 2], [6, 6]):
+        board = play(moves)
+        expected = ConnectFour(4).minimax(board.copy(), DEPTH, board.piece == 2, -math.inf, math.inf)
+        assert book.lookup(board)[1] == expected[1]
+
+def test_mirrored_position_gets_the_mirrored_move(book):
+    col, score = book.lookup(play([1, 2]))
+    assert book.lookup(play([5, 4])) == (mirror_column(col), score)
+
+def test_colour_swapped_board_gets_the_score_for_piece_two(book):
+    for moves in ([], [3, 2], [0, 6]):
+        board = play(moves)
+        col, score = book.lookup(board)
+        # Piece 1 is to move; with the colours swapped piece 2 is, and the score flips sign
+        assert book.lookup(as_piece_two(board)) == (col, -score)
+
+def test_positions_past_the_book_are_not_found(book):
+    assert book.lookup(play([3, 3, 3])) is None
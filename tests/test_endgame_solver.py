@@ -0,0 +1,41 @@
+import math
+import random
+
+from connect_four import BitBoard, ConnectFour
+from connect_four_solver import EndgameSolver
+
+WIN = 10000000000000
+
+def full_depth_result(board):
+    # 'win', 'loss' or 'draw' for the side to move from a search to the end of the game
+    empty = board.ROW_COUNT * board.COLUMN_COUNT - board.moves
+    _, value = ConnectFour(4).minimax(board.copy(), empty, board.piece == 2, -math.inf, math.inf)
+    if board.piece == 1:
+        value = -value
+    if value >= WIN:
+        return 'win'
+    if value <= -WIN:
+        return 'loss'
+    return 'draw'
+
+def test_solver_agrees_with_full_depth_search():
+    rng = random.Random(7)
+    solver = EndgameSolver()
+    checked = 0
+    while checked < 25:
+        board = BitBoard()
+        while board.moves < 32:
+            columns = [c for c in board.valid_columns() if not board.is_winning_col(c, board.piece)]
+            if not columns:
+                break
+            board.play(rng.choice(columns))
+        if board.moves < 32:
+            continue
+        result = solver.solve(board)
+        assert result['result'] == full_depth_result(board)
+        if result['result'] != 'draw':
+            child = board.copy()
+            child.play(result['column'])
+            # The solver's move keeps the result
+            assert full_depth_result(child) == {'win': 'loss', 'loss': 'win'}[result['result']]
+        checked += 1
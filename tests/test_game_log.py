@@ -0,0 +1,50 @@
+import math
+import os
+
+import pytest
+
+import game_log
+from game_log import GameLog, read_games, think_time_by_ply
+
+def test_records_have_the_documented_layout(tmp_path):
+    path = str(tmp_path / 'games.glog')
+    with GameLog(path, 'connect4') as log:
+        log.write_game([3, 3, 4], winner=0, seconds=[0.5, 0.25, 1.0])
+    size = os.path.getsize(path)
+    assert game_log.RECORD.size == 18
+    assert size == game_log.HEADER_SIZE + 4 * game_log.RECORD.size
+    with open(path, 'rb') as f:
+        assert f.read(4) == game_log.MAGIC
+
+def test_games_read_back_and_ids_continue(tmp_path):
+    path = str(tmp_path / 'games.glog')
+    with GameLog(path, 'tictactoe') as log:
+        log.write_game([4, 0, 8], winner=None, scores=[1.0, None, -1.0])
+    with GameLog(path, 'tictactoe') as log:
+        assert log.write_game([0, 1], winner=1) == 1
+    games = list(read_games(path))
+    assert [game['game'] for game in games] == [0, 1]
+    assert games[0]['moves'] == [4, 0, 8]
+    assert games[0]['sides'] == [0, 1, 0]
+    assert games[0]['scores'] == [1.0, None, -1.0]
+    assert games[0]['winner'] is None and games[1]['winner'] == 1
+
+def test_partial_record_is_dropped_on_append(tmp_path):
+    path = str(tmp_path / 'games.glog')
+    with GameLog(path, 'connect4') as log:
+        log.write_game([3], winner=0)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    with GameLog(path, 'connect4') as log:
+        log.write_game([2, 2], winner=None, seconds=[0.5, 1.5])
+    games = list(read_games(path, chunk_records=1))
+    assert [game['moves'] for game in games] == [[3], [2, 2]]
+    rows = think_time_by_ply(path)
+    assert [(row['ply'], row['moves']) for row in rows] == [(0, 1), (1, 1)]
+    assert math.isclose(rows[1]['mean'], 1.5)
+
+def test_log_of_another_game_is_refused(tmp_path):
+    path = str(tmp_path / 'games.glog')
+    GameLog(path, 'connect4').close()
+    with pytest.raises(ValueError):
+        GameLog(path, 'tictactoe')
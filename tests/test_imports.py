@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_ONLY = '''
+import math, sys
+from connect_four import BitBoard, ConnectFour
+from tic_tac_toe import TicTacToe
+engine = ConnectFour()
+board = BitBoard()
+board.play(3)
+engine.iterative_deepening(board, 0.1, 4, False)
+engine.get_best_move(board, 2)
+TicTacToe().minimax_alpha_beta(0, True, -math.inf, math.inf)
+print(' '.join(name for name in ('numpy', 'pygame') if name in sys.modules))
+'''
+
+def test_engines_run_without_numpy_or_pygame():
+    # A fresh interpreter, since this test process may have loaded both already
+    output = subprocess.run([sys.executable, '-c', SEARCH_ONLY], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == []
@@ -0,0 +1,61 @@
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from match_server import MatchServer
+
+def run(server, *requests):
+    # Replies to the requests, sent one after another; bytes are sent as they are
+    async def send():
+        return [await server.dispatch(request if isinstance(request, bytes) else json.dumps(request).encode())
+                for request in requests]
+    return asyncio.run(send())
+
+def test_human_game_and_state():
+    server = MatchServer()
+    new, move, state = run(server,
+                           {'op': 'new', 'game': 'connect4', 'players': ['human', 'human'], 'id': 7},
+                           {'op': 'move', 'game_id': 1, 'move': 3},
+                           {'op': 'state', 'game_id': 1})
+    assert new['ok'] and new['id'] == 7
+    assert move['ok'] and move['state']['moves'] == [3]
+    assert state['state']['board'][-1] == '...1...'
+
+def test_bool_move_is_rejected():
+    server = MatchServer()
+    _, connect4, _, tictactoe = run(server,
+                                    {'op': 'new', 'game': 'connect4', 'players': ['human', 'human']},
+                                    {'op': 'move', 'game_id': 1, 'move': True},
+                                    {'op': 'new', 'game': 'tictactoe', 'players': ['human', 'human']},
+                                    {'op': 'move', 'game_id': 2, 'move': [True, 0]})
+    assert not connect4['ok']
+    assert not tictactoe['ok']
+    assert server.matches[1].moves == [] and server.matches[2].moves == []
+
+def test_malformed_fields_get_error_replies():
+    server = MatchServer(max_depth=8, request_timeout=5.0)
+    replies = run(server,
+                  b'not json',
+                  {'op': 'new', 'game': 'connect4', 'depth': 'abc'},
+                  {'op': 'new', 'game': 'connect4', 'depth': 40},
+                  {'op': 'new', 'game': 'connect4', 'move_time': 1e9},
+                  {'op': 'state', 'game_id': [1]},
+                  {'op': 'nope'})
+    assert [reply['ok'] for reply in replies] == [False] * 6
+    assert '8' in replies[2]['error']
+    assert server.matches == {}
+
+def test_bot_moves_are_played():
+    async def play():
+        server = MatchServer(workers=1)
+        server.pool = ProcessPoolExecutor(1)
+        server.slots = asyncio.Semaphore(server.max_in_flight)
+        try:
+            reply = await server.dispatch(json.dumps({'op': 'new', 'game': 'tictactoe', 'players': ['solver', 'solver']}).encode())
+        finally:
+            server.pool.shutdown()
+        return server, reply
+    server, reply = asyncio.run(play())
+    assert reply['ok']
+    assert reply['state']['over'] and reply['state']['winner'] is None
+    assert server.in_flight == 0
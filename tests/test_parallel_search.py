@@ -0,0 +1,54 @@
+import math
+import random
+
+import pytest
+
+from connect_four import BitBoard, ConnectFour
+from parallel_search import ParallelSearch, as_piece_two
+
+def random_position(rng, plies):
+    # A position reached without anyone winning
+    board = BitBoard()
+    for _ in range(plies):
+        columns = [c for c in board.valid_columns() if not board.is_winning_col(c, board.piece)]
+        if not columns:
+            break
+        board.play(rng.choice(columns))
+    return board
+
+def serial(board, depth):
+    if board.piece == 1:
+        board = as_piece_two(board)
+    return ConnectFour(4).minimax(board.copy(), depth, True, -math.inf, math.inf)
+
+@pytest.fixture(scope='module')
+def search():
+    with ParallelSearch(workers=2, tt_size_mb=4) as search:
+        yield search
+
+def test_matches_serial_minimax_when_reused(search):
+    rng = random.Random(11)
+    for _ in range(8):
+        board = random_position(rng, rng.randint(1, 25))
+        for depth in (2, 3, 4):
+            result = search.search(board, depth)
+            assert result == serial(board, depth)
+            assert type(result[1]) is int
+
+def test_immediate_win_scores_like_serial(search):
+    board = BitBoard()
+    for col in (0, 1, 0, 1, 0, 1, 3):
+        board.play(col)
+    # Piece 2 wins in column 1
+    for depth in (2, 3, 5):
+        assert search.search(board, depth) == serial(board, depth)
+        assert search.search(board, depth)[0] == 1
+
+def test_piece_one_to_move_is_scored_for_the_mover(search):
+    board = BitBoard()
+    for col in (0, 6, 0, 6, 0, 5):
+        board.play(col)
+    # Piece 1 to move wins in column 0
+    col, score = search.search(board, 4)
+    assert col == 0
+    assert score > 0
@@ -0,0 +1,59 @@
+import multiprocessing
+
+import numpy as np
+
+from connect_four import ConnectFour
+from connect_four_rl import HashedQTable
+from qtable_file import SharedQTable
+from tic_tac_toe import TicTacToe
+from tic_tac_toe_qtable import CompactQTable
+
+def test_hashed_table_round_trip(tmp_path):
+    path = str(tmp_path / 'c4.qtab')
+    table = ConnectFour(1).q_learning(20, 0.1, 0.9, 0.1, 42, q_table=HashedQTable(1))
+    table.save(path)
+    mapped = HashedQTable.open(path)
+    assert mapped.used == table.used
+    assert np.array_equal(mapped.q, table.q)
+
+def test_read_only_hashed_table_is_played_not_updated(tmp_path):
+    path = str(tmp_path / 'c4.qtab')
+    ConnectFour(1).q_learning(20, 0.1, 0.9, 0.1, 42, q_table=HashedQTable(1)).save(path)
+    table = HashedQTable.open(path, 'r')
+    assert not table.writable
+    before = np.array(table.q)
+    ConnectFour(1).q_learning(5, 0.1, 0.9, 0.5, 42, q_table=table)
+    assert np.array_equal(table.q, before)
+
+def test_read_only_compact_table_is_played_not_updated(tmp_path):
+    path = str(tmp_path / 'ttt.qtab')
+    game = TicTacToe()
+    for _ in range(50):
+        game.board = [[None] * 3 for _ in range(3)]
+        game.q_learning()
+    game.save_q_table(path)
+    player = TicTacToe()
+    player.load_q_table(path)
+    assert not player.q_table.writable
+    before = np.array(player.q_table.q)
+    row, col = player.q_learning()
+    assert player.board[row][col] == 'O'
+    assert np.array_equal(player.q_table.q, before)
+
+def increment(path, times):
+    table = SharedQTable(path)
+    for _ in range(times):
+        # Q(5, 4) <- 1 + max Q(5): an increment when done atomically
+        table.update(5, 4, 1.0, 1.0, 5, 1.0)
+    table.close()
+
+def test_shared_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / 'shared.qtab')
+    CompactQTable().save(path)
+    workers = [multiprocessing.Process(target=increment, args=(path, 500)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert CompactQTable.open(path)[5][4] == 2000
@@ -0,0 +1,32 @@
+import math
+import random
+
+from connect_four import BitBoard, ConnectFour
+
+def random_position(rng, plies):
+    board = BitBoard()
+    for _ in range(plies):
+        columns = [c for c in board.valid_columns() if not board.is_winning_col(c, board.piece)]
+        if not columns:
+            break
+        board.play(rng.choice(columns))
+    return board
+
+def test_pvs_matches_minimax_score():
+    rng = random.Random(5)
+    for _ in range(20):
+        board = random_position(rng, rng.randint(0, 24))
+        for depth in (1, 3, 5):
+            maximizing = board.piece == 2
+            _, minimax_score = ConnectFour(4).minimax(board.copy(), depth, maximizing, -math.inf, math.inf)
+            _, pvs_score = ConnectFour(4).pvs(board.copy(), depth, maximizing, -math.inf, math.inf)
+            assert pvs_score == minimax_score
+
+def test_table_does_not_change_minimax_score():
+    rng = random.Random(6)
+    for _ in range(20):
+        board = random_position(rng, rng.randint(0, 24))
+        maximizing = board.piece == 2
+        _, with_table = ConnectFour(4).minimax(board.copy(), 5, maximizing, -math.inf, math.inf)
+        _, without_table = ConnectFour(0).minimax(board.copy(), 5, maximizing, -math.inf, math.inf)
+        assert with_table == without_table
@@ -0,0 +1,28 @@
+import math
+
+from connect_four import BitBoard, ConnectFour, TranspositionTable
+
+def play(moves):
+    board = BitBoard()
+    for col in moves:
+        board.play(int(col))
+    return board
+
+def test_probe_returns_int_values():
+    tt = TranspositionTable(1)
+    tt.store(12345, 4, TranspositionTable.EXACT, 17, 3)
+    depth, flag, value, move = tt.probe(12345)
+    assert (depth, flag, value, move) == (4, TranspositionTable.EXACT, 17, 3)
+    assert type(value) is int
+
+def test_search_scores_are_ints_after_table_hits():
+    engine = ConnectFour(1)
+    for moves in ('', '3', '3324', '33242234'):
+        board = play(moves)
+        for algorithm in ('minimax', 'pvs'):
+            engine.search_algorithm = algorithm
+            engine.last_score = None
+            # The second search is answered mostly from the table
+            for _ in range(2):
+                col, score, depth = engine.iterative_deepening(board, math.inf, 5, board.piece == 2)
+                assert type(score) is int
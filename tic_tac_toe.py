@@ -0,0 +1,281 @@
+import random
+
+class TicTacToe:
+    def __init__(self):
+        self.BOARD_ROWS = 3
+        self.BOARD_COLS = 3
+
+        self.board = [[None for _ in range(self.BOARD_COLS)] for _ in range(self.BOARD_ROWS)]
+
+        self.player = random.choice(["X", "O"])
+        self.game_over = False
+        self.winner= None
+        self.q_table = {}
+        # search_stats.SearchStats to instrument minimax_alpha_beta, None to run it bare
+        self.stats = None
+
+    def mark_square(self, row, col, player):
+        self.board[row][col] = player
+
+    def check_win(self, player):
+        for col in range(self.BOARD_COLS):
+            if self.board[0][col] == player and self.board[1][col] == player and self.board[2][col] == player:
+                return True
+        for row in range(self.BOARD_ROWS):
+            if self.board[row][0] == player and self.board[row][1] == player and self.board[row][2] == player:
+                return True
+        if self.board[2][0] == player and self.board[1][1] == player and self.board[0][2] == player:
+            return True
+        if self.board[0][0] == player and self.board[1][1] == player and self.board[2][2] == player:
+            return True
+        return False
+
+    def check_draw(self):
+        if self.check_win('X') or self.check_win('O'):
+            return False
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is None:
+                    return False
+        return True
+
+    def restart(self):
+        self.player = "X"
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                self.board[row][col] = None
+
+    def ai_move(self):
+        # Check for winning move
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is None:
+                    self.board[row][col] = 'O'
+                    if self.check_win('O'):
+                        return
+                    self.board[row][col] = None
+
+        # Check for blocking move
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is None:
+                    self.board[row][col] = 'X'
+                    if self.check_win('X'):
+                        self.board[row][col] = 'O'
+                        return
+                    self.board[row][col] = None
+
+        # Make a random move
+        while True:
+            row = random.randint(0, self.BOARD_ROWS - 1)
+            col = random.randint(0, self.BOARD_COLS - 1)
+            if self.board[row][col] is None:
+                self.board[row][col] = 'O'
+                return
+
+
+    def minimax(self, depth, is_maximizing):
+        if self.check_win('O'):
+            return {'score': 1, 'row': None, 'col': None}
+            
+        elif self.check_win('X'):
+            return {'score': -1, 'row': None, 'col': None}
+        elif self.check_draw():
+            return {'score': 0, 'row': None, 'col': None}
+
+        if is_maximizing:
+            best_score = {'score': -float('inf'), 'row': None, 'col': None}
+            symbol = 'O'
+        else:
+            best_score = {'score': float('inf'), 'row': None, 'col': None}
+            symbol = 'X'
+
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is None:
+                    self.board[row][col] = symbol
+                    current_score = self.minimax(depth + 1, not is_maximizing)
+                    self.board[row][col] = None
+                    current_score['row'] = row
+                    current_score['col'] = col
+
+                    if is_maximizing and current_score['score'] > best_score['score']:
+                        best_score = current_score
+                    elif not is_maximizing and current_score['score'] < best_score['score']:
+                        best_score = current_score
+
+        return best_score
+        
+    def solver_move(self, player):
+        # O(1) perfect play from the precomputed table, same result format as minimax
+        from tic_tac_toe_solver import get_solver
+        return get_solver().best_move(self.board, player)
+
+    def get_state(self):
+        return ''.join(str(e) if e is not None else '0' for row in self.board for e in row)
+
+    def get_code(self):
+        # Base-3 position code (empty 0, X 1, O 2, cell row * 3 + col is digit 3^cell)
+        code = 0
+        power = 1
+        for row in self.board:
+            for e in row:
+                if e == 'X':
+                    code += power
+                elif e == 'O':
+                    code += 2 * power
+                power *= 3
+        return code
+
+    def get_state_key(self):
+        # q_table is either the original dict keyed by get_state() or a CompactQTable keyed by get_code()
+        if isinstance(self.q_table, dict):
+            return self.get_state()
+        return self.get_code()
+
+    def save_q_table(self, path, symmetric=False):
+        # The dict format is converted to a CompactQTable on the way out
+        from tic_tac_toe_qtable import CompactQTable
+        table = self.q_table
+        if isinstance(table, dict):
+            table = CompactQTable.from_dict(table, symmetric)
+        elif not isinstance(table, CompactQTable):
+            table = table.table
+        table.save(path)
+
+    def load_q_table(self, path, mode='r'):
+        # Maps a saved table instead of reading it. mode 'r' is for playing from
+        # a fixed policy (q_learning then plays greedily and learns nothing),
+        # 'r+' keeps learning into the file and 'shared' lets several processes
+        # learn into it under shard locks.
+        if mode == 'shared':
+            from qtable_file import SharedQTable
+            self.q_table = SharedQTable(path)
+        else:
+            from tic_tac_toe_qtable import CompactQTable
+            self.q_table = CompactQTable.open(path, mode)
+
+    def q_learning(self, alpha=0.5, gamma=0.9, epsilon=0.1):
+        # numpy is only needed for Q values, keep it off the import path of minimax-only users
+        import numpy as np
+
+        from qtable_file import SharedQTable
+        # A read-only table is a fixed policy: play it greedily, without updates
+        learning = getattr(self.q_table, 'writable', True)
+        if not learning:
+            epsilon = 0
+        # A shared table creates rows inside its locked update
+        shared = isinstance(self.q_table, SharedQTable)
+
+        state = self.get_state_key()
+        if learning and not shared and state not in self.q_table:
+            self.q_table[state] = np.zeros(self.BOARD_ROWS * self.BOARD_COLS)
+
+        q_values = self.q_table[state]
+
+        if np.random.uniform(0, 1) < epsilon:
+            # Explore: select a random action
+            while True:
+                action = np.random.randint(0, self.BOARD_ROWS * self.BOARD_COLS)
+                row = action // self.BOARD_COLS
+                col = action % self.BOARD_COLS
+                if self.board[row][col] is None:
+                    break
+        else:
+            # Exploit: select the empty cell with max value (future reward)
+            empty = [i for i in range(self.BOARD_ROWS * self.BOARD_COLS) if self.board[i // self.BOARD_COLS][i % self.BOARD_COLS] is None]
+            empty_q_values = q_values[empty]
+            indices = np.where(empty_q_values == np.max(empty_q_values))[0]
+            action = empty[np.random.choice(indices)]
+            row = action // self.BOARD_COLS
+            col = action % self.BOARD_COLS
+
+        # Perform the action and get the reward
+        self.board[row][col] = 'O'
+        reward = 0
+        if self.check_win('O'):
+            reward = 1
+        elif self.check_draw():
+            reward = 0
+        else:
+            reward = -0.01
+        if not learning:
+            return row, col
+
+        # Update Q-table for Q(s, a)
+        next_state = self.get_state_key()
+        if shared:
+            self.q_table.update(state, action, reward, alpha, next_state, gamma)
+            return row, col
+        if next_state not in self.q_table:
+            self.q_table[next_state] = np.zeros(self.BOARD_ROWS * self.BOARD_COLS)
+
+        next_q_values = self.q_table[next_state]
+        max_next_q_value = np.max(next_q_values)
+
+        q_values[action] = q_values[action] + alpha * (reward + gamma * max_next_q_value - q_values[action])
+        # No-op for dict rows, needed when the store hands out copies
+        self.q_table[state] = q_values
+
+        return row, col
+
+    
+    def minimax_alpha_beta(self, depth, is_maximizing, alpha, beta):
+        stats = self.stats
+        if stats is not None:
+            stats.node_at_ply(depth, sum(row.count(None) for row in self.board))
+            if self.check_win('O') or self.check_win('X') or self.check_draw():
+                stats.leaf()
+        if self.check_win('O'):
+            return {'score': 1, 'row': None, 'col': None}
+        elif self.check_win('X'):
+            return {'score': -1, 'row': None, 'col': None}
+        elif self.check_draw():
+            return {'score': 0, 'row': None, 'col': None}
+
+        if is_maximizing:
+            best_score = {'score': -float('inf'), 'row': None, 'col': None}
+            symbol = 'O'
+        else:
+            best_score = {'score': float('inf'), 'row': None, 'col': None}
+            symbol = 'X'
+
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is None:
+                    self.board[row][col] = symbol
+                    current_score = self.minimax_alpha_beta(depth + 1, not is_maximizing, alpha, beta)
+                    self.board[row][col] = None
+                    current_score['row'] = row
+                    current_score['col'] = col
+                    if stats is not None and depth == 0:
+                        stats.root_move((row, col), current_score['score'])
+
+                    if is_maximizing:
+                        if current_score['score'] > best_score['score']:
+                            best_score = current_score
+                        alpha = max(alpha, best_score['score'])
+                        if beta <= alpha:
+                            if stats is not None:
+                                self.record_cutoff(stats, depth, row, col, best_score)
+                            return best_score
+                    else:
+                        if current_score['score'] < best_score['score']:
+                            best_score = current_score
+                        beta = min(beta, best_score['score'])
+                        if beta <= alpha:
+                            if stats is not None:
+                                self.record_cutoff(stats, depth, row, col, best_score)
+                            return best_score
+
+        if stats is not None and depth == 0:
+            stats.finish((best_score['row'], best_score['col']), best_score['score'])
+        return best_score
+
+    def record_cutoff(self, stats, depth, row, col, best_score):
+        # Move order index of (row, col) among the empty cells, in scan order
+        index = sum(1 for r in range(self.BOARD_ROWS) for c in range(self.BOARD_COLS)
+                    if self.board[r][c] is None and (r, c) < (row, col))
+        stats.cutoff(index)
+        if depth == 0:
+            stats.finish((best_score['row'], best_score['col']), best_score['score'])
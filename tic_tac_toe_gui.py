@@ -0,0 +1,240 @@
+import pygame
+import sys
+import time
+
+from tic_tac_toe import TicTacToe
+from ponder import TicTacToePonderer
+
+class TicTacToeGUI(TicTacToe):
+    # fast=True is the spectator mode: moves are paced by a frame-rate cap of fps
+    # instead of the fixed half-second sleeps. log is an optional
+    # game_log.GameLog that every game is recorded to. ponder=True lets X work
+    # out its answers while O thinks (see ponder.py).
+    def __init__(self, fast=False, fps=30, log=None, ponder=False):
+        pygame.init()
+        super().__init__()
+
+        self.WIDTH = 600
+        self.HEIGHT = 600
+        self.LINE_WIDTH = 15
+        self.WIN_LINE_WIDTH = 15
+        self.SQUARE_SIZE = 200
+        self.CIRCLE_RADIUS = 60
+        self.CIRCLE_WIDTH = 15
+        self.CROSS_WIDTH = 25
+        self.SPACE = 55
+
+        self.RED = (255, 0, 0)
+        self.BG_COLOR = (28, 170, 156)
+        self.LINE_COLOR = (23, 145, 135)
+        self.CIRCLE_COLOR = (239, 231, 200)
+        self.CROSS_COLOR = (66, 66, 66)
+
+        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        pygame.display.set_caption('TIC TAC TOE')
+        self.fast = fast
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.log = log
+        self.ponderer = TicTacToePonderer() if ponder else None
+        # The background and grid lines never change, so they are drawn once
+        self.background = pygame.Surface((self.WIDTH, self.HEIGHT))
+        self.background.fill(self.BG_COLOR)
+        self.draw_lines(self.background)
+        self.background = self.background.convert()
+        self.screen.blit(self.background, (0, 0))
+        # Screen areas changed since the last display update
+        self.dirty = []
+        # Marks already on screen, so draw_figures only draws new ones
+        self.drawn = set()
+        pygame.display.update()
+
+    def draw_lines(self, surface=None):
+        surface = self.screen if surface is None else surface
+        pygame.draw.line(surface, self.LINE_COLOR, (0, self.SQUARE_SIZE), (self.WIDTH, self.SQUARE_SIZE), self.LINE_WIDTH)
+        pygame.draw.line(surface, self.LINE_COLOR, (0, 2 * self.SQUARE_SIZE), (self.WIDTH, 2 * self.SQUARE_SIZE), self.LINE_WIDTH)
+        pygame.draw.line(surface, self.LINE_COLOR, (self.SQUARE_SIZE, 0), (self.SQUARE_SIZE, self.HEIGHT), self.LINE_WIDTH)
+        pygame.draw.line(surface, self.LINE_COLOR, (2 * self.SQUARE_SIZE, 0), (2 * self.SQUARE_SIZE, self.HEIGHT), self.LINE_WIDTH)
+
+    def draw_mark(self, row, col):
+        # Draws the mark in one square and returns the screen area it changed
+        if self.board[row][col] == 'X':
+            first = pygame.draw.line(self.screen, self.CROSS_COLOR, (col * self.SQUARE_SIZE + self.SPACE, row * self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), (col * self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row * self.SQUARE_SIZE + self.SPACE), self.CROSS_WIDTH)
+            second = pygame.draw.line(self.screen, self.CROSS_COLOR, (col * self.SQUARE_SIZE + self.SPACE, row * self.SQUARE_SIZE + self.SPACE), (col * self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row * self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), self.CROSS_WIDTH)
+            return first.union(second)
+        return pygame.draw.circle(self.screen, self.CIRCLE_COLOR, (int(col * self.SQUARE_SIZE + self.SQUARE_SIZE // 2), int(row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2)), self.CIRCLE_RADIUS, self.CIRCLE_WIDTH)
+
+    def draw_figures(self):
+        # Only marks placed since the last call are drawn; their areas go to self.dirty
+        for row in range(self.BOARD_ROWS):
+            for col in range(self.BOARD_COLS):
+                if self.board[row][col] is not None and (row, col) not in self.drawn:
+                    self.drawn.add((row, col))
+                    self.dirty.append(self.draw_mark(row, col))
+
+    def update(self):
+        # Pushes only the changed areas to the display
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+
+    def pace(self, seconds):
+        # Fixed pause between moves, or in fast mode just the frame-rate cap
+        pygame.event.pump()
+        if self.fast:
+            self.clock.tick(self.fps)
+        else:
+            time.sleep(seconds)
+
+    def log_move(self, game_id, row, col, seconds):
+        if self.log is not None:
+            plies = sum(cell is not None for line in self.board for cell in line)
+            self.log.move(game_id, plies - 1, row * self.BOARD_COLS + col, 0 if self.board[row][col] == 'X' else 1, None, seconds)
+
+    def log_result(self, game_id, winner, seconds):
+        if self.log is not None:
+            plies = sum(cell is not None for line in self.board for cell in line)
+            self.log.result(game_id, plies, None if winner is None else ('X', 'O').index(winner), seconds)
+            self.log.flush()
+
+    def restart(self):
+        self.screen.blit(self.background, (0, 0))
+        self.drawn.clear()
+        self.dirty = []
+        pygame.display.update()
+        super().restart()
+
+    def display_winner(self, player):
+        font = pygame.font.Font(None, 50)
+        if player == 'X':
+            text = font.render('Player X wins!', True, (0, 255, 0))
+            print("Player X wins!")
+            self.winner = 'X'
+        else:
+            text = font.render('Player O wins!', True, (0, 255, 0))
+            print("Player O wins!")
+            self.winner = 'O'
+        self.dirty.append(self.screen.blit(text, (self.WIDTH // 2 - text.get_width() // 2, self.HEIGHT // 2 - text.get_height() // 2)))
+        self.update()
+        self.pace(0.5)
+
+
+    def game_loop(self):
+        game_id = None if self.log is None else self.log.new_game()
+        game_start = time.perf_counter()
+        while True:
+            # for event in pygame.event.get():
+                # if event.type == pygame.QUIT:
+                #     sys.exit()
+            #     # ==================
+            # if self.player == 'O' and not self.game_over:
+            #     self.ai_move()
+            #     if self.check_win(self.player):
+            #         self.game_over = True
+            #         self.draw_figures()
+            #         self.display_winner(self.player)
+            #         break
+            #     self.player = 'X'
+            #     self.draw_figures()
+            # pygame.display.update()
+                #    ===================================================         # 
+            # if self.player == 'X' and not self.game_over:
+            #     move = self.minimax(0, False)
+            #     if move['row'] is not None and move['col'] is not None:
+            #         self.board[move['row']][move['col']] = 'X'
+            #     if self.check_win(self.player):
+            #         self.game_over = True
+            #         self.draw_figures()
+            #         self.display_winner(self.player)
+            #         break
+            #     self.player = 'O'
+            #     self.draw_figures()
+            # pygame.display.update() 
+
+
+            if self.player == 'O' and not self.game_over:
+                start = time.perf_counter()
+                row, col = self.q_learning()
+                self.log_move(game_id, row, col, time.perf_counter() - start)
+                if self.check_win(self.player):
+                    self.game_over = True
+                    self.log_result(game_id, self.player, time.perf_counter() - game_start)
+                    self.draw_figures()
+                    self.display_winner(self.player)
+                    break
+                self.player = 'X'
+                self.draw_figures()   
+            self.update()
+            self.pace(0.5)
+
+            if self.player == 'X' and not self.game_over:
+                start = time.perf_counter()
+                if self.ponderer is not None:
+                    move = self.ponderer.best_move(self)
+                else:
+                    move = self.minimax_alpha_beta(0, True, -float('inf'), float('inf'))
+                seconds = time.perf_counter() - start
+                if move['row'] is not None and move['col'] is not None:
+                    self.board[move['row']][move['col']] = 'X'
+                    self.log_move(game_id, move['row'], move['col'], seconds)
+                if self.check_win(self.player):
+                    self.game_over = True
+                    self.log_result(game_id, self.player, time.perf_counter() - game_start)
+                    self.draw_figures()
+                    self.display_winner(self.player)
+                    break
+                self.player = 'O'
+                self.draw_figures()
+                if self.ponderer is not None and not self.check_draw():
+                    self.ponderer.start([row[:] for row in self.board])
+            self.update()
+            self.pace(0.5)
+
+                # if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
+                #     mouseX = event.pos[0]
+                #     mouseY = event.pos[1]
+                #     clicked_row = int(mouseY // self.SQUARE_SIZE)
+                #     clicked_col = int(mouseX // self.SQUARE_SIZE)
+
+                #     if self.board[clicked_row][clicked_col] is None:
+                #         if self.player == 'X':
+                #             self.mark_square(clicked_row, clicked_col, 'X')
+                #             if self.check_win(self.player):
+                #                 self.game_over = True
+                #                 self.draw_figures()
+                #                 self.display_winner(self.player)
+                #                 break
+                #             self.player = 'O'
+                #         elif self.player == 'O':
+                #             self.mark_square(clicked_row, clicked_col, 'O')
+                #             if self.check_win(self.player):
+                #                 self.game_over = True
+                #                 self.draw_figures()
+                #                 self.display_winner(self.player)
+                #                 break
+                #             self.player = 'X'
+                #         self.draw_figures()
+
+                # if event.type == pygame.KEYDOWN:
+                #     if event.key == pygame.K_r:
+                #         self.restart()
+                #         self.game_over = False
+
+            if self.check_draw():
+                self.log_result(game_id, None, time.perf_counter() - game_start)
+                font = pygame.font.Font(None, 50)
+                text = font.render('Draw!', True, (0, 255, 0))
+                self.dirty.append(self.screen.blit(text, (self.WIDTH // 2 - text.get_width() // 2, self.HEIGHT // 2 - text.get_height() // 2)))
+                self.update()
+                break
+
+            if self.game_over:
+                self.display_winner(self.player)
+                self.pace(3)
+                break
+
+            self.update()
+            self.pace(0.5)
+        if self.ponderer is not None:
+            self.ponderer.stop()
+        return self.winner
@@ -0,0 +1,134 @@
+import numpy as np
+
+from tic_tac_toe_solver import CELLS, CODES, SYMMETRIES
+
+POWERS = 3 ** np.arange(CELLS, dtype=np.int64)
+SYMBOLS = '0XO'  # TicTacToe.get_state() characters for base-3 digits 0, 1, 2
+DIGITS = {'0': 0, 'X': 1, 'O': 2}
+# INVERSE[s][a] is where original cell a lands on the board transformed by SYMMETRIES[s]
+INVERSE = np.argsort(np.array(SYMMETRIES), axis=1)
+
+_CANONICAL = None
+
+def canonical_index():
+    # For every code: (dense slot of its canonical code, symmetry index that maps to it).
+    # Computed once per process with array operations over all 3^9 codes.
+    global _CANONICAL
+    if _CANONICAL is None:
+        cells = (np.arange(CODES)[:, None] // POWERS) % 3
+        transformed = np.stack([cells[:, list(perm)] @ POWERS for perm in SYMMETRIES])
+        symmetry = transformed.argmin(axis=0).astype(np.int8)
+        canonical = transformed.min(axis=0)
+        unique, slots = np.unique(canonical, return_inverse=True)
+        _CANONICAL = (slots.astype(np.int32), symmetry, len(unique))
+    return _CANONICAL
+
+def encode_state(state):
+    # get_state() string to base-3 code
+    code = 0
+    for i, ch in enumerate(state):
+        code += DIGITS[ch] * 3 ** i
+    return code
+
+def decode_state(code):
+    chars = []
+    for _ in range(CELLS):
+        chars.append(SYMBOLS[code % 3])
+        code //= 3
+    return ''.join(chars)
+
+class CompactQTable:
+    # Q values for tic-tac-toe in one contiguous float32 array indexed by base-3
+    # position code (see TicTacToe.get_code), with a visited bitmap. With
+    # symmetric=True the 8 rotations/reflections of a position share one row and
+    # actions are permuted into the canonical frame on the way in and out.
+    # Supports `code in table`, `table[code]` and `table[code] = values` so it
+    # can replace the TicTacToe.q_table dict.
+    def __init__(self, symmetric=False):
+        self.symmetric = symmetric
+        if symmetric:
+            self.slots, self.symmetry, rows = canonical_index()
+        else:
+            rows = CODES
+        self.q = np.zeros((rows, CELLS), dtype=np.float32)
+        self.visited = np.zeros((rows + 7) // 8, dtype=np.uint8)
+
+    def slot(self, code):
+        if self.symmetric:
+            return int(self.slots[code]), INVERSE[self.symmetry[code]]
+        return code, None
+
+    def rows(self, code):
+        # Rows a write to `code` touches
+        return (int(self.slots[code]) if self.symmetric else code,)
+
+    def __contains__(self, code):
+        slot = self.slots[code] if self.symmetric else code
+        return bool(self.visited[slot >> 3] & (1 << (slot & 7)))
+
+    def __getitem__(self, code):
+        # A view into the table unless symmetric, where a permuted copy is returned
+        slot, inverse = self.slot(code)
+        if inverse is None:
+            return self.q[slot]
+        return self.q[slot][inverse]
+
+    def __setitem__(self, code, values):
+        slot, inverse = self.slot(code)
+        if inverse is None:
+            self.q[slot] = values
+        else:
+            self.q[slot][inverse] = values
+        self.visited[slot >> 3] |= 1 << (slot & 7)
+
+    def __len__(self):
+        return int(np.unpackbits(self.visited, bitorder='little').sum())
+
+    @property
+    def writable(self):
+        # False for a table mapped with mode 'r'
+        return self.q.flags.writeable
+
+    def get_value(self, code, action):
+        slot, inverse = self.slot(code)
+        return float(self.q[slot, action if inverse is None else inverse[action]])
+
+    def update(self, code, action, value):
+        slot, inverse = self.slot(code)
+        self.q[slot, action if inverse is None else inverse[action]] = value
+        self.visited[slot >> 3] |= 1 << (slot & 7)
+
+    @property
+    def nbytes(self):
+        return self.q.nbytes + self.visited.nbytes + (self.slots.nbytes + self.symmetry.nbytes if self.symmetric else 0)
+
+    def save(self, path):
+        from qtable_file import save_compact
+        save_compact(self, path)
+
+    @staticmethod
+    def open(path, mode='r'):
+        # Maps a saved table without reading it: 'r' for serving, 'r+' to update in place
+        from qtable_file import open_compact
+        return open_compact(path, mode)
+
+    @classmethod
+    def from_dict(cls, q_table, symmetric=False):
+        # From the TicTacToe.q_table format: get_state() string -> 9 Q values.
+        # With symmetric=True, equivalent states keep the last one written.
+        table = cls(symmetric)
+        for state, values in q_table.items():
+            table[encode_state(state)] = values
+        return table
+
+    def to_dict(self):
+        # Visited rows back to the TicTacToe.q_table format. With symmetric=True
+        # only the canonical state of each row is written.
+        if self.symmetric:
+            codes = {}
+            for code in range(CODES - 1, -1, -1):
+                codes[int(self.slots[code])] = code
+            visited = np.flatnonzero(np.unpackbits(self.visited, bitorder='little')[:len(self.q)])
+            return {decode_state(codes[slot]): self[codes[slot]].astype(np.float64) for slot in visited}
+        visited = np.flatnonzero(np.unpackbits(self.visited, bitorder='little')[:len(self.q)])
+        return {decode_state(int(code)): self.q[code].astype(np.float64) for code in visited}
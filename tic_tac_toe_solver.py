@@ -0,0 +1,182 @@
+import os
+import struct
+from array import array
+
+# Cell values in a base-3 position code: code = sum(cell * 3 ** index), index = row * 3 + col
+EMPTY, X, O = 0, 1, 2
+SYMBOLS = {None: EMPTY, 'X': X, 'O': O}
+CELLS = 9
+CODES = 3 ** CELLS
+POWERS = [3 ** i for i in range(CELLS)]
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+# The 8 board symmetries as permutations: cell i of the transformed board is cell perm[i] of the original
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+MAGIC = b'TTTS'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')  # magic, version, entry count
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tic_tac_toe_table.bin')
+
+def encode(cells):
+    return sum(cell * POWERS[i] for i, cell in enumerate(cells))
+
+def decode(code):
+    cells = []
+    for _ in range(CELLS):
+        cells.append(code % 3)
+        code //= 3
+    return cells
+
+def encode_board(board):
+    return encode([SYMBOLS[cell] for row in board for cell in row])
+
+def winner(cells):
+    for a, b, c in LINES:
+        if cells[a] != EMPTY and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return EMPTY
+
+def canonical(cells):
+    # Returns (canonical code, symmetry index) with the smallest code over all symmetries
+    best = None
+    for s, perm in enumerate(SYMMETRIES):
+        code = encode([cells[perm[i]] for i in range(CELLS)])
+        if best is None or code < best[0]:
+            best = (code, s)
+    return best
+
+class TicTacToeSolver:
+    # Perfect-play table for every legal position with either side to move.
+    # Values are from O's point of view like TicTacToe.minimax: 1 O wins, -1 X wins, 0 draw.
+    # The file holds canonical positions only; load() expands them into dense arrays
+    # indexed by code * 2 + side so lookups are plain array reads.
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.values = array('b', bytes(2 * CODES))
+        self.moves = array('b', [-1]) * (2 * CODES)
+        self.known = array('B', bytes(2 * CODES))
+        self.entries = []  # canonical (code, side, value, move)
+        if path is not None and os.path.exists(path):
+            self.load(path)
+        else:
+            self.build()
+            if path is not None:
+                try:
+                    self.save(path)
+                except OSError:
+                    pass
+
+    def build(self):
+        memo = {}
+
+        def solve(cells, side):
+            # Negamax over the side to move, returns (score for side, plies to the end)
+            key = (encode(cells), side)
+            if key in memo:
+                return memo[key][:2]
+            best = None
+            best_move = -1
+            for move in range(CELLS):
+                if cells[move] != EMPTY:
+                    continue
+                cells[move] = side
+                if winner(cells) == side:
+                    result = (1, 1)
+                elif EMPTY not in cells:
+                    result = (0, 1)
+                else:
+                    score, plies = solve(cells, 3 - side)
+                    result = (-score, plies + 1)
+                cells[move] = EMPTY
+                # Prefer the higher score, then the quickest win or the slowest loss
+                if best is None or result[0] > best[0] or (result[0] == best[0] and (result[1] < best[1] if result[0] > 0 else result[1] > best[1])):
+                    best = result
+                    best_move = move
+            memo[key] = (best[0], best[1], best_move)
+            return best
+
+        start = [EMPTY] * CELLS
+        solve(start, X)
+        solve(start, O)
+
+        entries = {}
+        for (code, side), (score, _, move) in memo.items():
+            cells = decode(code)
+            canon, s = canonical(cells)
+            if (canon, side) not in entries:
+                perm = SYMMETRIES[s]
+                value = score if side == O else -score
+                entries[(canon, side)] = (value, perm.index(move))
+        self.entries = sorted((code, side, value, move) for (code, side), (value, move) in entries.items())
+        self.expand()
+
+    def expand(self):
+        for canon, side, value, move in self.entries:
+            cells = decode(canon)
+            for perm in SYMMETRIES:
+                # perm maps canonical cells back onto an equivalent board
+                original = [EMPTY] * CELLS
+                for i in range(CELLS):
+                    original[perm[i]] = cells[i]
+                index = encode(original) * 2 + (side - 1)
+                self.values[index] = value
+                self.moves[index] = perm[move]
+                self.known[index] = 1
+
+    def save(self, path):
+        codes = array('H', (entry[0] for entry in self.entries))
+        sides = array('b', (entry[1] for entry in self.entries))
+        values = array('b', (entry[2] for entry in self.entries))
+        moves = array('b', (entry[3] for entry in self.entries))
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.entries)))
+            for column in (codes, sides, values, moves):
+                column.tofile(f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            magic, version, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("%s is not a version %d tic-tac-toe table" % (path, VERSION))
+            columns = []
+            for typecode in ('H', 'b', 'b', 'b'):
+                column = array(typecode)
+                column.fromfile(f, count)
+                columns.append(column)
+        self.entries = list(zip(*columns))
+        self.expand()
+
+    def lookup(self, code, side):
+        # Returns (value, move) or None for a finished or illegal position
+        index = code * 2 + (side - 1)
+        if not self.known[index]:
+            return None
+        return self.values[index], self.moves[index]
+
+    def best_move(self, board, player):
+        entry = self.lookup(encode_board(board), SYMBOLS[player])
+        if entry is None:
+            return {'score': None, 'row': None, 'col': None}
+        value, move = entry
+        return {'score': value, 'row': move // 3, 'col': move % 3}
+
+_SOLVER = None
+
+def get_solver(path=DEFAULT_PATH):
+    # Shared table, loaded (or built) once per process
+    global _SOLVER
+    if _SOLVER is None:
+        _SOLVER = TicTacToeSolver(path)
+    return _SOLVER
@@ -0,0 +1,240 @@
+import argparse
+import time
+
+import numpy as np
+
+from tic_tac_toe_solver import CODES, CELLS, LINES, get_solver
+
+EMPTY, X, O = 0, 1, 2
+POWERS = 3 ** np.arange(CELLS, dtype=np.int64)
+LINE_INDEX = np.array(LINES, dtype=np.intp)
+SYMBOLS = '0XO'
+
+class VectorizedQTrainer:
+    # Trains a tabular Q policy for 'O' (the side TicTacToe.q_learning plays) on
+    # many games at once. Boards are (N, 9) int8 arrays, states are base-3 codes
+    # and Q is a dense (3^9, 9) float32 table, so a step for every game is a
+    # handful of array operations. A transition runs from one O decision to the
+    # next, i.e. it includes the opponent's reply.
+    def __init__(self, envs=1024, alpha=0.5, gamma=0.9, epsilon=0.1, opponent='solver', opponent_epsilon=0.0,
+                 win_reward=1.0, loss_reward=-1.0, draw_reward=0.0, step_reward=-0.01, seed=None):
+        self.envs = envs
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.opponent = opponent
+        self.opponent_epsilon = opponent_epsilon
+        self.win_reward = win_reward
+        self.loss_reward = loss_reward
+        self.draw_reward = draw_reward
+        self.step_reward = step_reward
+        self.rng = np.random.default_rng(seed)
+        self.q = np.zeros((CODES, CELLS), dtype=np.float32)
+        self.visited = np.zeros(CODES, dtype=bool)
+        if opponent == 'solver':
+            solver = get_solver()
+            self.solver_moves = np.frombuffer(solver.moves, dtype=np.int8)
+        elif opponent != 'random':
+            raise ValueError("opponent must be 'solver' or 'random', got %r" % opponent)
+        self.boards = np.zeros((envs, CELLS), dtype=np.int8)
+        self.codes = np.zeros(envs, dtype=np.int64)
+        self.games = 0
+        self.steps = 0
+        self.reset(np.ones(envs, dtype=bool))
+
+    def random_legal(self, boards):
+        # Uniform choice among empty cells for every row
+        noise = self.rng.random(boards.shape)
+        noise[boards != EMPTY] = -1.0
+        return noise.argmax(axis=1)
+
+    def greedy(self, boards, codes):
+        q = self.q[codes]
+        q[boards != EMPTY] = -np.inf
+        # Random tie-break among the best legal actions
+        best = q == q.max(axis=1, keepdims=True)
+        noise = self.rng.random(boards.shape)
+        noise[~best] = -1.0
+        return noise.argmax(axis=1)
+
+    def opponent_moves(self, boards, codes):
+        if self.opponent == 'solver':
+            moves = self.solver_moves[codes * 2 + (X - 1)].astype(np.intp)
+            if self.opponent_epsilon > 0:
+                explore = self.rng.random(len(codes)) < self.opponent_epsilon
+                if explore.any():
+                    moves[explore] = self.random_legal(boards[explore])
+            return moves
+        return self.random_legal(boards)
+
+    def place(self, rows, moves, piece):
+        self.boards[rows, moves] = piece
+        self.codes[rows] += piece * POWERS[moves]
+
+    def wins(self, rows, piece):
+        return (self.boards[rows][:, LINE_INDEX] == piece).all(axis=2).any(axis=1)
+
+    def full(self, rows):
+        return (self.boards[rows] != EMPTY).all(axis=1)
+
+    def reset(self, mask):
+        rows = np.flatnonzero(mask)
+        self.boards[rows] = EMPTY
+        self.codes[rows] = 0
+        # Half of the games start with the opponent's move
+        x_first = rows[self.rng.random(len(rows)) < 0.5]
+        if len(x_first):
+            self.place(x_first, self.opponent_moves(self.boards[x_first], self.codes[x_first]), X)
+
+    def step(self):
+        # One O decision and the opponent's reply for every game, then a batched Q update.
+        # Returns the (o_win, x_win, draw) masks of the games that finished.
+        n = self.envs
+        rows = np.arange(n)
+        states = self.codes.copy()
+        self.visited[states] = True
+
+        explore = self.rng.random(n) < self.epsilon
+        actions = self.greedy(self.boards, states)
+        if explore.any():
+            actions[explore] = self.random_legal(self.boards[explore])
+        self.place(rows, actions, O)
+
+        o_win = self.wins(rows, O)
+        draw = ~o_win & self.full(rows)
+        x_win = np.zeros(n, dtype=bool)
+        live = np.flatnonzero(~(o_win | draw))
+        if len(live):
+            self.place(live, self.opponent_moves(self.boards[live], self.codes[live]), X)
+            x_win[live] = self.wins(live, X)
+            draw[live] |= ~x_win[live] & self.full(live)
+        done = o_win | x_win | draw
+
+        reward = np.full(n, self.step_reward, dtype=np.float32)
+        reward[o_win] = self.win_reward
+        reward[x_win] = self.loss_reward
+        reward[draw] = self.draw_reward
+
+        next_q = self.q[self.codes]
+        next_q[self.boards != EMPTY] = -np.inf
+        next_max = next_q.max(axis=1)
+        next_max[done] = 0.0
+        target = reward + self.gamma * next_max
+
+        # Games that hit the same (state, action) in one batch share the mean update
+        flat = states * CELLS + actions
+        delta = target - self.q.reshape(-1)[flat]
+        unique, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+        summed = np.bincount(inverse, weights=delta, minlength=len(unique))
+        self.q.reshape(-1)[unique] += (self.alpha * summed / counts).astype(np.float32)
+
+        self.steps += n
+        self.games += int(done.sum())
+        if done.any():
+            self.reset(done)
+        return o_win, x_win, draw
+
+    def evaluate(self, games=1000):
+        # Greedy play (no exploration, no updates) against a perfect opponent,
+        # half the games with each side first. Returns (win, draw, loss) rates.
+        boards = np.zeros((games, CELLS), dtype=np.int8)
+        codes = np.zeros(games, dtype=np.int64)
+        solver_moves = np.frombuffer(get_solver().moves, dtype=np.int8)
+        result = np.zeros(games, dtype=np.int8)  # 1 win, 0 draw, -1 loss
+        live = np.ones(games, dtype=bool)
+        x_first = np.arange(games) % 2 == 1
+        moves = solver_moves[codes[x_first] * 2].astype(np.intp)
+        boards[x_first, moves] = X
+        codes[x_first] += X * POWERS[moves]
+        while live.any():
+            rows = np.flatnonzero(live)
+            q = self.q[codes[rows]]
+            q[boards[rows] != EMPTY] = -np.inf
+            moves = q.argmax(axis=1)
+            boards[rows, moves] = O
+            codes[rows] += O * POWERS[moves]
+            won = (boards[rows][:, LINE_INDEX] == O).all(axis=2).any(axis=1)
+            full = (boards[rows] != EMPTY).all(axis=1)
+            result[rows[won]] = 1
+            live[rows[won | full]] = False
+            rows = rows[~(won | full)]
+            if not len(rows):
+                break
+            moves = solver_moves[codes[rows] * 2].astype(np.intp)
+            boards[rows, moves] = X
+            codes[rows] += X * POWERS[moves]
+            lost = (boards[rows][:, LINE_INDEX] == X).all(axis=2).any(axis=1)
+            full = (boards[rows] != EMPTY).all(axis=1)
+            result[rows[lost]] = -1
+            live[rows[lost | full]] = False
+        return float((result == 1).mean()), float((result == 0).mean()), float((result == -1).mean())
+
+    def train(self, games, eval_every=None, eval_games=1000, callback=None):
+        # Runs until at least `games` more games have finished. Returns a list of
+        # convergence points (games, steps, seconds, win, draw, loss) taken every
+        # eval_every games.
+        target = self.games + games
+        curve = []
+        start = time.perf_counter()
+        next_eval = self.games + eval_every if eval_every else None
+        while self.games < target:
+            self.step()
+            if next_eval is not None and self.games >= next_eval:
+                elapsed = time.perf_counter() - start
+                point = (self.games, self.steps, elapsed) + self.evaluate(eval_games)
+                curve.append(point)
+                if callback is not None:
+                    callback(point)
+                next_eval += eval_every
+        self.elapsed = time.perf_counter() - start
+        return curve
+
+    def to_compact_table(self):
+        # Shares the trained array with a CompactQTable, no copy
+        from tic_tac_toe_qtable import CompactQTable
+        table = CompactQTable()
+        table.q = self.q
+        table.visited = np.packbits(self.visited, bitorder='little')
+        return table
+
+    def to_q_table(self):
+        # Visited states in TicTacToe.q_table format: get_state() string -> 9 Q values
+        table = {}
+        for code in np.flatnonzero(self.visited):
+            cells = []
+            c = int(code)
+            for _ in range(CELLS):
+                cells.append(SYMBOLS[c % 3])
+                c //= 3
+            table[''.join(cells)] = self.q[code].astype(np.float64)
+        return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a tic-tac-toe Q policy on many games at once.")
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--games', type=int, default=200000)
+    parser.add_argument('--alpha', type=float, default=0.5)
+    parser.add_argument('--gamma', type=float, default=0.9)
+    parser.add_argument('--epsilon', type=float, default=0.1)
+    parser.add_argument('--opponent', choices=('solver', 'random'), default='solver')
+    parser.add_argument('--opponent-epsilon', type=float, default=0.2, help="random move rate of the solver opponent")
+    parser.add_argument('--eval-every', type=int, default=20000)
+    parser.add_argument('--eval-games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--save', metavar='PATH', help="write the trained table to PATH")
+    args = parser.parse_args(argv)
+
+    trainer = VectorizedQTrainer(args.envs, args.alpha, args.gamma, args.epsilon, args.opponent, args.opponent_epsilon, seed=args.seed)
+
+    def report(point):
+        games, steps, elapsed, win, draw, loss = point
+        print("%9d games  %8.0f games/s  vs minimax: win %.3f draw %.3f loss %.3f" % (games, games / elapsed, win, draw, loss), flush=True)
+
+    trainer.train(args.games, args.eval_every, args.eval_games, report)
+    print("%d games, %d steps in %.1fs: %.0f games/s, %.0f steps/s, %d states visited" % (
+        trainer.games, trainer.steps, trainer.elapsed, trainer.games / trainer.elapsed, trainer.steps / trainer.elapsed, int(trainer.visited.sum())))
+    if args.save:
+        trainer.to_compact_table().save(args.save)
+
+if __name__ == "__main__":
+    main()
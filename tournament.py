@@ -0,0 +1,289 @@
+import argparse
+import math
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from connect_four import BitBoard, ConnectFour
+from tic_tac_toe import TicTacToe
+
+# Engines are created once per worker process so transposition tables and
+# Q-tables carry over from one game to the next. The settings are applied on
+# every call, so a cached engine never keeps the budget of an earlier task.
+_ENGINES = {}
+
+def get_engine(game, move_time=None, search='minimax', playouts=None):
+    engine = _ENGINES.get(game)
+    if engine is None:
+        if game == 'connect4':
+            engine = ConnectFour()
+        elif game in ('mcts', 'mcts_rave'):
+            from mcts import MCTS
+            engine = MCTS(rave=game == 'mcts_rave')
+        else:
+            engine = TicTacToe()
+        _ENGINES[game] = engine
+    if game == 'connect4':
+        engine.move_time = move_time
+        engine.search_algorithm = search
+        # The mcts agents take their budget from the game engine they are handed
+        engine.mcts_playouts = playouts
+    elif game in ('mcts', 'mcts_rave'):
+        # Connect Four tree search, budgeted by playouts or else by move_time (1s by default)
+        engine.move_time = 1.0 if move_time is None else move_time
+        engine.playouts = playouts
+    return engine
+
+# Tic-tac-toe agents always play 'O' on a board seen from their own side,
+# because the engine methods (ai_move, q_learning, minimax) all move for 'O'.
+def swap_sides(board):
+    swap = {'X': 'O', 'O': 'X', None: None}
+    for row in board:
+        for col in range(len(row)):
+            row[col] = swap[row[col]]
+
+def ttt_empty_cells(game):
+    return [(row, col) for row in range(game.BOARD_ROWS) for col in range(game.BOARD_COLS) if game.board[row][col] is None]
+
+def ttt_minimax(game):
+    move = game.minimax(0, True)
+    return move['row'], move['col']
+
+def ttt_minimax_alpha_beta(game):
+    move = game.minimax_alpha_beta(0, True, -float('inf'), float('inf'))
+    return move['row'], move['col']
+
+def ttt_solver(game):
+    move = game.solver_move('O')
+    return move['row'], move['col']
+
+def ttt_q_learning(game):
+    row, col = game.q_learning()
+    game.board[row][col] = None
+    return row, col
+
+def ttt_heuristic(game):
+    empty = ttt_empty_cells(game)
+    game.ai_move()
+    for row, col in empty:
+        if game.board[row][col] is not None:
+            game.board[row][col] = None
+            return row, col
+
+def ttt_random(game):
+    return random.choice(ttt_empty_cells(game))
+
+TIC_TAC_TOE_AGENTS = {
+    'minimax': ttt_minimax,
+    'minimax_alpha_beta': ttt_minimax_alpha_beta,
+    'solver': ttt_solver,
+    'q_learning': ttt_q_learning,
+    'heuristic': ttt_heuristic,
+    'random': ttt_random,
+}
+
+# Connect Four agents get the live bitboard and the piece they play and must leave it unchanged
+def c4_minimax(game, bitboard, piece, depth):
+    board = bitboard.to_array()
+    if piece == 1:
+        # minimax maximizes for piece 2, so present the position from that side
+        board = np.where(board > 0, 3 - board, 0)
+    if game.move_time is not None:
+        col, _, _ = game.iterative_deepening(BitBoard.from_array(board, 2), game.move_time, depth)
+    elif game.search_algorithm == 'pvs':
+        col, _ = game.pvs(BitBoard.from_array(board, 2), depth, True, -math.inf, math.inf)
+    else:
+        col, _ = game.minimax(BitBoard.from_array(board, 2), depth, True, -math.inf, math.inf)
+    return col
+
+def c4_heuristic(game, bitboard, piece, depth):
+    return game.get_best_move(bitboard, piece)
+
+def c4_random(game, bitboard, piece, depth):
+    return random.choice(bitboard.valid_columns())
+
+def c4_mcts(game, bitboard, piece, depth):
+    return get_engine('mcts', game.move_time, playouts=game.mcts_playouts).best_move(bitboard)
+
+def c4_mcts_rave(game, bitboard, piece, depth):
+    return get_engine('mcts_rave', game.move_time, playouts=game.mcts_playouts).best_move(bitboard)
+
+CONNECT_FOUR_AGENTS = {
+    'minimax': c4_minimax,
+    'heuristic': c4_heuristic,
+    'random': c4_random,
+    'mcts': c4_mcts,
+    'mcts_rave': c4_mcts_rave,
+}
+
+AGENTS = {'tictactoe': TIC_TAC_TOE_AGENTS, 'connect4': CONNECT_FOUR_AGENTS}
+
+def play_tic_tac_toe(agents):
+    game = get_engine('tictactoe')
+    game.board = [[None for _ in range(game.BOARD_COLS)] for _ in range(game.BOARD_ROWS)]
+    sides = ('X', 'O')
+    latencies = ([], [])
+    moves = []
+    winner = None
+    for ply in range(game.BOARD_ROWS * game.BOARD_COLS):
+        turn = ply % 2
+        side = sides[turn]
+        if side == 'X':
+            swap_sides(game.board)
+        start = time.perf_counter()
+        row, col = TIC_TAC_TOE_AGENTS[agents[turn]](game)
+        latencies[turn].append(time.perf_counter() - start)
+        if side == 'X':
+            swap_sides(game.board)
+        game.board[row][col] = side
+        moves.append(row * game.BOARD_COLS + col)
+        if game.check_win(side):
+            winner = turn
+            break
+    return winner, moves, latencies
+
+def play_connect_four(agents, depth, move_time, search, playouts=None):
+    game = get_engine('connect4', move_time, search, playouts)
+    bitboard = BitBoard()
+    latencies = ([], [])
+    moves = []
+    winner = None
+    while not bitboard.is_full():
+        turn = bitboard.moves % 2
+        piece = turn + 1
+        start = time.perf_counter()
+        col = CONNECT_FOUR_AGENTS[agents[turn]](game, bitboard, piece, depth)
+        latencies[turn].append(time.perf_counter() - start)
+        bitboard.play(col)
+        moves.append(col)
+        if bitboard.winning_move(piece):
+            winner = turn
+            break
+    return winner, moves, latencies
+
+def play_game(task):
+    index, game, agent_a, agent_b, seed, depth, move_time, search, playouts = task
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    # Agent A moves first in even games, colours alternate after that
+    a_first = index % 2 == 0
+    agents = (agent_a, agent_b) if a_first else (agent_b, agent_a)
+    if game == 'connect4':
+        winner, moves, latencies = play_connect_four(agents, depth, move_time, search, playouts)
+    else:
+        winner, moves, latencies = play_tic_tac_toe(agents)
+    first, second = ('A', 'B') if a_first else ('B', 'A')
+    order = (first, second)
+    return {
+        'index': index,
+        'seed': seed,
+        'first': first,
+        'winner': None if winner is None else order[winner],
+        'moves': moves,
+        'latency': {order[0]: latencies[0], order[1]: latencies[1]},
+    }
+
+def run_tournament(game, agent_a, agent_b, games, workers=None, seed=0, depth=4, move_time=None, search='minimax', playouts=None):
+    # Yields one result per game as soon as it finishes, not in game order
+    for name in (agent_a, agent_b):
+        if name not in AGENTS[game]:
+            raise ValueError("unknown %s agent %r, expected one of %s" % (game, name, ', '.join(AGENTS[game])))
+    tasks = [(i, game, agent_a, agent_b, seed + i, depth, move_time, search, playouts) for i in range(games)]
+    if workers == 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            yield result
+
+def log_result(log, result):
+    # The player who moved first is side 0 in the log
+    first = result['first']
+    second = 'B' if first == 'A' else 'A'
+    latency = (result['latency'][first], result['latency'][second])
+    seconds = [latency[ply % 2][ply // 2] for ply in range(len(result['moves']))]
+    winner = None if result['winner'] is None else (0 if result['winner'] == first else 1)
+    log.write_game(result['moves'], winner, seconds=seconds)
+
+def wilson_interval(successes, total, z=1.96):
+    if total == 0:
+        return 0.0, 0.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    centre = (p + z * z / (2 * total)) / denominator
+    half = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+def summarize(results):
+    total = len(results)
+    counts = {'win': 0, 'draw': 0, 'loss': 0}
+    latency = {'A': [], 'B': []}
+    for result in results:
+        if result['winner'] is None:
+            counts['draw'] += 1
+        elif result['winner'] == 'A':
+            counts['win'] += 1
+        else:
+            counts['loss'] += 1
+        for agent in ('A', 'B'):
+            latency[agent].extend(result['latency'][agent])
+    summary = {'games': total}
+    for outcome, count in counts.items():
+        low, high = wilson_interval(count, total)
+        summary[outcome] = {'count': count, 'rate': count / total if total else 0.0, 'ci95': (low, high)}
+    for agent in ('A', 'B'):
+        times = np.array(latency[agent]) if latency[agent] else np.zeros(1)
+        summary['latency_' + agent] = {
+            'moves': len(latency[agent]),
+            'mean': float(times.mean()),
+            'p50': float(np.percentile(times, 50)),
+            'p95': float(np.percentile(times, 95)),
+            'max': float(times.max()),
+        }
+    return summary
+
+def print_summary(summary, agent_a, agent_b):
+    print("%d games, A=%s vs B=%s" % (summary['games'], agent_a, agent_b))
+    for outcome in ('win', 'draw', 'loss'):
+        entry = summary[outcome]
+        print("  A %-4s %5d  %6.1f%%  (95%% CI %.1f-%.1f%%)" % (outcome, entry['count'], 100 * entry['rate'], 100 * entry['ci95'][0], 100 * entry['ci95'][1]))
+    for agent, name in (('A', agent_a), ('B', agent_b)):
+        entry = summary['latency_' + agent]
+        print("  %s %-18s %6d moves  mean %.2fms  p50 %.2fms  p95 %.2fms  max %.2fms" % (agent, name, entry['moves'], 1000 * entry['mean'], 1000 * entry['p50'], 1000 * entry['p95'], 1000 * entry['max']))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play head-to-head games between two agents without rendering.")
+    parser.add_argument('game', choices=sorted(AGENTS))
+    parser.add_argument('agent_a')
+    parser.add_argument('agent_b')
+    parser.add_argument('-n', '--games', type=int, default=100)
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores, 1 runs inline)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=4, help="Connect Four minimax depth (maximum depth with --move-time)")
+    parser.add_argument('--move-time', type=float, default=None, help="Connect Four minimax seconds per move, searched with iterative deepening")
+    parser.add_argument('--search', choices=('minimax', 'pvs'), default='minimax', help="Connect Four minimax search algorithm")
+    parser.add_argument('--playouts', type=int, default=None, help="Connect Four MCTS playouts per move (default: --move-time, or 1s)")
+    parser.add_argument('--log', default=None, help="append the games to this game log (see game_log.py)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="only print the summary")
+    args = parser.parse_args(argv)
+
+    log = None
+    if args.log is not None:
+        from game_log import GameLog
+        log = GameLog(args.log, args.game)
+    results = []
+    for result in run_tournament(args.game, args.agent_a, args.agent_b, args.games, args.workers, args.seed, args.depth, args.move_time, args.search, args.playouts):
+        results.append(result)
+        if log is not None:
+            log_result(log, result)
+        if not args.quiet:
+            print("game %d: first=%s winner=%s moves=%d" % (result['index'], result['first'], result['winner'] or 'draw', len(result['moves'])), flush=True)
+    if log is not None:
+        log.close()
+    print_summary(summarize(results), args.agent_a, args.agent_b)
+
+if __name__ == "__main__":
+    main()